@@ -0,0 +1,175 @@
+import abc
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import random
+import time
+from typing import Dict, List, Tuple
+from aiohttp import web
+
+def synthetic_cities(count: int) -> List[Tuple[str, str]]:
+    """
+    Deterministic (city, country) pairs for benchmark runs, spread over 50 countries
+    """
+    return [(f"City {index:05d}", f"Country {index % 50:02d}") for index in range(count)]
+
+def synthetic_country_codes(cities: List[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    [CountryCodes] entries for the countries used by synthetic_cities
+    """
+    return {country: f"c{country.split()[-1]}" for country in sorted({country for _, country in cities})}
+
+def synthetic_temperature(city: str) -> Tuple[float, float]:
+    """
+    Stable (temperature, feels_like) for a city so both fake sources agree run to run
+    """
+    digest = hashlib.md5(city.lower().encode()).digest()
+    temperature = round(digest[0] / 255 * 40 - 5, 1)
+    return temperature, round(temperature - digest[1] / 255 * 3, 1)
+
+class FakeServer(abc.ABC):
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Base for local stand-ins of the weather sources
+
+        Args:
+            latency (float): Fixed delay added to every response, in seconds
+            jitter (float): Upper bound of an extra uniformly random delay, in seconds
+            error_rate (float): Fraction of requests answered with HTTP 500
+            seed (int): Seed for the jitter and error sequence
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    async def _delay(self) -> bool:
+        """
+        Sleep for the configured latency and decide whether this request fails
+
+        Returns:
+            bool: True if the request should be answered with an error
+        """
+        self.requests += 1
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.random.random() < self.error_rate
+
+    @abc.abstractmethod
+    def routes(self, app: web.Application):
+        """
+        Register this server's handlers on the application
+        """
+
+class FakeOpenWeatherMapServer(FakeServer):
+    """
+    Serves /data/2.5/weather and /data/2.5/group in the OpenWeatherMap response shape
+    """
+    def routes(self, app: web.Application):
+        app.router.add_get("/data/2.5/weather", self.weather)
+        app.router.add_get("/data/2.5/group", self.group)
+
+    @staticmethod
+    def _city_json(city: str) -> Dict:
+        temperature, feels_like = synthetic_temperature(city)
+        return {"name": city, "main": {"temp": temperature, "feels_like": feels_like}}
+
+    async def weather(self, request: web.Request) -> web.Response:
+        if await self._delay():
+            return web.Response(status=500)
+        return web.json_response(self._city_json(request.query.get("q", "")))
+
+    async def group(self, request: web.Request) -> web.Response:
+        if await self._delay():
+            return web.Response(status=500)
+        ids = [city_id for city_id in request.query.get("id", "").split(",") if city_id]
+        return web.json_response({"cnt": len(ids), "list": [dict(self._city_json(city_id), id=int(city_id)) for city_id in ids]})
+
+class FakeTimeAndDateServer(FakeServer):
+    """
+    Serves /weather/{country}/{city} pages with the markup the weather page parser reads
+    """
+    PAGE = ('<html><body><div id="qlook"><div class="h2">{temperature}&nbsp;°C</div>'
+            '<p>Feels Like: {feels_like}&nbsp;°C<br>Forecast: 20 / 12&nbsp;°C</p></div></body></html>')
+
+    def routes(self, app: web.Application):
+        app.router.add_get("/weather/{country}/{city}", self.page)
+
+    async def page(self, request: web.Request) -> web.Response:
+        if await self._delay():
+            return web.Response(status=500)
+        # Page slugs are lowercase with dashes; temperatures are keyed on the original name
+        city = request.match_info["city"].replace("-", " ")
+        temperature, feels_like = synthetic_temperature(city)
+        return web.Response(text=self.PAGE.format(temperature=temperature, feels_like=feels_like),
+                            content_type="text/html")
+
+async def _serve(servers: List[FakeServer], ready, stop_event):
+    runners = []
+    ports = []
+    for server in servers:
+        app = web.Application()
+        server.routes(app)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        runners.append(runner)
+        ports.append(site._server.sockets[0].getsockname()[1])
+    ready.send(ports)
+    while not stop_event.is_set():
+        await asyncio.sleep(0.1)
+    for runner in runners:
+        await runner.cleanup()
+
+def _server_process(options: Dict, ready, stop_event):
+    logging.getLogger("aiohttp").setLevel(logging.ERROR)
+    servers = [FakeOpenWeatherMapServer(**options), FakeTimeAndDateServer(**dict(options, seed=options.get("seed", 0) + 1))]
+    asyncio.run(_serve(servers, ready, stop_event))
+
+class FakeWeatherServers:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        Runs the fake OpenWeatherMap and timeanddate.com servers in a child process
+
+        Keeping the servers out of the benchmark process means their CPU time and
+        allocations do not show up in the client's throughput and memory figures.
+
+        Args:
+            latency (float): Fixed delay added to every response, in seconds
+            jitter (float): Upper bound of an extra uniformly random delay, in seconds
+            error_rate (float): Fraction of requests answered with HTTP 500
+            seed (int): Seed for the jitter and error sequence
+        """
+        self.options = {"latency": latency, "jitter": jitter, "error_rate": error_rate, "seed": seed}
+        self.process = None
+        self.stop_event = None
+        self.api_url = None
+        self.group_url = None
+        self.site_url = None
+
+    def __enter__(self):
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self.stop_event = context.Event()
+        self.process = context.Process(target=_server_process, args=(self.options, sender, self.stop_event), daemon=True)
+        self.process.start()
+        deadline = time.monotonic() + 30
+        while not receiver.poll(0.1):
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                self.process.terminate()
+                raise RuntimeError("Fake weather servers did not start")
+        api_port, site_port = receiver.recv()
+        self.api_url = f"http://127.0.0.1:{api_port}/data/2.5/weather"
+        self.group_url = f"http://127.0.0.1:{api_port}/data/2.5/group"
+        self.site_url = f"http://127.0.0.1:{site_port}/weather"
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop_event.set()
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import math
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from ..utilities.api_helpers import ApiHelper
+from ..utilities.config_helpers import ConfigHelper
+from ..utilities.db_helpers import DatabaseHelper
+from ..utilities.report_generator import ReportGenerator
+from ..utilities.web_scraper import WebScraper
+from .fake_servers import FakeWeatherServers, synthetic_cities, synthetic_country_codes, synthetic_temperature
+
+DEFAULT_SIZES = (20, 1000, 10000)
+STAGES = ("api", "scraper", "db_ingest", "report")
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+BENCHMARK_CONFIG = """[API]
+BASE_URL = {api_url}
+GROUP_URL = {group_url}
+MAX_CONCURRENCY = {api_concurrency}
+REQUEST_TIMEOUT = 30
+BULK_MODE = false
+
+[Database]
+DB_NAME = {db_name}
+
+[Scraper]
+BACKEND = http
+BROWSER_FALLBACK = false
+BASE_URL = {site_url}
+CONCURRENCY = {scraper_concurrency}
+REQUESTS_PER_SECOND = 0
+
+[Cache]
+ENABLED = false
+
+[Catalog]
+ENABLED = false
+
+[CountryCodes]
+{country_codes}
+"""
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted sequence
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(cities: int, elapsed: float, latencies: List[float], peak_bytes: int, failures: int = 0) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "cities": cities,
+        "failures": failures,
+        "seconds": round(elapsed, 4),
+        "cities_per_second": round(cities / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3)
+        },
+        "peak_memory_mb": round(peak_bytes / (1024 * 1024), 3)
+    }
+
+async def measure(cities: int, body: Callable[[List[float]], Awaitable[int]]) -> Dict:
+    """
+    Run one stage under tracemalloc and summarise it
+
+    Args:
+        cities (int): Number of cities the stage processes
+        body (Callable): Coroutine function that appends per-city latencies to the list it is given
+            and returns the number of cities that failed
+    """
+    latencies: List[float] = []
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        failures = await body(latencies)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(cities, elapsed, latencies, peak, failures)
+
+async def bench_api(config: ConfigHelper, cities: List[Tuple[str, str]]) -> Dict:
+    async def body(latencies: List[float]) -> int:
+        async with ApiHelper(config) as api:
+            semaphore = asyncio.Semaphore(api.max_concurrency)
+
+            async def fetch(city: str) -> bool:
+                # Latency is timed inside the concurrency limit so it reflects the request, not the queue
+                async with semaphore:
+                    started = time.perf_counter()
+                    data = await api.fetch_temperature_data(city, api.session)
+                    latencies.append(time.perf_counter() - started)
+                return data is not None
+            results = await asyncio.gather(*(fetch(f"{city}, {country}") for city, country in cities))
+        return results.count(False)
+    return await measure(len(cities), body)
+
+async def bench_scraper(config: ConfigHelper, cities: List[Tuple[str, str]]) -> Dict:
+    async def body(latencies: List[float]) -> int:
+        async with WebScraper(config) as scraper:
+            semaphore = asyncio.Semaphore(scraper.concurrency)
+
+            async def scrape(city: str, country: str) -> bool:
+                async with semaphore:
+                    started = time.perf_counter()
+                    data = await scraper.extract_temperature_data(city, country)
+                    latencies.append(time.perf_counter() - started)
+                return data is not None
+            results = await asyncio.gather(*(scrape(city, country) for city, country in cities))
+        return results.count(False)
+    return await measure(len(cities), body)
+
+def _observations(cities: List[Tuple[str, str]]) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, Tuple[float, float]]]:
+    web_data, api_data = {}, {}
+    for index, (city, country) in enumerate(cities):
+        temperature, feels_like = synthetic_temperature(city)
+        offset = (index % 7) * 0.5
+        web_data[f"{city}, {country}"] = (temperature + offset, feels_like)
+        api_data[f"{city}, {country}"] = (temperature, feels_like + offset)
+    return web_data, api_data
+
+async def bench_db_ingest(config: ConfigHelper, cities: List[Tuple[str, str]], batch_size: int = 500) -> Dict:
+    web_data, api_data = _observations(cities)
+    keys = list(web_data)
+
+    async def body(latencies: List[float]) -> int:
+        db = DatabaseHelper(config)
+        try:
+            db.create_tables()
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                started = time.perf_counter()
+                db.store_weather_results({k: web_data[k] for k in batch}, {k: api_data[k] for k in batch})
+                # Rows are committed a batch at a time, so each city is charged its share of the batch
+                latencies.extend([(time.perf_counter() - started) / len(batch)] * len(batch))
+        finally:
+            db.close()
+        return 0
+    return await measure(len(cities), body)
+
+async def bench_report(reports_dir: str, cities: List[Tuple[str, str]], fmt: str) -> Dict:
+    web_data, api_data = _observations(cities)
+
+    async def body(latencies: List[float]) -> int:
+        with ReportGenerator(reports_dir, fmt).open_report() as writer:
+            for city, web in web_data.items():
+                started = time.perf_counter()
+                writer.add(city, web, api_data[city])
+                latencies.append(time.perf_counter() - started)
+            writer.close()
+        return 0
+    return await measure(len(cities), body)
+
+async def run_size(size: int, servers: FakeWeatherServers, stages: Sequence[str], args) -> Dict[str, Dict]:
+    cities = synthetic_cities(size)
+    with tempfile.TemporaryDirectory() as work_dir:
+        config_path = os.path.join(work_dir, "benchmark_config.ini")
+        with open(config_path, "w") as f:
+            f.write(BENCHMARK_CONFIG.format(
+                api_url=servers.api_url, group_url=servers.group_url, site_url=servers.site_url,
+                db_name=os.path.join(work_dir, "benchmark.db"),
+                api_concurrency=args.api_concurrency, scraper_concurrency=args.scraper_concurrency,
+                country_codes="\n".join(f"{country} = {code}" for country, code in synthetic_country_codes(cities).items())
+            ))
+        config = ConfigHelper(config_path)
+        results = {}
+        if "api" in stages:
+            results["api"] = await bench_api(config, cities)
+        if "scraper" in stages:
+            results["scraper"] = await bench_scraper(config, cities)
+        if "db_ingest" in stages:
+            results["db_ingest"] = await bench_db_ingest(config, cities)
+        if "report" in stages:
+            results["report"] = await bench_report(os.path.join(work_dir, "reports"), cities, args.report_format)
+        return results
+
+def latest_result(results_dir: str) -> Optional[Dict]:
+    paths = sorted(glob.glob(os.path.join(results_dir, "benchmark_*.json")))
+    if not paths:
+        return None
+    with open(paths[-1]) as f:
+        return json.load(f)
+
+def compare(current: Dict, previous: Optional[Dict]) -> List[str]:
+    """
+    Describe the throughput and p95 change of every stage against the previous saved run
+
+    Returns:
+        List[str]: One line per stage and size
+    """
+    lines = []
+    for size, stages in current["results"].items():
+        for stage, result in stages.items():
+            line = (f"{stage:>10} {size:>6} cities: {result['cities_per_second']:>10} cities/s  "
+                    f"p50 {result['latency_ms']['p50']:>9} ms  p95 {result['latency_ms']['p95']:>9} ms  "
+                    f"p99 {result['latency_ms']['p99']:>9} ms  peak {result['peak_memory_mb']:>8} MB  "
+                    f"failures {result['failures']}")
+            before = ((previous or {}).get("results", {}).get(size, {})).get(stage)
+            if before and before.get("cities_per_second"):
+                change = (result["cities_per_second"] - before["cities_per_second"]) / before["cities_per_second"] * 100
+                line += f"  ({change:+.1f}% throughput vs previous run)"
+            lines.append(line)
+    return lines
+
+def parse_args(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the weather pipeline stages against local fake servers")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated city counts")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fixed server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Maximum extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api-concurrency", type=int, default=50)
+    parser.add_argument("--scraper-concurrency", type=int, default=20)
+    parser.add_argument("--report-format", default="json")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    return parser.parse_args(argv)
+
+async def run_benchmarks(args) -> Dict:
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}. Supported stages: {', '.join(STAGES)}")
+    with FakeWeatherServers(args.latency, args.jitter, args.error_rate, args.seed) as servers:
+        results = {str(size): await run_size(size, servers, stages, args) for size in sizes}
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate, "seed": args.seed,
+            "api_concurrency": args.api_concurrency, "scraper_concurrency": args.scraper_concurrency,
+            "report_format": args.report_format
+        },
+        "results": results
+    }
+
+def main(argv: Optional[Sequence[str]] = None) -> str:
+    """
+    Run the benchmarks, print them next to the previous run and save them
+
+    Returns:
+        str: Path to the saved results file
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.CRITICAL)
+    os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+    previous = latest_result(args.results_dir)
+    current = asyncio.run(run_benchmarks(args))
+    for line in compare(current, previous):
+        print(line)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    results_path = os.path.join(args.results_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(results_path, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results saved to {results_path}")
+    return results_path
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from .utilities.config_helpers import ConfigHelper
+
+DEFAULT_CONFIG = "automation_framework/config/config.ini"
+DEFAULT_REPORTS_DIR = "automation_framework/reports"
+
+# Each mode imports what it needs inside its own function, so e.g. an api-only run
+# never loads Playwright and report-from-db never loads the HTTP clients.
+
+def _parse_city(value: str) -> Tuple[str, str]:
+    city, separator, country = value.partition("=")
+    if not separator or not city.strip() or not country.strip():
+        raise argparse.ArgumentTypeError(f"Expected CITY=COUNTRY, got {value!r}")
+    return city.strip(), country.strip()
+
+def _cities(config: ConfigHelper, args) -> List[Tuple[str, str]]:
+    return args.city or config.get_cities()
+
+def configure_logging(config: ConfigHelper, level: Optional[str] = None):
+    """
+    Log to stderr and to the configured log file
+
+    Args:
+        config (ConfigHelper): Config providing [Logging] LOG_LEVEL and LOG_FILE
+        level (Optional[str]): Level overriding the configured one
+    """
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    log_file = config.get_log_file()
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(
+        level=(level or config.get_log_level()).upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=handlers
+    )
+
+async def _fetch_single_source(config: ConfigHelper, source: str, cities: List[Tuple[str, str]]) -> Dict:
+    from .utilities.db_writer import AsyncDatabaseWriter
+    from .utilities.metrics import MetricsRegistry
+    from .utilities.observations import CityRegistry
+
+    registry = CityRegistry(cities)
+    if source == "api":
+        from .utilities.api_helpers import ApiHelper
+        fetcher = ApiHelper(config)
+        fetch = lambda: fetcher.fetch_batch(cities, registry)
+    else:
+        from .utilities.web_scraper import WebScraper
+        fetcher = WebScraper(config)
+        fetch = lambda: fetcher.scrape_batch(cities, registry)
+
+    try:
+        async with fetcher, AsyncDatabaseWriter(config) as writer:
+            with fetcher.resilience.run_scope():
+                batch = await fetch()
+            writer.submit_batch(batch)
+            await writer.flush()
+    finally:
+        if source == "web":
+            from .utilities.browser_pool import BrowserService
+            await BrowserService.stop_shared()
+    MetricsRegistry.from_config(config).export()
+    return {"source": source, "requested": len(registry), "stored": len(batch), "success": len(batch) == len(registry)}
+
+def run_api_only(config: ConfigHelper, args) -> Dict:
+    """
+    Fetch the API side only and store it
+    """
+    return asyncio.run(_fetch_single_source(config, "api", _cities(config, args)))
+
+def run_web_only(config: ConfigHelper, args) -> Dict:
+    """
+    Scrape the web side only and store it
+    """
+    return asyncio.run(_fetch_single_source(config, "web", _cities(config, args)))
+
+def run_compare(config: ConfigHelper, args) -> Dict:
+    """
+    Fetch both sources, store them and write the comparison report
+    """
+    from .utilities.pipeline import run_pipeline
+
+    result = asyncio.run(run_pipeline(config.config_path, _cities(config, args), args.reports_dir))
+    return {
+        "report_path": result["report_path"],
+        "matched": result["matched"],
+        "unmatched": result["unmatched"],
+        "errors": result["test_status"]["errors"],
+        "success": result["test_status"]["success"]
+    }
+
+def run_report_from_db(config: ConfigHelper, args) -> Dict:
+    """
+    Write a report from the latest stored observations without fetching anything
+    """
+    from .utilities.db_helpers import DatabaseHelper
+    from .utilities.metrics import MetricsRegistry
+    from .utilities.report_generator import ReportGenerator
+
+    db = DatabaseHelper(config)
+    try:
+        generator = ReportGenerator(args.reports_dir, args.format or config.get_report_format(),
+                                    MetricsRegistry.from_config(config))
+        report_path = generator.generate_report_from_db(db)
+    finally:
+        db.close()
+    return {"report_path": report_path, "success": True}
+
+def run_schedule(config: ConfigHelper, args) -> Dict:
+    """
+    Poll the configured cities continuously, for --duration seconds or until interrupted
+    """
+    from .utilities.scheduler import run_scheduler
+
+    try:
+        asyncio.run(run_scheduler(config.config_path, args.duration))
+    except KeyboardInterrupt:
+        pass
+    return {"duration": args.duration, "success": True}
+
+def run_analytics(config: ConfigHelper, args) -> Dict:
+    """
+    Summarise stored web/API pairs per city: bias, percentiles and outliers
+    """
+    from .utilities.analytics import load_paired_history
+    from .utilities.db_helpers import DatabaseHelper
+
+    db = DatabaseHelper(config)
+    try:
+        history = load_paired_history(db, args.since, args.until, args.tolerance)
+    finally:
+        db.close()
+    return {"pairs": len(history), "cities": history.summary(args.z), "success": True}
+
+def run_archive(config: ConfigHelper, args) -> Dict:
+    """
+    Compact the reports directory into the report archive
+    """
+    from .utilities.report_archive import ReportArchive
+
+    archive = ReportArchive(args.archive_path) if args.archive_path else ReportArchive()
+    try:
+        added = archive.compact(args.reports_dir)
+    finally:
+        archive.close()
+    return {"archived": added, "success": True}
+
+def run_ingest_catalog(config: ConfigHelper, args) -> Dict:
+    """
+    Load an OpenWeatherMap city list dump and the [CountryCodes] slugs into the city catalog
+    """
+    from .utilities.city_catalog import CityCatalog
+
+    catalog = CityCatalog(args.catalog_path or config.get_catalog_path())
+    try:
+        cities = catalog.ingest_owm_city_list(args.city_list)
+        countries = catalog.ingest_countries(dict(config.get_country_codes()))
+    finally:
+        catalog.close()
+    return {"catalog_path": catalog.path, "cities": cities, "countries": countries, "success": True}
+
+def run_migrate_city_keys(config: ConfigHelper, args) -> Dict:
+    """
+    Rename city keys stored in the old lowercased form to the spelling in the [Cities] section
+    """
+    from .utilities.db_helpers import DatabaseHelper
+
+    db = DatabaseHelper(config)
+    try:
+        renamed = db.migrate_city_keys(config.get_cities())
+    finally:
+        db.close()
+    return {"renamed": renamed, "success": True}
+
+MODES = {
+    "api-only": (run_api_only, "Fetch and store the API side only"),
+    "web-only": (run_web_only, "Scrape and store the web side only"),
+    "compare": (run_compare, "Fetch both sides, store them and write the comparison report"),
+    "report-from-db": (run_report_from_db, "Write a report from the stored observations"),
+    "schedule": (run_schedule, "Poll the configured cities continuously"),
+    "analytics": (run_analytics, "Summarise stored discrepancy history per city"),
+    "archive": (run_archive, "Compact saved reports into the report archive"),
+    "ingest-catalog": (run_ingest_catalog, "Load an OpenWeatherMap city list into the city catalog"),
+    "migrate-city-keys": (run_migrate_city_keys, "Rename stored lowercased city keys to their configured spelling")
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m automation_framework",
+                                     description="Compare timeanddate.com and OpenWeatherMap temperatures")
+    parser.add_argument("--config", default=DEFAULT_CONFIG, help="Path to the config file")
+    parser.add_argument("--log-level", help="Override [Logging] LOG_LEVEL")
+    modes = parser.add_subparsers(dest="mode", required=True, metavar="MODE")
+    subparsers = {name: modes.add_parser(name, help=help_text, description=help_text)
+                  for name, (_, help_text) in MODES.items()}
+
+    for name in ("api-only", "web-only", "compare"):
+        subparsers[name].add_argument("--city", action="append", type=_parse_city, metavar="CITY=COUNTRY",
+                                      help="City to process; repeat for several. Defaults to the [Cities] section")
+    for name in ("compare", "report-from-db", "archive"):
+        subparsers[name].add_argument("--reports-dir", default=DEFAULT_REPORTS_DIR)
+    subparsers["report-from-db"].add_argument("--format", choices=("json", "compact", "ndjson", "columnar"),
+                                              help="Override [Report] FORMAT")
+    subparsers["schedule"].add_argument("--duration", type=float, help="Seconds to run for; runs until interrupted by default")
+    subparsers["analytics"].add_argument("--since", type=datetime.fromisoformat, help="Earliest observation, ISO format")
+    subparsers["analytics"].add_argument("--until", type=datetime.fromisoformat, help="Latest observation, ISO format")
+    subparsers["analytics"].add_argument("--tolerance", type=int, default=300,
+                                         help="Maximum seconds between the two sides of a pair")
+    subparsers["analytics"].add_argument("--z", type=float, default=3.0, help="Z-score above which a pair is an outlier")
+    subparsers["archive"].add_argument("--archive-path", help="Archive database path")
+    subparsers["ingest-catalog"].add_argument("city_list", help="city.list.json or city.list.json.gz from OpenWeatherMap")
+    subparsers["ingest-catalog"].add_argument("--catalog-path", help="Override [Catalog] PATH")
+    return parser
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Run one mode and print its JSON summary to stdout
+
+    Returns:
+        int: Exit status, 0 when the mode succeeded
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        config = ConfigHelper.shared(args.config)
+        configure_logging(config, args.log_level)
+        summary = MODES[args.mode][0](config, args)
+    except Exception as e:
+        logging.getLogger(__name__).exception(f"{args.mode} failed")
+        print(json.dumps({"mode": args.mode, "success": False, "error": str(e)}))
+        return 1
+    print(json.dumps({"mode": args.mode, **summary}, default=str))
+    return 0 if summary.get("success") else 1
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+import pytest
+from automation_framework.utilities.analytics import load_paired_history
+from automation_framework.utilities.db_helpers import DatabaseHelper
+
+@pytest.fixture
+def history_db(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(f"[Database]\nDB_NAME = {tmp_path / 'history.db'}\n")
+    db_helper = DatabaseHelper(str(config_path))
+    start = datetime(2025, 5, 1)
+    for i in range(10):
+        db_helper.store_weather_results({"Oslo, Norway": (10.0 + i, 8.0), "Rome, Italy": (24.0, 25.0)},
+                                        {"Oslo, Norway": (9.0, 8.0), "Rome, Italy": (25.0, 25.0)},
+                                        observed_at=start + timedelta(minutes=5 * i))
+    yield db_helper
+    db_helper.close()
+
+def test_paired_history_statistics(history_db):
+    history = load_paired_history(history_db)
+    summary = history.summary()
+
+    assert len(history) == 20
+    assert summary["Oslo, Norway"]["bias"] == pytest.approx(5.5)
+    assert summary["Oslo, Norway"]["p95_abs_difference"] == 10.0
+    assert summary["Rome, Italy"]["bias"] == pytest.approx(-1.0)
+    assert list(history.rolling_mean(3)[:3]) == [1.0, 1.5, 2.0]
+
+def test_materialized_summary_matches_history(history_db):
+    oslo = history_db.get_discrepancy_summary()[0]
+    assert oslo[:4] == ("Oslo, Norway", 10, 5.5, 5.5)
+    assert oslo[5] == 10.0
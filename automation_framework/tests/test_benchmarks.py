@@ -0,0 +1,20 @@
+import json
+from automation_framework.benchmarks.run_benchmarks import main, percentile
+
+def test_benchmark_runs_every_stage_and_saves_results(tmp_path):
+    results_path = main(["--sizes", "20", "--latency", "0", "--jitter", "0", "--results-dir", str(tmp_path)])
+    with open(results_path) as f:
+        results = json.load(f)["results"]["20"]
+
+    assert set(results) == {"api", "scraper", "db_ingest", "report"}
+    for stage in results.values():
+        assert stage["cities"] == 20
+        assert stage["failures"] == 0
+        assert stage["latency_ms"]["p50"] <= stage["latency_ms"]["p99"]
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 23))
+    assert percentile(values, 50) == 11
+    assert percentile(list(range(1, 21)), 95) == 19
+    assert percentile(list(range(1, 21)), 100) == 20
+    assert percentile([], 50) == 0.0
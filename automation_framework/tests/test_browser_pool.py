@@ -0,0 +1,92 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+from automation_framework.utilities.browser_pool import BrowserService, lean_context_setup
+from automation_framework.utilities.config_helpers import ConfigHelper
+
+def fake_browser():
+    browser = MagicMock()
+
+    async def new_context():
+        context = AsyncMock()
+        context.new_page = AsyncMock(return_value=MagicMock(name="page"))
+        return context
+    browser.new_context = new_context
+    browser.close = AsyncMock()
+    return browser
+
+@pytest.fixture
+def service():
+    service = BrowserService(pool_size=2, max_pages=3)
+    launched = []
+
+    async def start():
+        if service.browser is None:
+            service.browser = fake_browser()
+            service.pages_since_start = 0
+            launched.append(service.browser)
+    service.start = start
+    service.launched = launched
+    return service
+
+@pytest.mark.asyncio
+async def test_pages_are_reused_from_the_pool(service):
+    async with service.page() as first:
+        pass
+    async with service.page() as second:
+        pass
+    assert first is second
+    assert service.slots == 1
+
+@pytest.mark.asyncio
+async def test_failed_page_is_discarded(service):
+    with pytest.raises(RuntimeError):
+        async with service.page() as broken:
+            raise RuntimeError("navigation failed")
+    async with service.page() as page:
+        assert page is not broken
+    assert service.slots == 1
+
+@pytest.mark.asyncio
+async def test_browser_restarts_after_max_pages(service):
+    for _ in range(3):
+        async with service.page():
+            pass
+    assert service.restarts == 1
+    assert service.browser is None
+    service.launched[0].close.assert_awaited_once()
+
+    async with service.page():
+        pass
+    assert len(service.launched) == 2
+
+@pytest.mark.asyncio
+async def test_shared_service_routes_from_config(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Scraper]\nLEAN_MODE = true\nBLOCKED_RESOURCE_TYPES = image\n"
+                           "BASE_URL = https://www.timeanddate.com/weather\n[Browser]\nSERVICE = true\n")
+    config = ConfigHelper(str(config_path))
+    service = BrowserService.from_config(config)
+    assert BrowserService.from_config(config) is service
+
+    context = AsyncMock()
+    await service.context_setup(context)
+    route_request = context.route.await_args.args[1]
+    verdicts = []
+    for resource_type, url in [("image", "https://www.timeanddate.com/logo.png"),
+                               ("script", "https://ads.example.com/ad.js"),
+                               ("document", "https://www.timeanddate.com/weather/uk/london")]:
+        route = SimpleNamespace(request=SimpleNamespace(resource_type=resource_type, url=url),
+                                abort=AsyncMock(), continue_=AsyncMock())
+        await route_request(route)
+        verdicts.append(route.continue_.await_count == 1)
+    assert verdicts == [False, False, True]
+
+    await BrowserService.stop_shared()
+    assert BrowserService.from_config(config) is not service
+    await BrowserService.stop_shared()
+
+def test_lean_mode_off_sets_up_nothing(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Scraper]\nLEAN_MODE = false\n")
+    assert lean_context_setup(ConfigHelper(str(config_path))) is None
@@ -0,0 +1,52 @@
+import gzip
+import io
+import json
+import pytest
+from automation_framework.cli import main
+from automation_framework.utilities.city_catalog import CityCatalog, iter_json_array
+
+CONFIG_PATH = "automation_framework/tests/test_config.ini"
+
+OWM_CITY_LIST = [
+    {"id": 2643743, "name": "London", "state": "", "country": "GB", "coord": {"lon": -0.12574, "lat": 51.50853}},
+    {"id": 6058560, "name": "London", "state": "", "country": "CA", "coord": {"lon": -81.23304, "lat": 42.983391}},
+    {"id": 3448439, "name": "São Paulo", "state": "", "country": "BR", "coord": {"lon": -46.63611, "lat": -23.5475}}
+]
+
+def test_catalog_lookups(tmp_path):
+    dump = tmp_path / "city.list.json.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        json.dump(OWM_CITY_LIST, f)
+
+    catalog = CityCatalog(str(tmp_path / "catalog.db"))
+    assert catalog.ingest_owm_city_list(str(dump)) == 3
+    catalog.ingest_countries({"United Kingdom": "uk", "Brazil": "brazil"},
+                             {"United Kingdom": "GB", "Brazil": "BR"})
+
+    assert catalog.get_city_id("london", "United Kingdom") == 2643743
+    assert catalog.get_city_id("London") is None
+    assert catalog.get_city_id("Sao Paulo") == 3448439
+    assert catalog.get_country_slug("united kingdom") == "uk"
+    assert catalog.get_timeanddate_url("Sao Paulo", "Brazil") == "https://www.timeanddate.com/weather/brazil/sao-paulo"
+    catalog.close()
+
+def test_ingest_catalog_cli_streams_the_dump(tmp_path, capsys):
+    dump = tmp_path / "city.list.json"
+    dump.write_text(json.dumps(OWM_CITY_LIST, indent=2))
+    catalog_path = tmp_path / "catalog.db"
+    status = main(["--config", CONFIG_PATH, "--log-level", "WARNING", "ingest-catalog", str(dump),
+                   "--catalog-path", str(catalog_path)])
+    summary = json.loads(capsys.readouterr().out)
+
+    assert status == 0
+    assert summary["cities"] == 3
+    catalog = CityCatalog(str(catalog_path))
+    assert catalog.get_city_id("Sao Paulo") == 3448439
+    catalog.close()
+
+def test_json_array_is_parsed_across_chunk_boundaries():
+    text = json.dumps(OWM_CITY_LIST + [12345, "Oslo"])
+    for chunk_size in (1, 5, 64):
+        assert list(iter_json_array(io.StringIO(text), chunk_size)) == OWM_CITY_LIST + [12345, "Oslo"]
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text[:-10]), 8))
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from automation_framework.cli import build_parser, main
+
+CONFIG_PATH = "automation_framework/tests/test_config.ini"
+
+def test_api_only_imports_skip_browser_and_analytics_libraries():
+    code = ("import sys; import automation_framework.cli, automation_framework.utilities.api_helpers, "
+            "automation_framework.utilities.db_writer; "
+            "print(sorted(m for m in ('playwright', 'requests', 'numpy') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_city_arguments_are_parsed():
+    args = build_parser().parse_args(["api-only", "--city", "Paris=France", "--city", "New York = US"])
+    assert args.city == [("Paris", "France"), ("New York", "US")]
+
+    with pytest.raises(SystemExit):
+        build_parser().parse_args(["api-only", "--city", "Paris"])
+
+def test_report_from_db_prints_summary(tmp_path, capsys):
+    status = main(["--config", CONFIG_PATH, "--log-level", "WARNING",
+                   "report-from-db", "--reports-dir", str(tmp_path), "--format", "ndjson"])
+    summary = json.loads(capsys.readouterr().out)
+
+    assert status == 0
+    assert summary["mode"] == "report-from-db"
+    assert os.path.dirname(summary["report_path"]) == str(tmp_path)
+    assert summary["report_path"].endswith(".ndjson")
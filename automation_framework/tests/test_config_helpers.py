@@ -0,0 +1,44 @@
+import os
+from automation_framework.utilities.api_helpers import ApiHelper
+from automation_framework.utilities.config_helpers import ConfigHelper
+from automation_framework.utilities.web_scraper import WebScraper
+
+def test_shared_config_is_parsed_once():
+    config = ConfigHelper.shared("automation_framework/tests/test_config.ini")
+    assert ConfigHelper.shared(os.path.abspath("automation_framework/tests/test_config.ini")) is config
+    assert ConfigHelper.shared(config) is config
+    assert config.get_country_codes() is config.get_country_codes()
+    assert config.get_temperature_threshold() == 2.0
+
+def test_reload_if_changed_notifies_subscribers(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Cities]\nParis = France\n")
+    config = ConfigHelper(str(config_path))
+    reloaded = []
+    config.subscribe(lambda helper: reloaded.append(helper.get_cities()))
+
+    assert not config.reload_if_changed()
+    config_path.write_text("[Cities]\nParis = France\nRome = Italy\n")
+    os.utime(config_path, (0, 1))
+    assert config.reload_if_changed()
+    assert reloaded == [[("Paris", "France"), ("Rome", "Italy")]]
+
+def test_helpers_pick_up_reloaded_settings(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[API]\nMAX_CONCURRENCY = 4\n[Scraper]\nREQUESTS_PER_SECOND = 1\n"
+                           "[Resilience]\nRETRY_ATTEMPTS = 3\n[Cache]\nENABLED = false\n[CountryCodes]\nFrance = france\n")
+    config = ConfigHelper(str(config_path))
+    api, scraper = ApiHelper(config), WebScraper(config)
+    config.subscribe(api.apply_config)
+    config.subscribe(scraper.apply_config)
+    bucket = scraper.rate_limiter.bucket_for("https://www.timeanddate.com/weather")
+
+    config_path.write_text("[API]\nMAX_CONCURRENCY = 8\n[Scraper]\nREQUESTS_PER_SECOND = 5\n"
+                           "[Resilience]\nRETRY_ATTEMPTS = 1\n[Cache]\nENABLED = false\n[CountryCodes]\nFrance = fr\n")
+    os.utime(config_path, (0, 1))
+    assert config.reload_if_changed()
+
+    assert api.max_concurrency == 8
+    assert scraper._get_city_url("Paris", "France").endswith("/fr/paris")
+    assert bucket.rate == 5
+    assert api.resilience.attempts == 1
@@ -0,0 +1,144 @@
+import asyncio
+import pickle
+from datetime import datetime, timedelta
+import pytest
+from automation_framework.utilities.db_helpers import DatabaseHelper
+from automation_framework.utilities.db_writer import AsyncDatabaseWriter
+from automation_framework.utilities.observations import CityRegistry, ObservationBatch
+
+@pytest.fixture
+def db_config(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(f"[Database]\nDB_NAME = {tmp_path / 'history.db'}\n")
+    return str(config_path)
+
+@pytest.fixture
+def history_db(db_config):
+    db_helper = DatabaseHelper(db_config)
+    yield db_helper
+    db_helper.close()
+
+def test_observations_are_appended_not_overwritten(history_db):
+    history_db.store_weather_data("Paris, France", 18.0, 17.0, "web")
+    history_db.store_weather_data("Paris, France", 17.5, 16.0, "api")
+    history_db.store_weather_data("Paris, France", 19.0, 18.0, "web")
+
+    window = history_db.get_observation_window("Paris, France", datetime.now() - timedelta(minutes=1))
+    assert [row[0] for row in window] == ["web", "api", "web"]
+
+    latest = history_db.get_latest_observations("web")
+    assert [(row[0], row[3]) for row in latest] == [("Paris, France", 19.0)]
+
+def test_web_miss_keeps_api_value(history_db):
+    history_db.store_weather_data("Rome, Italy", 25.0, 26.0, "api")
+    assert history_db.get_weather_data("api") == [("Rome, Italy", 25.0, 26.0)]
+
+def test_bulk_ingest_computes_average_in_sql(history_db):
+    web_data = {"Oslo, Norway": (10.0, 8.0), "Rome, Italy": (24.0, 25.0)}
+    api_data = {"Oslo, Norway": (12.0, 9.0)}
+    assert history_db.store_weather_results(web_data, api_data) == 3
+
+    assert history_db.get_average_temperatures() == {"Oslo, Norway": 11.0, "Rome, Italy": None}
+    assert len(history_db.get_latest_observations()) == 3
+
+def test_average_is_never_mixed_with_an_older_side(history_db):
+    start = datetime(2025, 5, 1)
+    history_db.store_weather_results({"Oslo, Norway": (10.0, 8.0)}, {"Oslo, Norway": (12.0, 9.0)}, start)
+    history_db.store_weather_results({"Oslo, Norway": (20.0, 18.0)}, {}, start + timedelta(minutes=1))
+    assert history_db.get_average_temperatures() == {"Oslo, Norway": None}
+
+    history_db.store_weather_results({}, {"Oslo, Norway": (22.0, 19.0)}, start + timedelta(minutes=2))
+    assert history_db.get_average_temperatures() == {"Oslo, Norway": 21.0}
+
+@pytest.mark.asyncio
+async def test_async_writer_commits_in_batches(db_config, history_db):
+    async with AsyncDatabaseWriter(db_config, batch_size=2, flush_interval=60) as writer:
+        writer.submit_results({"Oslo, Norway": (10.0, 8.0), "Rome, Italy": (24.0, 25.0)},
+                              {"Oslo, Norway": (12.0, 9.0)})
+        await writer.flush()
+        assert writer.records_written == 3
+        assert writer.commits == 2
+
+    assert history_db.get_average_temperatures()["Oslo, Norway"] == 11.0
+
+def test_summary_folds_each_pair_once_across_batches(history_db):
+    start = datetime(2025, 5, 1)
+    for i, (source, temperature) in enumerate([("web", 10.0), ("api", 12.0), ("web", 20.0), ("api", 20.0)]):
+        history_db.store_observations([("Oslo, Norway", source, temperature, temperature)],
+                                      observed_at=start + timedelta(minutes=i))
+
+    history_db.store_weather_data("Rome, Italy", 24.0, 25.0, "web")
+    history_db.store_weather_data("Rome, Italy", 25.0, 25.0, "api")
+    history_db.store_weather_data("Rome, Italy", 26.0, 25.0, "web")
+
+    oslo, rome = history_db.get_discrepancy_summary()
+    assert oslo[:4] == ("Oslo, Norway", 2, -1.0, 1.0)
+    assert oslo[5] == 2.0
+    assert rome[:3] == ("Rome, Italy", 1, -1.0)
+
+@pytest.mark.asyncio
+async def test_async_writer_fails_barriers_when_database_cannot_open(tmp_path):
+    (tmp_path / "not_a_dir").write_text("")
+    config_path = tmp_path / "broken.ini"
+    config_path.write_text(f"[Database]\nDB_NAME = {tmp_path / 'not_a_dir' / 'history.db'}\n")
+
+    writer = AsyncDatabaseWriter(str(config_path))
+    writer.submit("Oslo, Norway", "web", 10.0, 8.0)
+    with pytest.raises(OSError):
+        await asyncio.wait_for(writer.flush(), timeout=5)
+    with pytest.raises(OSError):
+        await asyncio.wait_for(writer.close(), timeout=5)
+    assert writer.thread is None
+
+def test_migrate_city_keys_renames_lowercased_keys(history_db):
+    start = datetime(2024, 1, 1)
+    history_db.store_weather_results({"new york, United States": (20.0, 19.0)},
+                                     {"new york, United States": (18.0, 17.0)}, start)
+    history_db.store_weather_results({"New York, United States": (21.0, 20.0)},
+                                     {"New York, United States": (22.0, 21.0)}, start + timedelta(hours=1))
+    history_db.store_weather_results({"Oslo, Norway": (5.0, 3.0)}, {}, start)
+
+    assert history_db.migrate_city_keys([("New York", "United States"), ("Oslo", "Norway")]) == 1
+    assert history_db.migrate_city_keys([("New York", "United States"), ("Oslo", "Norway")]) == 0
+
+    window = history_db.get_observation_window("New York, United States", start)
+    assert len(window) == 4
+    assert history_db.get_average_temperatures() == {"New York, United States": 21.5, "Oslo, Norway": None}
+    (summary,) = [row for row in history_db.get_discrepancy_summary() if row[0] == "New York, United States"]
+    assert summary[1:3] == (2, 0.5)
+    assert [row[0] for row in history_db.get_discrepancy_summary()] == ["New York, United States"]
+
+@pytest.mark.asyncio
+async def test_async_writer_reports_malformed_items_and_keeps_going(db_config, history_db):
+    async with AsyncDatabaseWriter(db_config) as writer:
+        writer.submit("Oslo, Norway", "web", 10.0, 8.0)
+        writer.queue.put(("Oslo, Norway", "api"))
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(writer.flush(), timeout=5)
+
+        writer.submit("Oslo, Norway", "api", 12.0, 9.0)
+        await asyncio.wait_for(writer.flush(), timeout=5)
+        assert writer.records_written == 2
+
+@pytest.mark.asyncio
+async def test_async_writer_rejects_batches_without_a_registry(db_config, history_db):
+    registry = CityRegistry([("Oslo", "Norway")])
+    batch = ObservationBatch("web", registry)
+    batch.append(0, 10.0, 8.0)
+
+    async with AsyncDatabaseWriter(db_config) as writer:
+        with pytest.raises(ValueError, match="no CityRegistry"):
+            writer.submit_batch(pickle.loads(pickle.dumps(batch)))
+        writer.submit_batch(batch)
+        await asyncio.wait_for(writer.flush(), timeout=5)
+        assert writer.records_written == 1
+
+@pytest.mark.asyncio
+async def test_async_writer_fails_barriers_when_the_loop_breaks(db_config, monkeypatch):
+    writer = AsyncDatabaseWriter(db_config)
+    monkeypatch.setattr(writer, "_commit", lambda db, pending: 1 / 0)
+    writer.submit("Oslo, Norway", "web", 10.0, 8.0)
+    with pytest.raises(ZeroDivisionError):
+        await asyncio.wait_for(writer.flush(), timeout=5)
+    with pytest.raises(ZeroDivisionError):
+        await asyncio.wait_for(writer.close(), timeout=5)
@@ -0,0 +1,40 @@
+import pickle
+import pytest
+from automation_framework.utilities.observations import CityRegistry, Observation, ObservationBatch, join
+
+def test_registry_ids_are_dense_and_keep_the_first_spelling():
+    registry = CityRegistry([("Stockholm", "Sweden"), ("Paris", "France")])
+
+    assert registry.add(" stockholm", "SWEDEN ") == 0
+    assert registry.id_of("PARIS", "france") == 1
+    assert registry.id_of("Rome", "Italy") is None
+    assert registry.add("Rome", "Italy") == 2
+    assert registry.keys == ["Stockholm, Sweden", "Paris, France", "Rome, Italy"]
+    assert CityRegistry(registry.cities).keys == registry.keys
+
+def test_batch_pickles_without_its_registry():
+    registry = CityRegistry([("Paris", "France"), ("Rome", "Italy")])
+    batch = ObservationBatch("web", registry)
+    batch.add(Observation(1, "web", 21.5, 20.0))
+    batch.append(0, 14.0, 12.5)
+
+    copy = pickle.loads(pickle.dumps(batch))
+    assert copy.registry is None
+    assert list(copy) == [Observation(1, "web", 21.5, 20.0), Observation(0, "web", 14.0, 12.5)]
+    with pytest.raises(ValueError, match="no CityRegistry"):
+        copy.to_dict()
+
+    copy.registry = registry
+    assert copy.to_dict() == {"Rome, Italy": (21.5, 20.0), "Paris, France": (14.0, 12.5)}
+    assert list(copy.rows())[0] == ("Rome, Italy", "web", 21.5, 20.0)
+
+def test_join_pairs_cities_present_in_both_sources():
+    registry = CityRegistry([("Paris", "France"), ("Rome", "Italy"), ("Oslo", "Norway")])
+    web = ObservationBatch("web", registry)
+    api = ObservationBatch("api", registry)
+    web.append(0, 14.0, 12.5)
+    web.append(1, 21.5, 20.0)
+    api.append(2, -3.0, -7.0)
+    api.append(0, 13.0, 12.0)
+
+    assert list(join(web, api)) == [(0, (14.0, 12.5), (13.0, 12.0))]
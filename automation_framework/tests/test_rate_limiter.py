@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from automation_framework.utilities import rate_limiter
+from automation_framework.utilities.rate_limiter import HostRateLimiter, TokenBucket
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(Lock=asyncio.Lock, sleep=clock.sleep))
+    return clock
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    clock.now += 0.25
+    assert not bucket.try_acquire()
+    clock.now += 0.25
+    assert bucket.try_acquire()
+
+    # Idle time never builds up more than the burst
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+def test_zero_or_negative_rate_disables_limiting(clock):
+    for rate in (0, -1):
+        bucket = TokenBucket(rate)
+        assert all(bucket.try_acquire() for _ in range(100))
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_the_next_token(clock):
+    bucket = TokenBucket(rate=4)
+    for _ in range(3):
+        await bucket.acquire()
+    assert clock.slept == [0.25, 0.25]
+    assert clock.now == 1000.5
+
+@pytest.mark.asyncio
+async def test_each_host_has_its_own_budget(clock):
+    limiter = HostRateLimiter(rate=1, capacity=2)
+    for url in ("https://www.timeanddate.com/weather/uk/london", "https://WWW.timeanddate.com/weather/fr/paris"):
+        await limiter.acquire(url)
+    await limiter.acquire("https://api.openweathermap.org/data/2.5/weather")
+    assert clock.slept == []
+
+    await limiter.acquire("https://www.timeanddate.com/weather/it/rome")
+    assert clock.slept == [1.0]
+    assert limiter.bucket_for("https://api.openweathermap.org/data/2.5/group").try_acquire()
+    assert len(limiter.buckets) == 2
+
+def test_configure_retunes_existing_hosts(clock):
+    limiter = HostRateLimiter(rate=1, capacity=5)
+    bucket = limiter.bucket_for("https://www.timeanddate.com/weather")
+    limiter.configure(rate=10, capacity=2)
+    assert [bucket.try_acquire() for _ in range(3)] == [True, True, False]
+    clock.now += 0.1
+    assert bucket.try_acquire()
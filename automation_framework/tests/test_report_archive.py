@@ -0,0 +1,35 @@
+import os
+import shutil
+from automation_framework.utilities.report_archive import ReportArchive
+from automation_framework.utilities.report_generator import ReportGenerator
+
+SAMPLE_REPORT = os.path.join(os.path.dirname(__file__), "..", "reports", "weather_report_20250525_230541.json")
+
+def test_compact_ingests_each_report_once(tmp_path):
+    reports_dir = tmp_path / "reports"
+    reports_dir.mkdir()
+    shutil.copy(SAMPLE_REPORT, reports_dir)
+    archive = ReportArchive(str(tmp_path / "archive.db"))
+
+    assert archive.compact(str(reports_dir)) == 1
+    assert archive.compact(str(reports_dir)) == 0
+
+    trend = archive.get_city_trend("Stockholm")
+    assert len(trend) == 1
+    assert trend[0][0].startswith("2025-05-25")
+    assert archive.get_city_aggregate("stockholm, sweden")["reports"] == 1
+    assert archive.get_city_trend("Stock") == []
+    archive.close()
+
+def test_compact_reads_every_report_format(tmp_path):
+    generator = ReportGenerator(str(tmp_path / "reports"))
+    web = {"Paris, France": (18.0, 17.0)}
+    api = {"Paris, France": (16.5, 15.0)}
+    for fmt in ("compact", "ndjson", "columnar"):
+        generator.generate_report(web, api, fmt=fmt)
+    archive = ReportArchive(str(tmp_path / "archive.db"))
+
+    assert archive.compact(generator.reports_dir) == 3
+    assert archive.get_city_aggregate("paris")["mean_difference"] == 1.5
+    assert [row[3] for row in archive.get_report_statistics()] == ["Paris, France"] * 3
+    archive.close()
@@ -0,0 +1,117 @@
+import json
+import pytest
+from automation_framework.utilities.db_helpers import DatabaseHelper
+from automation_framework.utilities.incremental_report import IncrementalReportGenerator
+from automation_framework.utilities.metrics import NULL_METRICS, MetricsRegistry
+from automation_framework.utilities.report_generator import ReportGenerator
+
+WEB_DATA = {"Paris, France": (18.0, 17.0), "Rome, Italy": (25.0, 26.0), "Oslo, Norway": (9.0, 7.0)}
+API_DATA = {"Paris, France": (16.5, 15.0), "Rome, Italy": (25.0, 26.0), "Oslo, Norway": (10.0, 8.5)}
+
+@pytest.mark.parametrize("fmt", ["json", "compact"])
+def test_json_reports_have_expected_contents(tmp_path, fmt):
+    report_path = ReportGenerator(str(tmp_path), fmt).generate_report(WEB_DATA, API_DATA)
+    with open(report_path) as f:
+        report = json.load(f)
+
+    assert [d["city"] for d in report["discrepancies"]] == ["Paris, France", "Oslo, Norway"]
+    assert report["statistics"]["temperature"] == {"mean_difference": 1.25, "max_difference": 1.5, "min_difference": 1.0}
+    assert report["highest_temperature"] == {"city": "Rome, Italy", "temperature": 25.0}
+    assert report["test_status"]["success"]
+
+def test_ndjson_and_columnar_reports(tmp_path):
+    generator = ReportGenerator(str(tmp_path))
+    with open(generator.generate_report(WEB_DATA, API_DATA, fmt="ndjson")) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["type"] for r in records] == ["header", "discrepancy", "discrepancy", "summary"]
+
+    with open(generator.generate_report(WEB_DATA, API_DATA, fmt="columnar")) as f:
+        report = json.load(f)
+    assert report["count"] == 2
+    assert report["columns"]["temperature_difference"] == [1.5, 1.0]
+
+def test_aborted_report_is_marked_failed(tmp_path):
+    generator = ReportGenerator(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with generator.open_report() as writer:
+            writer.add("Paris, France", WEB_DATA["Paris, France"], API_DATA["Paris, France"])
+            raise RuntimeError("source went away")
+
+    with open(writer.report_path) as f:
+        report = json.load(f)
+    assert not report["test_status"]["success"]
+    assert report["test_status"]["errors"] == ["Report aborted: RuntimeError: source went away"]
+    assert len(report["discrepancies"]) == 1
+
+def test_incremental_report_only_tracks_changed_cities(tmp_path):
+    incremental = IncrementalReportGenerator(str(tmp_path))
+    assert incremental.update((city, web, API_DATA[city]) for city, web in WEB_DATA.items()) == 3
+    with open(incremental.write_snapshot()) as f:
+        snapshot = json.load(f)
+    assert snapshot["statistics"]["temperature"]["max_difference"] == 1.5
+    assert snapshot["highest_temperature"]["city"] == "Rome, Italy"
+
+    assert incremental.update([("Rome, Italy", (25.0, 26.0), (25.0, 26.0)),
+                               ("Paris, France", (16.5, 15.0), (16.5, 15.0))]) == 1
+    incremental.remove("Rome, Italy")
+    delta = incremental.delta()
+    assert delta["changed"] == []
+    assert delta["resolved"] == ["Paris, France"]
+    assert delta["removed"] == ["Rome, Italy"]
+    assert delta["statistics"]["temperature"] == {"mean_difference": 1.0, "max_difference": 1.0, "min_difference": 1.0}
+    assert delta["highest_temperature"] == {"city": "Paris, France", "temperature": 16.5}
+
+def test_metrics_are_embedded_in_report_and_exported(tmp_path):
+    metrics = MetricsRegistry(str(tmp_path / "metrics.prom"))
+    with metrics.track("fetch", "api") as timer:
+        timer.outcome = "timeout"
+    metrics.cache_lookup("web", hit=True)
+    report_path = ReportGenerator(str(tmp_path), metrics=metrics).generate_report(WEB_DATA, API_DATA)
+    with open(report_path) as f:
+        summary = json.load(f)["metrics"]
+    assert summary["stages"]["fetch.api"]["timeout"] == 1
+    assert summary["stages"]["write.report"]["success"] == 2
+    assert summary["cache"] == {"web": {"hit": 1, "miss": 0}}
+
+    with open(metrics.export()) as f:
+        textfile = f.read()
+    assert 'weather_pipeline_operations_total{outcome="timeout",source="api",stage="fetch"} 1' in textfile
+    assert 'weather_pipeline_duration_seconds_count{source="report",stage="write"} 2' in textfile
+    assert textfile.endswith("# EOF\n")
+
+def test_reports_have_no_metrics_section_when_disabled(tmp_path):
+    with open(ReportGenerator(str(tmp_path)).generate_report(WEB_DATA, API_DATA)) as f:
+        assert "metrics" not in json.load(f)
+    assert NULL_METRICS.export() is None
+
+def test_incremental_refresh_drops_cities_that_left_the_snapshot(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(f"[Database]\nDB_NAME = {tmp_path / 'weather.db'}\n")
+    db = DatabaseHelper(str(config_path))
+    db.store_weather_results(WEB_DATA, API_DATA)
+    incremental = IncrementalReportGenerator(str(tmp_path))
+    assert incremental.refresh_from_db(db) == 3
+    incremental.write_snapshot()
+
+    with db.conn:
+        db.conn.execute("DELETE FROM weather_data WHERE city = 'Oslo, Norway'")
+    db.store_weather_results({"Zurich, Switzerland": (5.0, 3.0), "Bern, Switzerland": (6.0, 4.0)},
+                             {"Zurich, Switzerland": (4.0, 2.0), "Bern, Switzerland": (4.5, 3.0)})
+    assert incremental.refresh_from_db(db) == 3
+
+    delta = incremental.delta()
+    assert delta["removed"] == ["Oslo, Norway"]
+    assert [entry["city"] for entry in delta["changed"]] == ["Bern, Switzerland", "Zurich, Switzerland"]
+    incremental.write_delta()
+
+    # One city leaving while another joins keeps the count the same
+    with db.conn:
+        db.conn.execute("DELETE FROM weather_data WHERE city = 'Bern, Switzerland'")
+    db.store_weather_results({"Oslo, Norway": (9.0, 7.0)}, {"Oslo, Norway": (19.0, 8.5)})
+    assert incremental.refresh_from_db(db) == 2
+    db.close()
+
+    delta = incremental.delta()
+    assert delta["removed"] == ["Bern, Switzerland"]
+    assert delta["statistics"]["temperature"]["max_difference"] == 10.0
+    assert "Bern, Switzerland" not in incremental.discrepancies
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from automation_framework.utilities.resilience import CircuitOpenError, DeadlineExceeded, Resilience
+
+class FlakyOperation:
+    def __init__(self, failures, delays=()):
+        self.failures = failures
+        self.delays = list(delays)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.delays:
+            await asyncio.sleep(self.delays.pop(0))
+        if self.calls <= self.failures:
+            raise asyncio.TimeoutError()
+        return self.calls
+
+@pytest.mark.asyncio
+async def test_retries_with_backoff_until_success():
+    resilience = Resilience(attempts=3, base_delay=0.001)
+    operation = FlakyOperation(failures=2)
+    assert await resilience.call("api", operation) == 3
+    assert resilience.breaker("api").state == "closed"
+
+@pytest.mark.asyncio
+async def test_breaker_short_circuits_failing_source():
+    resilience = Resilience(attempts=1, failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            await resilience.call("web_http", FlakyOperation(failures=1))
+    operation = FlakyOperation(failures=0)
+    with pytest.raises(CircuitOpenError):
+        await resilience.call("web_http", operation)
+    assert operation.calls == 0
+    assert await resilience.call("api", FlakyOperation(failures=0)) == 1
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_slow_calls():
+    resilience = Resilience(attempts=3, attempt_timeout=None)
+    with resilience.run_scope(0.05):
+        with pytest.raises(DeadlineExceeded):
+            await resilience.call("api", FlakyOperation(failures=0, delays=[1.0]))
+        with pytest.raises(DeadlineExceeded):
+            await resilience.call("api", FlakyOperation(failures=0))
+    # Calls after the run are no longer bound by its deadline
+    assert await resilience.call("api", FlakyOperation(failures=0)) == 1
+
+@pytest.mark.asyncio
+async def test_deadline_hit_in_flight_leaves_breaker_closed():
+    resilience = Resilience(attempts=3, attempt_timeout=None, failure_threshold=2)
+    with resilience.run_scope(0.05):
+        results = await asyncio.gather(*(resilience.call("api", FlakyOperation(failures=0, delays=[1.0]))
+                                         for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(result, DeadlineExceeded) for result in results)
+    assert resilience.breaker("api").allow()
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_keep_their_own_deadline():
+    resilience = Resilience(attempts=1, attempt_timeout=None)
+
+    async def run(deadline, delay):
+        with resilience.run_scope(deadline):
+            await asyncio.sleep(0)
+            return await resilience.call("api", FlakyOperation(failures=0, delays=[delay]))
+
+    short, unbounded = await asyncio.gather(run(0.05, 1.0), run(0, 0.1), return_exceptions=True)
+    assert isinstance(short, DeadlineExceeded)
+    assert unbounded == 1
+
+@pytest.mark.asyncio
+async def test_slot_is_released_during_backoff_and_not_timed():
+    resilience = Resilience(attempts=2, base_delay=0.2, max_delay=0.2, attempt_timeout=0.05)
+    resilience.random.uniform = lambda low, high: high
+    semaphore = asyncio.Semaphore(1)
+
+    async def hold_slot():
+        async with semaphore:
+            await asyncio.sleep(0.1)
+    holder = asyncio.ensure_future(hold_slot())
+    await asyncio.sleep(0)
+
+    operation = FlakyOperation(failures=1)
+    call = asyncio.ensure_future(resilience.call("api", operation, slot=lambda: semaphore))
+    # Waiting 0.1s for the slot is longer than the attempt timeout but does not fail the call
+    await asyncio.sleep(0.15)
+    assert operation.calls == 1
+    assert not semaphore.locked()
+    assert await call == 2
+    await holder
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_attempt():
+    resilience = Resilience(hedge=True, hedge_min_samples=1)
+    resilience.latency("api").add(0.01)
+    operation = FlakyOperation(failures=0, delays=[1.0, 0.0])
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await resilience.call("api", operation) == 2
+    assert loop.time() - started < 0.5
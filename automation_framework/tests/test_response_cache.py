@@ -0,0 +1,71 @@
+import asyncio
+import time
+from automation_framework.utilities.api_helpers import ApiHelper
+from automation_framework.utilities.observations import CityRegistry
+from automation_framework.utilities.response_cache import ResponseCache
+from automation_framework.utilities.config_helpers import ConfigHelper
+
+def test_cache_persists_between_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, ttl_seconds=60, max_entries=10)
+    assert cache.get("web", "London, United Kingdom") is None
+    cache.put("web", "London, United Kingdom", [19.2, 18.5])
+    cache.close()
+
+    reopened = ResponseCache(path, ttl_seconds=60, max_entries=10)
+    assert reopened.get("web", "london, United Kingdom") == [19.2, 18.5]
+    assert reopened.stats()["hits"] == 1
+    reopened.close()
+
+def test_cache_expires_and_evicts_least_recently_used():
+    cache = ResponseCache(ttl_seconds=60, max_entries=2)
+    cache.put("api", "Paris", {"main": {"temp": 1}})
+    cache.put("api", "Rome", {"main": {"temp": 2}})
+    cache.get("api", "Paris")
+    cache.put("api", "Oslo", {"main": {"temp": 3}})
+    assert cache.get("api", "Rome") is None
+    assert cache.get("api", "Paris") is not None
+
+    cache.ttl_seconds = 0.01
+    time.sleep(0.02)
+    assert cache.get("api", "Oslo") is None
+    assert cache.stats()["misses"] == 2
+
+def test_helpers_share_one_cache_per_file(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text(f"[Cache]\nENABLED = true\nPATH = {tmp_path / 'cache.db'}\nMAX_ENTRIES = 2\n")
+    config = ConfigHelper(str(config_path))
+    api_cache = ResponseCache.from_config(config)
+    web_cache = ResponseCache.from_config(config)
+    assert api_cache is web_cache
+
+    api_cache.put("api", "Paris", {"main": {"temp": 1}})
+    web_cache.put("web", "Paris, France", [1.0, 0.5])
+    web_cache.put("web", "Rome, Italy", [2.0, 1.5])
+    assert api_cache.get("api", "Paris") is None
+    assert api_cache.conn.execute("SELECT COUNT(*) FROM response_cache").fetchone() == (0,)
+
+    api_cache.close()
+    assert web_cache.conn is not None
+    web_cache.close()
+    assert web_cache.conn is None
+
+    reopened = ResponseCache.from_config(config)
+    assert reopened is not web_cache
+    assert reopened.get("web", "Rome, Italy") == [2.0, 1.5]
+    assert len(reopened.entries) == 2
+    reopened.close()
+
+def test_api_entries_are_keyed_by_city_and_country(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Cache]\nENABLED = true\nPATH =\n[API]\nBULK_MODE = false\n")
+    api = ApiHelper(str(config_path))
+    api._cache_weather("London", "United Kingdom", {"main": {"temp": 12.0, "feels_like": 11.0}})
+
+    async def observations():
+        registry = CityRegistry()
+        return [observation async for observation in api.iter_observations([("London", "United Kingdom")], registry)]
+    assert [observation.data for observation in asyncio.run(observations())] == [(12.0, 11.0)]
+    assert api._get_cached_weather("London", "Canada") is None
+    assert api._get_cached_weather("london", "united kingdom") is not None
+    asyncio.run(api.close())
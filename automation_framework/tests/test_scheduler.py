@@ -0,0 +1,132 @@
+import pytest
+from automation_framework.utilities.config_helpers import ConfigHelper
+from automation_framework.utilities.response_cache import ResponseCache
+from automation_framework.utilities.scheduler import PollingScheduler
+from automation_framework.utilities.web_scraper import WebScraper
+
+class FakeApi:
+    session = None
+
+    def __init__(self):
+        self.polled = []
+
+    async def fetch_temperature_data(self, city, session, country=None):
+        self.polled.append(city)
+        return 10.0, 9.0
+
+class FakeScraper:
+    def __init__(self):
+        self.polled = []
+
+    async def extract_temperature_data(self, city, country, use_cache=True):
+        self.polled.append(city)
+        return 11.0, 9.5
+
+class FakeWriter:
+    def __init__(self):
+        self.rows = []
+        self.values = []
+
+    def submit(self, city, source, temperature, feels_like):
+        self.rows.append((city, source))
+        self.values.append((source, temperature))
+
+    async def flush(self):
+        pass
+
+def make_scheduler(cities, **kwargs):
+    kwargs.setdefault("api_calls_per_minute", 60000)
+    kwargs.setdefault("scrapes_per_minute", 60000)
+    return PollingScheduler(FakeScraper(), FakeApi(), FakeWriter(), cities, **kwargs)
+
+def live_entries(scheduler, city_id):
+    return [entry for entry in scheduler.queue if entry[3] == city_id and scheduler.active.get(city_id) == entry[4]]
+
+@pytest.mark.asyncio
+async def test_shorter_intervals_are_polled_first_and_more_often():
+    scheduler = make_scheduler([("Rome", "Italy"), ("Paris", "France")], default_interval=60,
+                               intervals={"Paris": 0.1}, workers=1)
+    await scheduler.run(0.35)
+
+    assert scheduler.api.polled[0] == "Paris"
+    assert scheduler.api.polled.count("Rome") == 1
+    assert scheduler.api.polled.count("Paris") >= 3
+    assert ("Paris, France", "web") in scheduler.writer.rows
+
+@pytest.mark.asyncio
+async def test_budget_spreads_calls_over_time():
+    cities = [(f"City{i}", "France") for i in range(20)]
+    scheduler = make_scheduler(cities, default_interval=60, api_calls_per_minute=600)
+    await scheduler.run(0.35)
+
+    # One token up front, then ten per second
+    assert 2 <= len(scheduler.api.polled) <= 5
+    assert len(scheduler.scraper.polled) >= len(scheduler.api.polled)
+
+@pytest.mark.asyncio
+async def test_hot_reload_keeps_one_live_entry_per_city(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Cities]\nParis = France\nRome = Italy\n[Scheduler]\nDEFAULT_INTERVAL = 0.1\n"
+                           "API_CALLS_PER_MINUTE = 60000\nSCRAPES_PER_MINUTE = 60000\n")
+    config = ConfigHelper(str(config_path))
+    scheduler = make_scheduler(config.get_cities(), default_interval=0.1)
+    paris = scheduler.registry.id_of("Paris", "France")
+
+    config_path.write_text("[Cities]\nRome = Italy\n[Scheduler]\nDEFAULT_INTERVAL = 0.1\n")
+    config.reload()
+    scheduler.apply_config(config)
+    assert live_entries(scheduler, paris) == []
+
+    config_path.write_text("[Cities]\nRome = Italy\nparis = france\n[Scheduler]\nDEFAULT_INTERVAL = 0.1\n"
+                           "API_CALLS_PER_MINUTE = 60000\nSCRAPES_PER_MINUTE = 60000\n")
+    config.reload()
+    scheduler.apply_config(config)
+    assert len(live_entries(scheduler, paris)) == 1
+
+    await scheduler.run(0.25)
+    # Polled right away and then every 0.1s, never twice per interval
+    assert 2 <= scheduler.api.polled.count("Paris") <= 4
+
+@pytest.mark.asyncio
+async def test_reloaded_threshold_flags_differences(tmp_path, caplog):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Cities]\nParis = France\n[Analysis]\nTEMPERATURE_THRESHOLD = 2.0\n")
+    config = ConfigHelper(str(config_path))
+    scheduler = make_scheduler(config.get_cities(), default_interval=60, threshold=config.get_temperature_threshold())
+    await scheduler.run(0.05)
+    assert "Large temperature difference" not in caplog.text
+
+    config_path.write_text("[Cities]\nParis = France\n[Analysis]\nTEMPERATURE_THRESHOLD = 0.5\n"
+                           "[Scheduler]\nAPI_CALLS_PER_MINUTE = 60000\nSCRAPES_PER_MINUTE = 60000\n")
+    config.reload()
+    scheduler.apply_config(config)
+    scheduler.queue[0] = (0.0, *scheduler.queue[0][1:])
+    await scheduler.run(0.05)
+    assert "Large temperature difference for Paris, France" in caplog.text
+
+class CountingScraper(WebScraper):
+    """
+    Real cache handling over a fake page fetch that reads a new temperature every time
+    """
+    def __init__(self, config):
+        super().__init__(config, cache=ResponseCache(None, ttl_seconds=600))
+        self.fetches = 0
+
+    async def _extract_via_http(self, city, country):
+        self.fetches += 1
+        return float(self.fetches), 0.0
+
+@pytest.mark.asyncio
+async def test_web_polls_bypass_the_response_cache(tmp_path):
+    config_path = tmp_path / "config.ini"
+    config_path.write_text("[Scraper]\nBACKEND = http\n[Cache]\nENABLED = true\nTTL_SECONDS = 600\n")
+    scraper = CountingScraper(ConfigHelper(str(config_path)))
+    scheduler = PollingScheduler(scraper, FakeApi(), FakeWriter(), [("Paris", "France")], default_interval=0.05,
+                                 api_calls_per_minute=60000, scrapes_per_minute=60000)
+    await scheduler.run(0.2)
+
+    web_values = [temperature for source, temperature in scheduler.writer.values if source == "web"]
+    assert len(web_values) >= 3
+    assert web_values == [float(poll) for poll in range(1, len(web_values) + 1)]
+    # Fresh extracts still refresh the cache for other readers
+    assert await scraper.extract_temperature_data("Paris", "France") == (float(len(web_values)), 0.0)
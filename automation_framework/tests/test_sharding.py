@@ -0,0 +1,62 @@
+import asyncio
+import json
+import sqlite3
+from automation_framework.benchmarks.fake_servers import FakeWeatherServers, synthetic_cities, synthetic_country_codes
+from automation_framework.utilities.pipeline import run_pipeline
+from automation_framework.utilities.sharding import partition
+
+CITIES = synthetic_cities(60)
+
+def write_config(path, servers, workers):
+    country_codes = "\n".join(f"{country} = {code}" for country, code in synthetic_country_codes(CITIES).items())
+    path.write_text(f"""[API]
+BASE_URL = {servers.api_url}
+
+[Database]
+DB_NAME = {path.parent / "weather.db"}
+
+[Scraper]
+BACKEND = http
+BROWSER_FALLBACK = false
+BASE_URL = {servers.site_url}
+REQUESTS_PER_SECOND = 0
+
+[Sharding]
+WORKERS = {workers}
+
+[Metrics]
+ENABLED = true
+TEXTFILE_PATH = {path.parent / "weather_pipeline.prom"}
+
+[CountryCodes]
+{country_codes}
+""")
+    return str(path)
+
+def test_partition_is_round_robin_and_never_empty():
+    assert partition([("a", "x"), ("b", "x"), ("c", "x")], 2) == [[("a", "x"), ("c", "x")], [("b", "x")]]
+    assert len(partition([("a", "x")], 4)) == 1
+
+def test_sharded_run_matches_single_process_run(tmp_path):
+    outputs = []
+    with FakeWeatherServers() as servers:
+        for workers in (1, 3):
+            run_dir = tmp_path / f"workers_{workers}"
+            run_dir.mkdir()
+            config_path = write_config(run_dir / "config.ini", servers, workers)
+            result = asyncio.run(run_pipeline(config_path, CITIES, reports_dir=str(run_dir)))
+            with open(result["report_path"]) as f:
+                report = json.load(f)
+            rows = sqlite3.connect(run_dir / "weather.db").execute(
+                "SELECT city, temperature_web, temperature_api FROM weather_data ORDER BY city").fetchall()
+            # Fetch metrics are recorded in the workers and merged into the coordinator's report
+            fetches = {stage: counts.get("success") for stage, counts in report["metrics"]["stages"].items()
+                       if stage.startswith("fetch.")}
+            with open(run_dir / "weather_pipeline.prom") as f:
+                exported = "stage=\"fetch\"" in f.read()
+            outputs.append((result["matched"], result["test_status"]["errors"], report["statistics"],
+                            report["highest_temperature"], rows, fetches, exported))
+
+    assert outputs[0][0] == len(CITIES)
+    assert outputs[0][5] == {"fetch.api": len(CITIES), "fetch.web_http": len(CITIES)}
+    assert outputs[0] == outputs[1]
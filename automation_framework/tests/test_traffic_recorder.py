@@ -0,0 +1,45 @@
+import json
+import multiprocessing
+from automation_framework.utilities.traffic_recorder import TrafficRecorder, request_key
+
+def test_request_key_drops_host_and_api_key():
+    live = request_key("https://api.openweathermap.org/data/2.5/weather", {"q": "London", "appid": "secret", "units": "metric"})
+    local = request_key("http://127.0.0.1:8080/data/2.5/weather", {"units": "metric", "q": "London", "appid": "other"})
+    assert live == local == "weather?q=London&units=metric"
+
+def test_save_merges_with_fixtures_on_disk(tmp_path):
+    first = TrafficRecorder("record", str(tmp_path))
+    first.record("web", "London, United Kingdom", [12.0, 11.0])
+    first.save()
+
+    second = TrafficRecorder("record", str(tmp_path))
+    second.record("web", "Paris, France", [14.0, 13.5])
+    second.record("web", "Rome, Italy", None)
+    second.save()
+
+    with open(tmp_path / "web_extracts.json") as f:
+        assert json.load(f) == {"London, United Kingdom": [12.0, 11.0], "Paris, France": [14.0, 13.5]}
+
+    replay = TrafficRecorder("replay", str(tmp_path))
+    assert replay.replay("web", "Paris, France") == [14.0, 13.5]
+    assert replay.replay("web", "Rome, Italy") is None
+    replay.record("web", "Rome, Italy", [20.0, 19.0])
+    replay.save()
+    assert replay.replay("web", "Rome, Italy") is None
+
+def record_cities(fixtures_dir, worker):
+    recorder = TrafficRecorder("record", fixtures_dir)
+    for index in range(50):
+        recorder.record("api", f"weather?q=City{worker}_{index}", {"main": {"temp": index}})
+        recorder.save()
+
+def test_concurrent_worker_saves_keep_every_recording(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=record_cities, args=(str(tmp_path), worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+    with open(tmp_path / "api_responses.json") as f:
+        assert len(json.load(f)) == 200
@@ -0,0 +1,19 @@
+from automation_framework.utilities.weather_page_parser import parse_weather_page
+
+QUICK_LOOK_HTML = """
+<div id="qlook" class="three columns">
+    <div class="h1">Now</div>
+    <img id="cur-weather" class="mtt" src="//c.tadst.com/gfx/w/svg/wt-7.svg" width="80" height="80">
+    <div class="h2">19&nbsp;°C</div>
+    <p>Passing clouds.</p>
+    <br>
+    <p>Feels Like: 18&nbsp;°C<br>Forecast: 21 / 12&nbsp;°C<br>Wind: 11 km/h</p>
+</div>
+"""
+
+def test_parse_weather_page():
+    assert parse_weather_page(QUICK_LOOK_HTML) == (19.0, 18.0)
+
+def test_parse_weather_page_returns_none_when_values_missing():
+    assert parse_weather_page("<html><body><p>Access denied</p></body></html>") is None
+    assert parse_weather_page('<div class="h2">N/A</div><p>Feels Like: 18 °C</p>') is None
@@ -0,0 +1,162 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+class PairedHistory:
+    def __init__(self, cities: List[str], city_codes: np.ndarray, observed_at: np.ndarray,
+                 web_temperature: np.ndarray, api_temperature: np.ndarray):
+        """
+        Column arrays of web/API observation pairs, sorted by city and then time
+
+        Args:
+            cities (List[str]): City names, indexed by city_codes
+            city_codes (np.ndarray): City index of every pair
+            observed_at (np.ndarray): Observation time of the API side of every pair, datetime64[s]
+            web_temperature (np.ndarray): Web temperature of every pair
+            api_temperature (np.ndarray): API temperature of every pair
+        """
+        self.cities = cities
+        self.city_codes = city_codes
+        self.observed_at = observed_at
+        self.web_temperature = web_temperature
+        self.api_temperature = api_temperature
+        self.difference = web_temperature - api_temperature
+        self.abs_difference = np.abs(self.difference)
+        self.counts = np.bincount(city_codes, minlength=len(cities))
+        # Start offset of each city's run of rows, valid because rows are grouped by city
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+
+    def __len__(self) -> int:
+        return len(self.city_codes)
+
+    def _per_city_mean(self, values: np.ndarray) -> np.ndarray:
+        sums = np.bincount(self.city_codes, weights=values, minlength=len(self.cities))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / self.counts
+
+    def bias(self) -> np.ndarray:
+        """
+        Mean web minus API temperature per city
+        """
+        return self._per_city_mean(self.difference)
+
+    def std(self) -> np.ndarray:
+        mean = self.bias()
+        return np.sqrt(self._per_city_mean((self.difference - mean[self.city_codes]) ** 2))
+
+    def percentiles(self, q: float) -> np.ndarray:
+        """
+        Per-city percentile of the absolute discrepancy, using the nearest-rank method on a single sort
+        """
+        order = np.lexsort((self.abs_difference, self.city_codes))
+        sorted_abs = self.abs_difference[order]
+        ranks = np.ceil(q / 100 * self.counts).astype(int) - 1
+        ranks = np.clip(ranks, 0, np.maximum(self.counts - 1, 0))
+        result = np.full(len(self.cities), np.nan)
+        present = self.counts > 0
+        result[present] = sorted_abs[self.offsets[present] + ranks[present]]
+        return result
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """
+        Trailing mean of the signed discrepancy over the last `window` pairs of the same city
+        """
+        cumulative = np.concatenate(([0.0], np.cumsum(self.difference)))
+        index = np.arange(len(self))
+        position = index - self.offsets[self.city_codes]
+        start = index - np.minimum(position, window - 1)
+        return (cumulative[index + 1] - cumulative[start]) / (index + 1 - start)
+
+    def outliers(self, z: float = 3.0) -> np.ndarray:
+        """
+        Boolean mask of pairs whose discrepancy is more than z standard deviations from the city's bias
+        """
+        deviation = np.abs(self.difference - self.bias()[self.city_codes])
+        spread = self.std()[self.city_codes]
+        return (spread > 0) & (deviation > z * spread)
+
+    def summary(self, z: float = 3.0) -> Dict[str, Dict]:
+        """
+        Per-city bias, percentiles and outlier counts
+        """
+        bias = self.bias()
+        mean_abs = self._per_city_mean(self.abs_difference)
+        p50 = self.percentiles(50)
+        p95 = self.percentiles(95)
+        outliers = np.bincount(self.city_codes, weights=self.outliers(z), minlength=len(self.cities))
+        return {
+            city: {
+                "samples": int(self.counts[i]),
+                "bias": float(bias[i]),
+                "mean_abs_difference": float(mean_abs[i]),
+                "p50_abs_difference": float(p50[i]),
+                "p95_abs_difference": float(p95[i]),
+                "outliers": int(outliers[i])
+            }
+            for i, city in enumerate(self.cities) if self.counts[i]
+        }
+
+def _load_source(db, source: str, start, end):
+    query = '''
+        SELECT city, observed_at, temperature FROM observations
+        WHERE source = ? AND temperature IS NOT NULL
+    '''
+    params = [source]
+    if start is not None:
+        query += ' AND observed_at >= ?'
+        params.append(start)
+    if end is not None:
+        query += ' AND observed_at <= ?'
+        params.append(end)
+    rows = db.conn.execute(query + ' ORDER BY city, observed_at', params).fetchall()
+    if not rows:
+        return np.array([], dtype=object), np.array([], dtype="datetime64[s]"), np.array([], dtype=float)
+    cities, observed_at, temperature = zip(*rows)
+    return (np.array(cities, dtype=object),
+            np.array(observed_at, dtype="datetime64[s]"),
+            np.array(temperature, dtype=float))
+
+def load_paired_history(db, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        tolerance_seconds: int = 300) -> PairedHistory:
+    """
+    Load observation history in bulk and pair every API observation with the nearest
+    web observation of the same city taken at most tolerance_seconds earlier or later
+
+    Args:
+        db (DatabaseHelper): Database with the observations table
+        start (Optional[datetime]): Earliest observation time to include
+        end (Optional[datetime]): Latest observation time to include
+        tolerance_seconds (int): Maximum time between the two sides of a pair
+
+    Returns:
+        PairedHistory: Paired observations as column arrays
+    """
+    web_cities, web_times, web_temps = _load_source(db, "web", start, end)
+    api_cities, api_times, api_temps = _load_source(db, "api", start, end)
+
+    cities, codes = np.unique(np.concatenate((web_cities, api_cities)).astype(str), return_inverse=True)
+    web_codes, api_codes = codes[:len(web_cities)], codes[len(web_cities):]
+
+    # A composite (city, time) key keeps the search within a city: cities are spaced further apart than any time span
+    span = np.int64(10 ** 11)
+    web_keys = web_codes.astype(np.int64) * span + web_times.astype(np.int64)
+    api_keys = api_codes.astype(np.int64) * span + api_times.astype(np.int64)
+
+    # Candidates are the last web observation at or before each API one and the first one after it.
+    # Sentinels on both ends keep every lookup in bounds and never fall within tolerance.
+    sentinel = np.int64(2 ** 62)
+    padded = np.concatenate(([-sentinel], web_keys, [sentinel]))
+    after = np.searchsorted(padded, api_keys, side="right")
+    before = after - 1
+    before_distance = api_keys - padded[before]
+    after_distance = padded[after] - api_keys
+    match = np.where(after_distance < before_distance, after, before) - 1
+    valid = np.minimum(before_distance, after_distance) <= tolerance_seconds
+
+    return PairedHistory(
+        [str(city) for city in cities],
+        api_codes[valid],
+        api_times[valid],
+        web_temps[match[valid]],
+        api_temps[valid]
+    )
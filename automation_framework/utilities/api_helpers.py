@@ -1,14 +1,91 @@
-import requests
 import logging
-from typing import Dict, Optional, Tuple, List
+import asyncio
+import aiohttp
+from typing import AsyncIterator, Dict, Optional, Tuple, List, Union
+from .city_catalog import CityCatalog
 from .config_helpers import ConfigHelper
+from .http_client import create_session
+from .metrics import MetricsRegistry
+from .observations import CityRegistry, Observation, ObservationBatch
+from .resilience import CircuitOpenError, Resilience
+from .response_cache import ResponseCache
+from .traffic_recorder import TrafficRecorder, request_key
 
 class ApiHelper:
-    def __init__(self, config_path: str):
-        self.config = ConfigHelper(config_path)
-        self.api_key = self.config.get_api_key()
+    def __init__(self, config_path: Union[str, ConfigHelper], cache: Optional[ResponseCache] = None,
+                 catalog: Optional[CityCatalog] = None, metrics: Optional[MetricsRegistry] = None):
+        self.config = ConfigHelper.shared(config_path)
         self.logger = logging.getLogger(__name__)
-        self.base_url = self.config.get_api_base_url()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._read_settings(self.config)
+        self.catalog = catalog or CityCatalog.from_config(self.config)
+        self.metrics = metrics or MetricsRegistry.from_config(self.config)
+        self.resilience = Resilience.from_config(self.config)
+        self.recorder = TrafficRecorder.from_config(self.config)
+        # Recorded and replayed runs must see every request, and must not serve fixtures to live runs
+        self.cache = None
+        self._owns_cache = False
+        if self.recorder.mode == "off":
+            self._owns_cache = cache is None
+            self.cache = cache or ResponseCache.from_config(self.config)
+
+    def _read_settings(self, config: ConfigHelper):
+        self.api_key = config.get_api_key()
+        self.base_url = config.get_api_base_url()
+        self.max_concurrency = config.get_api_max_concurrency()
+        self.request_timeout = config.get_api_request_timeout()
+        self.group_url = config.get_api_group_url()
+        self.bulk_mode = config.get_api_bulk_mode()
+        self.bulk_chunk_size = config.get_api_bulk_chunk_size()
+
+    def apply_config(self, config: ConfigHelper):
+        """
+        Pick up API, concurrency, cache and resilience changes from a reloaded config without restarting.
+        The request timeout applies to sessions opened afterwards.
+        """
+        max_concurrency = self.max_concurrency
+        self._read_settings(config)
+        if self.max_concurrency != max_concurrency:
+            # Requests already holding a slot finish on the old semaphore
+            self._semaphore = None
+        self.resilience.apply_config(config)
+        if self.cache:
+            self.cache.apply_config(config)
+
+    async def __aenter__(self):
+        if self.recorder.replaying:
+            return self
+        self.session = create_session(self.max_concurrency, self.request_timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+        if self.cache and self._owns_cache:
+            self.cache.close()
+            self._owns_cache = False
+        self.recorder.save()
+
+    @staticmethod
+    def _cache_key(city: str, country: Optional[str]) -> str:
+        # Same "City, Country" key as the scraper, so namesakes in different countries never share an entry
+        return f"{city}, {country}" if country else city
+
+    def _get_cached_weather(self, city: str, country: Optional[str] = None) -> Optional[Dict]:
+        if not self.cache:
+            return None
+        cached = self.cache.get("api", self._cache_key(city, country))
+        self.metrics.cache_lookup("api", cached is not None)
+        return cached
+
+    def _cache_weather(self, city: str, country: Optional[str], weather_data: Optional[Dict]):
+        if self.cache and weather_data:
+            self.cache.put("api", self._cache_key(city, country), weather_data)
 
     def get_current_weather(self, city: str) -> Optional[Dict]:
         """
@@ -20,11 +97,17 @@ class ApiHelper:
         Returns:
             Optional[Dict]: Weather data dictionary or None if request fails
         """
+        cached = self._get_cached_weather(city)
+        if cached:
+            return cached
+        import requests
         try:
             url = f"{self.base_url}?q={city}&appid={self.api_key}&units=metric"
             response = requests.get(url, timeout=10)
             response.raise_for_status()
-            return response.json()
+            weather_data = response.json()
+            self._cache_weather(city, None, weather_data)
+            return weather_data
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error fetching weather data for {city}: {str(e)}")
             return None
@@ -39,8 +122,9 @@ class ApiHelper:
         Returns:
             Optional[Tuple[float, float]]: Tuple of (temperature, feels_like) or None if data unavailable
         """
-        weather_data = self.get_current_weather(city)
-        
+        return self._parse_temperature_data(city, self.get_current_weather(city))
+
+    def _parse_temperature_data(self, city: str, weather_data: Optional[Dict]) -> Optional[Tuple[float, float]]:
         if not weather_data or 'main' not in weather_data:
             self.logger.error(f"Invalid weather data received for {city}")
             return None
@@ -54,22 +138,225 @@ class ApiHelper:
             self.logger.error(f"Error extracting temperature data for {city}: {str(e)}")
             return None
 
-    async def get_weather_data(self, cities: List[Tuple[str, str]]) -> Dict[str, Tuple[float, float]]:
+    async def fetch_current_weather(self, city: str, session: aiohttp.ClientSession,
+                                    country: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get current weather data for a city without blocking the event loop
+        
+        Args:
+            city (str): Name of the city
+            session (aiohttp.ClientSession): Pooled session used for the request
+            country (Optional[str]): Country of the city, which keys the cached response
+            
+        Returns:
+            Optional[Dict]: Weather data dictionary or None if request fails
+        """
+        params = {"q": city, "appid": self.api_key, "units": "metric"}
+        weather_data = await self._get_json(session, self.base_url, params, city)
+        self._cache_weather(city, country, weather_data)
+        return weather_data
+
+    async def _get_json(self, session: aiohttp.ClientSession, url: str, params: Dict, description: str) -> Optional[Dict]:
+        key = request_key(url, params)
+        if self.recorder.replaying:
+            weather_data = self.recorder.replay("api", key)
+            if weather_data is None:
+                self.logger.error(f"No recorded response for {description}")
+            return weather_data
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            # The semaphore is held per attempt, not across retry backoff
+            weather_data = await self.resilience.call("api", lambda: self._request_json(session, url, params),
+                                                      slot=lambda: self._semaphore)
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError, ValueError) as e:
+            # ValueError covers a 200 response whose body is not valid JSON
+            self.logger.error(f"Error fetching weather data for {description}: {str(e) or type(e).__name__}")
+            return None
+        self.recorder.record("api", key, weather_data)
+        return weather_data
+
+    async def _request_json(self, session: aiohttp.ClientSession, url: str, params: Dict) -> Dict:
+        with self.metrics.track("fetch", "api"):
+            async with session.get(url, params=params) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def fetch_temperature_data(self, city: str, session: aiohttp.ClientSession,
+                                     country: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """
+        Async counterpart of extract_temperature_data
+        
+        Args:
+            city (str): Name of the city
+            session (aiohttp.ClientSession): Pooled session used for the request
+            country (Optional[str]): Country of the city, which keys the cached response
+            
+        Returns:
+            Optional[Tuple[float, float]]: Tuple of (temperature, feels_like) or None if data unavailable
+        """
+        return self._parse_temperature_data(city, await self.fetch_current_weather(city, session, country))
+
+    async def fetch_group_temperature_data(self, city_ids: Dict[str, List[Tuple[str, str]]],
+                                           session: aiohttp.ClientSession) -> List[Tuple[Tuple[str, str], Tuple[float, float]]]:
+        """
+        Fetch up to one chunk of cities in a single request through the group endpoint
+        
+        Args:
+            city_ids (Dict[str, List[Tuple[str, str]]]): Mapping of OpenWeatherMap city ID to the (city, country) tuples it serves
+            session (aiohttp.ClientSession): Pooled session used for the request
+            
+        Returns:
+            List[Tuple[Tuple[str, str], Tuple[float, float]]]: (city, country) tuples with their (temperature, feels_like) data
+        """
+        params = {"id": ",".join(city_ids), "appid": self.api_key, "units": "metric"}
+        group_data = await self._get_json(session, self.group_url, params, f"city IDs {params['id']}")
+        if not group_data or 'list' not in group_data:
+            return []
+
+        results = []
+        for weather_data in group_data['list']:
+            for city, country in city_ids.get(str(weather_data.get('id')), []):
+                self._cache_weather(city, country, weather_data)
+                temp_data = self._parse_temperature_data(city, weather_data)
+                if temp_data:
+                    results.append(((city, country), temp_data))
+        return results
+
+    def _resolve_city_ids(self, cities: List[Tuple[str, str]]) -> Tuple[Dict[str, List[Tuple[str, str]]], List[Tuple[str, str]]]:
+        """
+        Split cities into those with a known OpenWeatherMap ID and those that must be queried by name.
+        IDs come from [CityIDs] first and the city catalog second.
+        
+        Returns:
+            Tuple[Dict[str, List[Tuple[str, str]]], List[Tuple[str, str]]]: ID to cities mapping and the unresolved cities
+        """
+        known_ids = self.config.get_city_ids()
+        resolved: Dict[str, List[Tuple[str, str]]] = {}
+        unresolved = []
+        for city, country in cities:
+            city_id = known_ids.get(city.lower())
+            if not city_id and self.catalog:
+                catalog_id = self.catalog.get_city_id(city, country)
+                city_id = str(catalog_id) if catalog_id else None
+            if city_id:
+                resolved.setdefault(city_id, []).append((city, country))
+            else:
+                unresolved.append((city, country))
+        return resolved, unresolved
+
+    async def iter_observations(self, cities: List[Tuple[str, str]], registry: CityRegistry,
+                                bulk: Optional[bool] = None) -> AsyncIterator[Observation]:
+        """
+        Fetch weather data for multiple cities concurrently, yielding observations as they complete
+        
+        Uses the session opened by ``async with ApiHelper(...)`` when available,
+        otherwise a pooled session is opened for the duration of the call. In bulk
+        mode cities listed in [CityIDs] are fetched in chunks through the group
+        endpoint and the rest fall back to one request per city name. Cities
+        with a fresh cache entry are yielded first without any request.
+        
+        Args:
+            cities (List[Tuple[str, str]]): List of (city, country) tuples
+            registry (CityRegistry): Registry the observations' city IDs refer to; new cities are added to it
+            bulk (Optional[bool]): Override for the [API] BULK_MODE setting
+            
+        Yields:
+            Observation: API observation of one city
+        """
+        pending = []
+        for city, country in cities:
+            cached = self._get_cached_weather(city, country)
+            temp_data = self._parse_temperature_data(city, cached) if cached else None
+            if temp_data:
+                yield Observation(registry.add(city, country), "api", *temp_data)
+            else:
+                pending.append((city, country))
+        if not pending:
+            return
+
+        # Replayed responses never touch the network, so no session is opened for them
+        session = self.session
+        if session is None and not self.recorder.replaying:
+            session = create_session(self.max_concurrency, self.request_timeout)
+
+        async def fetch(city: str, country: str):
+            temp_data = await self.fetch_temperature_data(city, session, country)
+            return [((city, country), temp_data)] if temp_data else []
+
+        if self.bulk_mode if bulk is None else bulk:
+            resolved, unresolved = self._resolve_city_ids(pending)
+            city_ids = list(resolved)
+            chunks = [
+                {city_id: resolved[city_id] for city_id in city_ids[i:i + self.bulk_chunk_size]}
+                for i in range(0, len(city_ids), self.bulk_chunk_size)
+            ]
+            tasks = [asyncio.ensure_future(self.fetch_group_temperature_data(chunk, session)) for chunk in chunks]
+        else:
+            unresolved = pending
+            tasks = []
+        tasks += [asyncio.ensure_future(fetch(city, country)) for city, country in unresolved]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                for (city, country), temp_data in await next_done:
+                    yield Observation(registry.add(city, country), "api", *temp_data)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if session is not self.session:
+                await session.close()
+
+    async def iter_weather_data(self, cities: List[Tuple[str, str]],
+                                bulk: Optional[bool] = None) -> AsyncIterator[Tuple[str, Tuple[float, float]]]:
+        """
+        iter_observations keyed by "City, Country" strings
+        
+        Args:
+            cities (List[Tuple[str, str]]): List of (city, country) tuples
+            bulk (Optional[bool]): Override for the [API] BULK_MODE setting
+            
+        Yields:
+            Tuple[str, Tuple[float, float]]: City key and its (temperature, feels_like) data
+        """
+        registry = CityRegistry(cities)
+        async for observation in self.iter_observations(cities, registry, bulk):
+            yield registry.keys[observation.city_id], observation.data
+
+    async def fetch_batch(self, cities: List[Tuple[str, str]], registry: CityRegistry,
+                          bulk: Optional[bool] = None) -> ObservationBatch:
+        """
+        Fetch every city into one column-backed batch
+        
+        Args:
+            cities (List[Tuple[str, str]]): List of (city, country) tuples
+            registry (CityRegistry): Registry the batch's city IDs refer to
+            bulk (Optional[bool]): Override for the [API] BULK_MODE setting
+            
+        Returns:
+            ObservationBatch: API observations of the cities that returned data
+        """
+        batch = ObservationBatch("api", registry)
+        async for observation in self.iter_observations(cities, registry, bulk):
+            batch.add(observation)
+        return batch
+
+    async def get_weather_data(self, cities: List[Tuple[str, str]],
+                               bulk: Optional[bool] = None) -> Dict[str, Tuple[float, float]]:
         """
         Get weather data for multiple cities
         
         Args:
             cities (List[Tuple[str, str]]): List of (city, country) tuples
+            bulk (Optional[bool]): Override for the [API] BULK_MODE setting
             
         Returns:
             Dict[str, Tuple[float, float]]: Dictionary mapping cities to their temperature data
         """
         results = {}
-        for city, country in cities:
-            city_key = f"{city}, {country}"
-            temp_data = self.extract_temperature_data(city)
-            if temp_data:
-                results[city_key] = temp_data
+        async for city_key, temp_data in self.iter_weather_data(cities, bulk):
+            results[city_key] = temp_data
         return results
 
     def validate_api_key(self) -> bool:
@@ -79,6 +366,7 @@ class ApiHelper:
         Returns:
             bool: True if API key is valid, False otherwise
         """
+        import requests
         try:
             # Using London as a test city
             response = requests.get(
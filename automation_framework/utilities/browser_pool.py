@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from .config_helpers import ConfigHelper
+from .metrics import NULL_METRICS, MetricsRegistry
+
+# Pages served between two browser memory samples
+MEMORY_CHECK_INTERVAL = 20
+
+def browser_memory_mb(root_pid: Optional[int] = None) -> Optional[float]:
+    """
+    Resident memory of the Chromium processes descending from this process, read from /proc
+
+    Returns:
+        Optional[float]: Total RSS in megabytes, or None where /proc is unavailable
+    """
+    root_pid = root_pid or os.getpid()
+    try:
+        pids = [int(entry) for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+
+    parents: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name is parenthesised and may itself contain spaces
+        names[pid] = stat[stat.index("(") + 1:stat.rindex(")")]
+        parents[pid] = int(stat[stat.rindex(")") + 2:].split()[1])
+
+    total_kb = 0
+    for pid, name in names.items():
+        if "chrom" not in name and "headless" not in name:
+            continue
+        ancestor = parents.get(pid)
+        while ancestor and ancestor != root_pid:
+            ancestor = parents.get(ancestor)
+        if ancestor != root_pid:
+            continue
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+def lean_context_setup(config: ConfigHelper) -> Optional[Callable[[object], Awaitable[None]]]:
+    """
+    Context setup for [Scraper] LEAN_MODE: abort the blocked resource types and anything
+    not served by the scraper's site
+
+    Returns:
+        Optional[Callable]: Coroutine routing a context's requests, or None when lean mode is off
+    """
+    if not config.get_scraper_lean_mode():
+        return None
+    blocked_resource_types = frozenset(config.get_scraper_blocked_resource_types())
+    site_host = urlparse(config.get_scraper_base_url()).netloc
+
+    async def route_request(route):
+        request = route.request
+        if request.resource_type in blocked_resource_types or urlparse(request.url).netloc != site_host:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def setup(context):
+        await context.route("**/*", route_request)
+    return setup
+
+class BrowserService:
+    _shared: Dict[str, "BrowserService"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size: int = 4, max_pages: int = 500, max_memory_mb: float = 0,
+                 headless: bool = True, cdp_endpoint: Optional[str] = None,
+                 context_setup: Optional[Callable[[object], Awaitable[None]]] = None,
+                 metrics: MetricsRegistry = NULL_METRICS):
+        """
+        Warm Chromium with a pool of reusable context/page slots
+
+        The browser is launched (or connected to over CDP) on first use and then
+        kept open. Each slot is a context with one page that is handed out,
+        navigated, and returned for the next city instead of being closed. After
+        ``max_pages`` pages, or once the browser's resident memory passes
+        ``max_memory_mb``, the pool drains and the browser is restarted so
+        long-running schedulers keep a stable footprint.
+
+        Args:
+            pool_size (int): Maximum number of slots, i.e. concurrently open pages
+            max_pages (int): Pages served before the browser is restarted; 0 disables
+            max_memory_mb (float): Browser RSS that triggers a restart; 0 disables
+            headless (bool): Launch Chromium headless
+            cdp_endpoint (Optional[str]): Connect to an already running browser instead of launching one
+            context_setup (Optional[Callable]): Coroutine applied to every new context, e.g. request routing
+            metrics (MetricsRegistry): Registry counting pages served and restarts
+        """
+        self.pool_size = max(1, pool_size)
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.headless = headless
+        self.cdp_endpoint = cdp_endpoint
+        self.context_setup = context_setup
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+        self.playwright = None
+        self.browser = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.idle: List[Tuple[object, object]] = []
+        self.slots = 0
+        self.pages_since_start = 0
+        self.restarts = 0
+        self._restart_pending = False
+        self._condition: Optional[asyncio.Condition] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper, pool_size: int = 4) -> "BrowserService":
+        """
+        Build the service described by the [Browser] section
+
+        With SERVICE enabled every scraper built from the same config file in the
+        same event loop shares one warm browser; otherwise each call returns a
+        private instance owned by the caller. Contexts are set up from the config's
+        lean-mode settings, never from a particular scraper, so a shared service
+        holds no reference to the scraper that started it. Whoever runs the event
+        loop stops the shared services with stop_shared() before it closes.
+
+        Args:
+            config (ConfigHelper): Config to read
+            pool_size (int): Slot count used when [Browser] POOL_SIZE is 0
+        """
+        def build() -> "BrowserService":
+            return cls(
+                pool_size=config.get_browser_pool_size() or pool_size,
+                max_pages=config.get_browser_max_pages(),
+                max_memory_mb=config.get_browser_max_memory_mb(),
+                headless=config.get_browser_headless(),
+                cdp_endpoint=config.get_browser_cdp_endpoint(),
+                context_setup=lean_context_setup(config),
+                metrics=MetricsRegistry.from_config(config)
+            )
+
+        if not config.get_browser_service():
+            return build()
+        key = os.path.abspath(config.config_path)
+        loop = asyncio.get_running_loop()
+        with cls._shared_lock:
+            service = cls._shared.get(key)
+            # Playwright objects are bound to the loop that created them
+            if service is None or service.loop not in (None, loop):
+                service = cls._shared[key] = build()
+            return service
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def start(self):
+        """
+        Launch or connect to the browser unless it is already running
+        """
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.browser is not None:
+                return
+            self.loop = asyncio.get_running_loop()
+            if self.playwright is None:
+                from playwright.async_api import async_playwright
+                self.playwright = await async_playwright().start()
+            if self.cdp_endpoint:
+                self.browser = await self.playwright.chromium.connect_over_cdp(self.cdp_endpoint)
+            else:
+                self.browser = await self.playwright.chromium.launch(headless=self.headless)
+            self.pages_since_start = 0
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[object]:
+        """
+        Borrow a warm page. It goes back to the pool afterwards unless the block raised,
+        in which case its context is discarded.
+        """
+        slot = await self._acquire()
+        healthy = False
+        try:
+            yield slot[1]
+            healthy = True
+        finally:
+            await self._release(slot, healthy)
+
+    async def _acquire(self) -> Tuple[object, object]:
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                if not self._restart_pending:
+                    if self.idle:
+                        return self.idle.pop()
+                    if self.slots < self.pool_size:
+                        self.slots += 1
+                        break
+                await condition.wait()
+        try:
+            await self.start()
+            context = await self.browser.new_context()
+            if self.context_setup:
+                await self.context_setup(context)
+            return context, await context.new_page()
+        except BaseException:
+            async with condition:
+                self.slots -= 1
+                condition.notify()
+            raise
+
+    def _needs_restart(self) -> bool:
+        if self.max_pages and self.pages_since_start >= self.max_pages:
+            return True
+        if self.max_memory_mb and not self.cdp_endpoint and self.pages_since_start % MEMORY_CHECK_INTERVAL == 0:
+            memory = browser_memory_mb()
+            return memory is not None and memory >= self.max_memory_mb
+        return False
+
+    async def _release(self, slot: Tuple[object, object], healthy: bool):
+        condition = self._get_condition()
+        self.pages_since_start += 1
+        self.metrics.inc("browser_pages_total")
+        if not self._restart_pending and self._needs_restart():
+            self._restart_pending = True
+
+        if healthy and not self._restart_pending:
+            async with condition:
+                self.idle.append(slot)
+                condition.notify()
+            return
+
+        retired = [slot]
+        async with condition:
+            if self._restart_pending:
+                retired += self.idle
+                self.idle = []
+            self.slots -= len(retired)
+        for context, _ in retired:
+            await self._close_context(context)
+        async with condition:
+            if self._restart_pending and self.slots == 0:
+                await self._restart()
+                self._restart_pending = False
+            condition.notify_all()
+
+    async def _close_context(self, context):
+        try:
+            await context.close()
+        except Exception as e:
+            self.logger.debug(f"Ignoring error while closing a browser context: {str(e)}")
+
+    async def _restart(self):
+        """
+        Close the drained browser; the next page request starts a fresh one
+        """
+        self.logger.info(f"Restarting browser after {self.pages_since_start} pages")
+        self.restarts += 1
+        self.metrics.inc("browser_restarts_total")
+        browser, self.browser = self.browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                self.logger.debug(f"Ignoring error while closing the browser: {str(e)}")
+
+    async def stop(self):
+        """
+        Close every slot and the browser, and stop the Playwright driver
+        """
+        for context, _ in self.idle:
+            await self._close_context(context)
+        self.idle = []
+        self.slots = 0
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            finally:
+                self.browser = None
+        if self.playwright is not None:
+            try:
+                await self.playwright.stop()
+            finally:
+                self.playwright = None
+        with self._shared_lock:
+            for key, service in list(self._shared.items()):
+                if service is self:
+                    del self._shared[key]
+
+    @classmethod
+    async def stop_shared(cls):
+        """
+        Stop every shared service started in the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        with cls._shared_lock:
+            services = [service for service in cls._shared.values() if service.loop in (None, loop)]
+        for service in services:
+            await service.stop()
+
+async def serve_browser(port: int = 9222, headless: bool = True):
+    """
+    Launch a long-lived Chromium that other processes reach through [Browser] CDP_ENDPOINT
+
+    Args:
+        port (int): Remote debugging port to listen on
+        headless (bool): Launch Chromium headless
+    """
+    from playwright.async_api import async_playwright
+    logger = logging.getLogger(__name__)
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=headless, args=[f"--remote-debugging-port={port}"])
+        logger.info(f"Browser service listening on http://127.0.0.1:{port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await browser.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a warm Chromium for scrapers to connect to over CDP")
+    parser.add_argument("--port", type=int, default=9222)
+    parser.add_argument("--headed", action="store_true", help="Show the browser window")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve_browser(args.port, not args.headed))
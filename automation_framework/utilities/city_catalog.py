@@ -0,0 +1,215 @@
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import unicodedata
+from typing import IO, Dict, Iterable, Iterator, Optional, Tuple
+from .config_helpers import ConfigHelper
+
+TIMEANDDATE_WEATHER_URL = "https://www.timeanddate.com/weather"
+
+# Read size when streaming a city list dump; the 200k-entry list is never held in memory whole
+DUMP_CHUNK_SIZE = 1 << 16
+_ARRAY_SEPARATORS = " \t\r\n,"
+
+def normalize_name(name: str) -> str:
+    """
+    Case- and accent-insensitive lookup key, e.g. "São Paulo" -> "sao paulo"
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
+def url_slug(name: str) -> str:
+    return normalize_name(name).replace(" ", "-")
+
+def iter_json_array(f: IO[str], chunk_size: int = DUMP_CHUNK_SIZE) -> Iterator:
+    """
+    Yield the elements of a top-level JSON array one at a time, reading the file in chunks
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, opened = "", 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in _ARRAY_SEPARATORS:
+            position += 1
+        if position == len(buffer):
+            buffer, position = f.read(chunk_size), 0
+            if not buffer:
+                raise ValueError("Unexpected end of JSON array")
+            continue
+        if not opened:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array")
+            opened = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            end = None
+        if end is None or end == len(buffer):
+            # The element may continue in the next chunk
+            chunk = f.read(chunk_size)
+            if chunk:
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            if end is None:
+                raise
+        yield value
+        position = end
+
+class CityCatalog:
+    def __init__(self, path: str, base_url: str = TIMEANDDATE_WEATHER_URL):
+        """
+        Indexed on-disk catalog of cities and countries
+        
+        Nothing is read at construction time. The SQLite file is opened and
+        memory-mapped on first lookup, and every answer is memoised, so repeated
+        lookups are dictionary hits and a 200k-entry catalog costs neither startup
+        time nor resident memory for cities that are never asked for.
+        
+        Args:
+            path (str): SQLite file holding the catalog
+            base_url (str): timeanddate.com weather base URL used to build page URLs
+        """
+        self.path = path
+        self.base_url = base_url
+        self.logger = logging.getLogger(__name__)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._city_ids: Dict[Tuple[str, str], Optional[int]] = {}
+        self._countries: Dict[str, Optional[Tuple[str, str]]] = {}
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper) -> Optional["CityCatalog"]:
+        """
+        Build the catalog described by the [Catalog] section, or None when it is disabled
+        """
+        if not config.get_catalog_enabled():
+            return None
+        return cls(config.get_catalog_path())
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            catalog_dir = os.path.dirname(self.path)
+            if catalog_dir:
+                os.makedirs(catalog_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute('PRAGMA mmap_size=268435456')
+            self._create_tables()
+        return self._conn
+
+    def _create_tables(self):
+        with self._conn:
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS cities (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                country_code TEXT,
+                slug TEXT NOT NULL
+            )''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_cities_name_key ON cities (name_key, country_code)')
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS countries (
+                name_key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                country_code TEXT,
+                slug TEXT NOT NULL
+            ) WITHOUT ROWID''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_countries_code ON countries (country_code)')
+
+    def ingest_owm_city_list(self, path: str) -> int:
+        """
+        Load OpenWeatherMap's city list dump (city.list.json or city.list.json.gz),
+        parsing and inserting it one entry at a time
+        
+        Args:
+            path (str): Path to the dump
+            
+        Returns:
+            int: Number of cities ingested
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            rows = (
+                (int(entry["id"]), entry["name"], normalize_name(entry["name"]),
+                 (entry.get("country") or "").lower() or None, url_slug(entry["name"]))
+                for entry in iter_json_array(f)
+            )
+            return self._ingest_cities(rows)
+
+    def _ingest_cities(self, rows: Iterable[Tuple[int, str, str, Optional[str], str]]) -> int:
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany('INSERT OR REPLACE INTO cities VALUES (?, ?, ?, ?, ?)', rows)
+            count = self.conn.total_changes - before
+        self._city_ids.clear()
+        return count
+
+    def ingest_countries(self, slugs: Dict[str, str], codes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Load country names with their timeanddate.com URL slug and, optionally, ISO 3166 code
+        
+        Args:
+            slugs (Dict[str, str]): Country name to URL slug, e.g. the [CountryCodes] section
+            codes (Optional[Dict[str, str]]): Country name to two-letter ISO code used by OpenWeatherMap
+            
+        Returns:
+            int: Number of countries ingested
+        """
+        codes = {normalize_name(name): code.lower() for name, code in (codes or {}).items()}
+        rows = [(normalize_name(name), name, codes.get(normalize_name(name)), slug)
+                for name, slug in slugs.items()]
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO countries VALUES (?, ?, ?, ?)', rows)
+        self._countries.clear()
+        return len(rows)
+
+    def _country(self, country: str) -> Optional[Tuple[str, str]]:
+        key = normalize_name(country)
+        if key not in self._countries:
+            row = self.conn.execute(
+                'SELECT slug, country_code FROM countries WHERE name_key = ? OR country_code = ?', (key, key)
+            ).fetchone()
+            self._countries[key] = row
+        return self._countries[key]
+
+    def get_country_slug(self, country: str) -> Optional[str]:
+        country_row = self._country(country)
+        return country_row[0] if country_row else None
+
+    def get_city_id(self, city: str, country: Optional[str] = None) -> Optional[int]:
+        """
+        Resolve a city name to its OpenWeatherMap ID. When the country is unknown
+        and several cities share the name, the name is ambiguous and None is returned.
+        """
+        country_row = self._country(country) if country else None
+        country_code = country_row[1] if country_row else None
+        memo_key = (normalize_name(city), country_code or "")
+        if memo_key not in self._city_ids:
+            if country_code:
+                rows = self.conn.execute(
+                    'SELECT id FROM cities WHERE name_key = ? AND country_code = ? ORDER BY id LIMIT 1',
+                    memo_key
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT id FROM cities WHERE name_key = ? LIMIT 2', (memo_key[0],)
+                ).fetchall()
+                if len(rows) > 1:
+                    self.logger.warning(f"City name '{city}' is ambiguous without a country")
+                    rows = []
+            self._city_ids[memo_key] = rows[0][0] if rows else None
+        return self._city_ids[memo_key]
+
+    def get_timeanddate_url(self, city: str, country: str) -> Optional[str]:
+        country_slug = self.get_country_slug(country)
+        if not country_slug:
+            return None
+        return f"{self.base_url}/{country_slug}/{url_slug(city)}"
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
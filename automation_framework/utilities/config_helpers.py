@@ -1,11 +1,230 @@
+import asyncio
 import configparser
-from typing import Dict, List, Tuple
+import logging
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Union
 import os
 
+SCRAPER_BACKENDS = ('playwright', 'http')
+REPLAY_MODES = ('off', 'record', 'replay')
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable, fully parsed view of a config file. Lookup tables are built once per parse.
+    """
+    db_name: Optional[str]
+    db_writer_batch_size: int
+    db_writer_flush_interval: float
+    temperature_threshold: float
+    cities: Tuple[Tuple[str, str], ...]
+    log_level: str
+    log_file: Optional[str]
+    country_codes: Mapping[str, str]
+    api_base_url: str
+    api_max_concurrency: int
+    api_request_timeout: float
+    api_group_url: str
+    api_bulk_mode: bool
+    api_bulk_chunk_size: int
+    scraper_concurrency: int
+    scraper_requests_per_second: float
+    scraper_burst: float
+    scraper_lean_mode: bool
+    scraper_blocked_resource_types: Tuple[str, ...]
+    scraper_backend: str
+    scraper_base_url: str
+    scraper_browser_fallback: bool
+    cache_enabled: bool
+    cache_path: str
+    cache_ttl: float
+    cache_max_entries: int
+    scheduler_default_interval: float
+    scheduler_api_calls_per_minute: float
+    scheduler_scrapes_per_minute: float
+    scheduler_workers: int
+    poll_intervals: Mapping[str, float]
+    catalog_enabled: bool
+    catalog_path: str
+    city_ids: Mapping[str, str]
+    report_format: str
+    metrics_enabled: bool
+    metrics_textfile_path: str
+    resilience_retry_attempts: int
+    resilience_retry_base_delay: float
+    resilience_retry_max_delay: float
+    resilience_attempt_timeout: Optional[float]
+    resilience_breaker_failure_threshold: int
+    resilience_breaker_reset_timeout: float
+    resilience_run_deadline: Optional[float]
+    resilience_hedge_enabled: bool
+    resilience_hedge_min_samples: int
+    sharding_workers: int
+    sharding_batch_size: int
+    browser_service: bool
+    browser_cdp_endpoint: Optional[str]
+    browser_pool_size: int
+    browser_max_pages: int
+    browser_max_memory_mb: float
+    browser_headless: bool
+    replay_mode: str
+    replay_fixtures_dir: str
+
+    @classmethod
+    def from_parser(cls, config: configparser.ConfigParser,
+                    cities_config: Optional[configparser.ConfigParser] = None) -> "ConfigSnapshot":
+        def section(name: str, parser: configparser.ConfigParser = config) -> Dict[str, str]:
+            if not parser.has_section(name):
+                return {}
+            return {key.strip(): value.strip() for key, value in parser[name].items()}
+
+        blocked = config.get('Scraper', 'BLOCKED_RESOURCE_TYPES', fallback='image, media, font, stylesheet')
+        backend = config.get('Scraper', 'BACKEND', fallback='playwright').strip().lower()
+        if backend not in SCRAPER_BACKENDS:
+            raise ValueError(f"Unknown scraper backend '{backend}'. Supported backends: {', '.join(SCRAPER_BACKENDS)}")
+        replay_mode = config.get('Replay', 'MODE', fallback='off').strip().lower()
+        if replay_mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode '{replay_mode}'. Supported modes: {', '.join(REPLAY_MODES)}")
+
+        return cls(
+            db_name=config.get('Database', 'DB_NAME', fallback=None),
+            db_writer_batch_size=config.getint('Database', 'WRITER_BATCH_SIZE', fallback=500),
+            db_writer_flush_interval=config.getfloat('Database', 'WRITER_FLUSH_INTERVAL', fallback=1.0),
+            temperature_threshold=config.getfloat('Analysis', 'TEMPERATURE_THRESHOLD', fallback=2.0),
+            cities=tuple(section('Cities', cities_config or config).items()),
+            log_level=config.get('Logging', 'LOG_LEVEL', fallback='INFO'),
+            log_file=config.get('Logging', 'LOG_FILE', fallback=None),
+            country_codes=MappingProxyType(section('CountryCodes')),
+            api_base_url=config.get('API', 'BASE_URL', fallback='https://api.openweathermap.org/data/2.5/weather'),
+            api_max_concurrency=config.getint('API', 'MAX_CONCURRENCY', fallback=20),
+            api_request_timeout=config.getfloat('API', 'REQUEST_TIMEOUT', fallback=10.0),
+            api_group_url=config.get('API', 'GROUP_URL', fallback='https://api.openweathermap.org/data/2.5/group'),
+            api_bulk_mode=config.getboolean('API', 'BULK_MODE', fallback=False),
+            api_bulk_chunk_size=config.getint('API', 'BULK_CHUNK_SIZE', fallback=20),
+            scraper_concurrency=config.getint('Scraper', 'CONCURRENCY', fallback=4),
+            scraper_requests_per_second=config.getfloat('Scraper', 'REQUESTS_PER_SECOND', fallback=1.0),
+            scraper_burst=config.getfloat('Scraper', 'BURST', fallback=4),
+            scraper_lean_mode=config.getboolean('Scraper', 'LEAN_MODE', fallback=False),
+            scraper_blocked_resource_types=tuple(t.strip() for t in blocked.split(',') if t.strip()),
+            scraper_backend=backend,
+            scraper_base_url=config.get('Scraper', 'BASE_URL', fallback='https://www.timeanddate.com/weather').rstrip('/'),
+            scraper_browser_fallback=config.getboolean('Scraper', 'BROWSER_FALLBACK', fallback=True),
+            cache_enabled=config.getboolean('Cache', 'ENABLED', fallback=False),
+            cache_path=config.get('Cache', 'PATH', fallback='automation_framework/cache/response_cache.db'),
+            cache_ttl=config.getfloat('Cache', 'TTL_SECONDS', fallback=600),
+            cache_max_entries=config.getint('Cache', 'MAX_ENTRIES', fallback=10000),
+            scheduler_default_interval=config.getfloat('Scheduler', 'DEFAULT_INTERVAL', fallback=300),
+            scheduler_api_calls_per_minute=config.getfloat('Scheduler', 'API_CALLS_PER_MINUTE', fallback=60),
+            scheduler_scrapes_per_minute=config.getfloat('Scheduler', 'SCRAPES_PER_MINUTE', fallback=30),
+            scheduler_workers=config.getint('Scheduler', 'WORKERS', fallback=8),
+            poll_intervals=MappingProxyType({city: float(seconds) for city, seconds in section('PollIntervals').items()}),
+            catalog_enabled=config.getboolean('Catalog', 'ENABLED', fallback=False),
+            catalog_path=config.get('Catalog', 'PATH', fallback='automation_framework/data/city_catalog.db'),
+            city_ids=MappingProxyType(section('CityIDs')),
+            report_format=config.get('Report', 'FORMAT', fallback='json').strip().lower(),
+            metrics_enabled=config.getboolean('Metrics', 'ENABLED', fallback=False),
+            metrics_textfile_path=config.get('Metrics', 'TEXTFILE_PATH', fallback='automation_framework/metrics/weather_pipeline.prom'),
+            resilience_retry_attempts=config.getint('Resilience', 'RETRY_ATTEMPTS', fallback=3),
+            resilience_retry_base_delay=config.getfloat('Resilience', 'RETRY_BASE_DELAY', fallback=0.5),
+            resilience_retry_max_delay=config.getfloat('Resilience', 'RETRY_MAX_DELAY', fallback=5.0),
+            resilience_attempt_timeout=config.getfloat('Resilience', 'ATTEMPT_TIMEOUT', fallback=10.0) or None,
+            resilience_breaker_failure_threshold=config.getint('Resilience', 'BREAKER_FAILURE_THRESHOLD', fallback=5),
+            resilience_breaker_reset_timeout=config.getfloat('Resilience', 'BREAKER_RESET_TIMEOUT', fallback=30.0),
+            resilience_run_deadline=config.getfloat('Resilience', 'RUN_DEADLINE', fallback=0) or None,
+            resilience_hedge_enabled=config.getboolean('Resilience', 'HEDGE_ENABLED', fallback=False),
+            resilience_hedge_min_samples=config.getint('Resilience', 'HEDGE_MIN_SAMPLES', fallback=20),
+            sharding_workers=config.getint('Sharding', 'WORKERS', fallback=1),
+            sharding_batch_size=config.getint('Sharding', 'BATCH_SIZE', fallback=50),
+            browser_service=config.getboolean('Browser', 'SERVICE', fallback=False),
+            browser_cdp_endpoint=config.get('Browser', 'CDP_ENDPOINT', fallback='').strip() or None,
+            browser_pool_size=config.getint('Browser', 'POOL_SIZE', fallback=0),
+            browser_max_pages=config.getint('Browser', 'MAX_PAGES', fallback=500),
+            browser_max_memory_mb=config.getfloat('Browser', 'MAX_MEMORY_MB', fallback=0),
+            browser_headless=config.getboolean('Browser', 'HEADLESS', fallback=True),
+            replay_mode=replay_mode,
+            replay_fixtures_dir=config.get('Replay', 'FIXTURES_DIR', fallback='automation_framework/tests/fixtures')
+        )
+
 class ConfigHelper:
+    _shared: Dict[str, "ConfigHelper"] = {}
+    _shared_lock = threading.Lock()
+
     def __init__(self, config_path: str):
-        self.config = configparser.ConfigParser()
-        self.config.read(config_path)
+        self.config_path = config_path
+        self.logger = logging.getLogger(__name__)
+        self._listeners: List[Callable[["ConfigHelper"], None]] = []
+        self._mtime = None
+        self.reload()
+
+    @classmethod
+    def shared(cls, config: Union[str, "ConfigHelper"]) -> "ConfigHelper":
+        """
+        Return the process-wide helper for a config file so every component shares one parsed snapshot
+
+        Args:
+            config (Union[str, ConfigHelper]): Config file path, or an existing helper which is returned as is
+        """
+        if isinstance(config, ConfigHelper):
+            return config
+        key = os.path.abspath(config)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(config)
+            return cls._shared[key]
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+
+    def reload(self):
+        """
+        Re-parse the file and swap in a new snapshot. Readers holding the old snapshot are unaffected.
+        """
+        self._mtime = self._current_mtime()
+        self.config = configparser.ConfigParser(inline_comment_prefixes=('#',))
+        self.config.read(self.config_path)
+        # Option names are case-insensitive, but city names are data and keep the file's spelling
+        cities_config = configparser.ConfigParser(inline_comment_prefixes=('#',), interpolation=None)
+        cities_config.optionxform = str
+        cities_config.read(self.config_path)
+        self.snapshot = ConfigSnapshot.from_parser(self.config, cities_config)
+
+    def subscribe(self, listener: Callable[["ConfigHelper"], None]):
+        """
+        Register a callback invoked with this helper after every hot reload
+        """
+        self._listeners.append(listener)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload when the file's modification time changed since the last parse
+
+        Returns:
+            bool: True if a new snapshot was loaded
+        """
+        if self._current_mtime() == self._mtime:
+            return False
+        try:
+            self.reload()
+        except (configparser.Error, ValueError) as e:
+            self.logger.error(f"Ignoring invalid config change in {self.config_path}: {str(e)}")
+            return False
+        self.logger.info(f"Reloaded config from {self.config_path}")
+        for listener in self._listeners:
+            listener(self)
+        return True
+
+    async def watch(self, interval: float = 5.0):
+        """
+        Poll the file for changes until cancelled, reloading and notifying subscribers on change
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.reload_if_changed()
 
     def get_api_key(self) -> str:
         api_key = os.getenv('OPENWEATHER_API_KEY')
@@ -14,29 +233,177 @@ class ConfigHelper:
         return api_key
 
     def get_db_name(self) -> str:
-        return self.config.get('Database', 'DB_NAME')
+        if self.snapshot.db_name is None:
+            raise configparser.NoOptionError('DB_NAME', 'Database')
+        return self.snapshot.db_name
+
+    def get_db_writer_batch_size(self) -> int:
+        return self.snapshot.db_writer_batch_size
+
+    def get_db_writer_flush_interval(self) -> float:
+        return self.snapshot.db_writer_flush_interval
 
     def get_temperature_threshold(self) -> float:
-        return self.config.getfloat('Analysis', 'TEMPERATURE_THRESHOLD')
+        return self.snapshot.temperature_threshold
 
     def get_cities(self) -> List[Tuple[str, str]]:
-        cities = []
-        for city, country in self.config['Cities'].items():
-            if city != 'DEFAULT':
-                cities.append((city.strip(), country.strip()))
-        return cities
+        return list(self.snapshot.cities)
 
     def get_log_level(self) -> str:
-        return self.config.get('Logging', 'LOG_LEVEL')
+        return self.snapshot.log_level
 
     def get_log_file(self) -> str:
-        return self.config.get('Logging', 'LOG_FILE')
+        return self.snapshot.log_file
 
-    def get_country_codes(self) -> Dict[str, str]:
-        return {country.strip(): code.strip() for country, code in self.config['CountryCodes'].items()}
+    def get_country_codes(self) -> Mapping[str, str]:
+        return self.snapshot.country_codes
 
     def get_api_base_url(self) -> str:
-        return self.config.get('API', 'BASE_URL', fallback='https://api.openweathermap.org/data/2.5/weather')
+        return self.snapshot.api_base_url
+
+    def get_api_max_concurrency(self) -> int:
+        return self.snapshot.api_max_concurrency
+
+    def get_api_request_timeout(self) -> float:
+        return self.snapshot.api_request_timeout
+
+    def get_api_group_url(self) -> str:
+        return self.snapshot.api_group_url
+
+    def get_api_bulk_mode(self) -> bool:
+        return self.snapshot.api_bulk_mode
+
+    def get_api_bulk_chunk_size(self) -> int:
+        return self.snapshot.api_bulk_chunk_size
+
+    def get_scraper_concurrency(self) -> int:
+        return self.snapshot.scraper_concurrency
+
+    def get_scraper_requests_per_second(self) -> float:
+        return self.snapshot.scraper_requests_per_second
+
+    def get_scraper_burst(self) -> float:
+        return self.snapshot.scraper_burst
+
+    def get_scraper_lean_mode(self) -> bool:
+        return self.snapshot.scraper_lean_mode
+
+    def get_scraper_blocked_resource_types(self) -> List[str]:
+        return list(self.snapshot.scraper_blocked_resource_types)
+
+    def get_scraper_backend(self) -> str:
+        return self.snapshot.scraper_backend
+
+    def get_scraper_base_url(self) -> str:
+        return self.snapshot.scraper_base_url
+
+    def get_scraper_browser_fallback(self) -> bool:
+        return self.snapshot.scraper_browser_fallback
+
+    def get_cache_enabled(self) -> bool:
+        return self.snapshot.cache_enabled
+
+    def get_cache_path(self) -> str:
+        return self.snapshot.cache_path
+
+    def get_cache_ttl(self) -> float:
+        return self.snapshot.cache_ttl
+
+    def get_cache_max_entries(self) -> int:
+        return self.snapshot.cache_max_entries
+
+    def get_scheduler_default_interval(self) -> float:
+        return self.snapshot.scheduler_default_interval
+
+    def get_scheduler_api_calls_per_minute(self) -> float:
+        return self.snapshot.scheduler_api_calls_per_minute
+
+    def get_scheduler_scrapes_per_minute(self) -> float:
+        return self.snapshot.scheduler_scrapes_per_minute
+
+    def get_scheduler_workers(self) -> int:
+        return self.snapshot.scheduler_workers
+
+    def get_poll_intervals(self) -> Mapping[str, float]:
+        return self.snapshot.poll_intervals
+
+    def get_catalog_enabled(self) -> bool:
+        return self.snapshot.catalog_enabled
+
+    def get_catalog_path(self) -> str:
+        return self.snapshot.catalog_path
 
     def get_city_id(self, city: str) -> str:
-        return self.config.get('CityIDs', city) 
\ No newline at end of file
+        try:
+            return self.snapshot.city_ids[city.strip().lower()]
+        except KeyError:
+            raise configparser.NoOptionError(city, 'CityIDs') from None
+
+    def get_city_ids(self) -> Mapping[str, str]:
+        return self.snapshot.city_ids
+
+    def get_report_format(self) -> str:
+        return self.snapshot.report_format
+
+    def get_metrics_enabled(self) -> bool:
+        return self.snapshot.metrics_enabled
+
+    def get_metrics_textfile_path(self) -> str:
+        return self.snapshot.metrics_textfile_path
+
+    def get_resilience_retry_attempts(self) -> int:
+        return self.snapshot.resilience_retry_attempts
+
+    def get_resilience_retry_base_delay(self) -> float:
+        return self.snapshot.resilience_retry_base_delay
+
+    def get_resilience_retry_max_delay(self) -> float:
+        return self.snapshot.resilience_retry_max_delay
+
+    def get_resilience_attempt_timeout(self) -> Optional[float]:
+        return self.snapshot.resilience_attempt_timeout
+
+    def get_resilience_breaker_failure_threshold(self) -> int:
+        return self.snapshot.resilience_breaker_failure_threshold
+
+    def get_resilience_breaker_reset_timeout(self) -> float:
+        return self.snapshot.resilience_breaker_reset_timeout
+
+    def get_resilience_run_deadline(self) -> Optional[float]:
+        return self.snapshot.resilience_run_deadline
+
+    def get_resilience_hedge_enabled(self) -> bool:
+        return self.snapshot.resilience_hedge_enabled
+
+    def get_resilience_hedge_min_samples(self) -> int:
+        return self.snapshot.resilience_hedge_min_samples
+
+    def get_sharding_workers(self) -> int:
+        return self.snapshot.sharding_workers
+
+    def get_sharding_batch_size(self) -> int:
+        return self.snapshot.sharding_batch_size
+
+    def get_browser_service(self) -> bool:
+        return self.snapshot.browser_service
+
+    def get_browser_cdp_endpoint(self) -> Optional[str]:
+        return self.snapshot.browser_cdp_endpoint
+
+    def get_browser_pool_size(self) -> int:
+        return self.snapshot.browser_pool_size
+
+    def get_browser_max_pages(self) -> int:
+        return self.snapshot.browser_max_pages
+
+    def get_browser_max_memory_mb(self) -> float:
+        return self.snapshot.browser_max_memory_mb
+
+    def get_browser_headless(self) -> bool:
+        return self.snapshot.browser_headless
+
+    def get_replay_mode(self) -> str:
+        return self.snapshot.replay_mode
+
+    def get_replay_fixtures_dir(self) -> str:
+        return self.snapshot.replay_fixtures_dir
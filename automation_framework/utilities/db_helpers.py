@@ -1,11 +1,13 @@
 import sqlite3
 from datetime import datetime
 from .config_helpers import ConfigHelper
+from .metrics import MetricsRegistry
 import os
 
 class DatabaseHelper:
     def __init__(self, config_path):
-        config = ConfigHelper(config_path)
+        config = ConfigHelper.shared(config_path)
+        self.metrics = MetricsRegistry.from_config(config)
         db_name = config.get_db_name()
         
         db_dir = os.path.dirname(db_name)
@@ -15,10 +17,22 @@ class DatabaseHelper:
         sqlite3.register_adapter(datetime, lambda dt: dt.isoformat())
         
         self.conn = sqlite3.connect(db_name)
+        self.conn.execute('PRAGMA synchronous=NORMAL')
         self.create_tables()
 
     def create_tables(self):
+        self.conn.execute('PRAGMA journal_mode=WAL')
         with self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS observations (
+                city TEXT NOT NULL,
+                source TEXT NOT NULL,
+                observed_at TEXT NOT NULL,
+                temperature REAL,
+                feels_like REAL,
+                PRIMARY KEY (city, source, observed_at)
+            ) WITHOUT ROWID''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_observations_observed_at
+                ON observations (observed_at)''')
             self.conn.execute('''CREATE TABLE IF NOT EXISTS weather_data (
                 city TEXT PRIMARY KEY,
                 temperature_web REAL,
@@ -28,23 +42,164 @@ class DatabaseHelper:
                 avg_temperature REAL,
                 timestamp TEXT DEFAULT CURRENT_TIMESTAMP
             )''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_weather_data_timestamp
+                ON weather_data (timestamp)''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_weather_data_discrepancy
+                ON weather_data (ABS(temperature_web - temperature_api))''')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS discrepancy_summary (
+                city TEXT PRIMARY KEY,
+                samples INTEGER NOT NULL,
+                sum_difference REAL NOT NULL,
+                sum_abs_difference REAL NOT NULL,
+                sum_sq_difference REAL NOT NULL,
+                max_abs_difference REAL NOT NULL,
+                last_observed_at TEXT
+            )''')
 
     def store_weather_data(self, city, temperature, feels_like, source):
+        """
+        Append an observation to the history and update the city's row in the latest snapshot.
+        The snapshot keeps the other source's values, so one source missing a city never drops the other.
+        """
         timestamp = datetime.now()
         
         with self.conn:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO observations
+                (city, source, observed_at, temperature, feels_like)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (city, source, timestamp, temperature, feels_like))
             if source == "web":
                 self.conn.execute('''
-                    INSERT OR REPLACE INTO weather_data 
+                    INSERT INTO weather_data 
                     (city, temperature_web, feels_like_web, timestamp)
                     VALUES (?, ?, ?, ?)
+                    ON CONFLICT(city) DO UPDATE SET
+                        temperature_web = excluded.temperature_web,
+                        feels_like_web = excluded.feels_like_web,
+                        timestamp = excluded.timestamp
                 ''', (city, temperature, feels_like, timestamp))
             elif source == "api":
                 self.conn.execute('''
-                    UPDATE weather_data 
-                    SET temperature_api = ?, feels_like_api = ?, timestamp = ?
-                    WHERE city = ?
-                ''', (temperature, feels_like, timestamp, city))
+                    INSERT INTO weather_data 
+                    (city, temperature_api, feels_like_api, timestamp)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(city) DO UPDATE SET
+                        temperature_api = excluded.temperature_api,
+                        feels_like_api = excluded.feels_like_api,
+                        timestamp = excluded.timestamp
+                ''', (city, temperature, feels_like, timestamp))
+            self._update_discrepancy_summary(timestamp)
+
+    def store_observations(self, records, observed_at=None):
+        """
+        Ingest a whole result set in a single transaction
+        
+        Args:
+            records: Iterable of (city, source, temperature, feels_like) tuples
+            observed_at: Observation time shared by the batch, defaults to now
+            
+        Returns:
+            int: Number of records written
+        """
+        observed_at = observed_at or datetime.now()
+        rows = [(city, source, observed_at, temperature, feels_like)
+                for city, source, temperature, feels_like in records]
+        
+        with self.metrics.track("commit", "db"), self.conn:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO observations
+                (city, source, observed_at, temperature, feels_like)
+                VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            self.conn.executemany('''
+                INSERT INTO weather_data (city, temperature_web, feels_like_web, timestamp)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(city) DO UPDATE SET
+                    temperature_web = excluded.temperature_web,
+                    feels_like_web = excluded.feels_like_web,
+                    timestamp = excluded.timestamp
+            ''', ((city, temperature, feels_like, at) for city, source, at, temperature, feels_like in rows if source == "web"))
+            self.conn.executemany('''
+                INSERT INTO weather_data (city, temperature_api, feels_like_api, timestamp)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(city) DO UPDATE SET
+                    temperature_api = excluded.temperature_api,
+                    feels_like_api = excluded.feels_like_api,
+                    timestamp = excluded.timestamp
+            ''', ((city, temperature, feels_like, at) for city, source, at, temperature, feels_like in rows if source == "api"))
+            self._update_discrepancy_summary(observed_at)
+            # Only a pair the summary just folded is averaged; a lone new side clears the
+            # average rather than mixing with the other source's older value
+            self.conn.execute('''
+                UPDATE weather_data
+                SET avg_temperature = CASE
+                    WHEN (SELECT last_observed_at FROM discrepancy_summary s
+                          WHERE s.city = weather_data.city) = timestamp
+                    THEN (temperature_web + temperature_api) / 2.0
+                END
+                WHERE timestamp = ?
+            ''', (observed_at,))
+        self.metrics.inc("rows_written_total", len(rows), source="db")
+        return len(rows)
+
+    def _update_discrepancy_summary(self, observed_at):
+        """
+        Fold the pairs completed by a write into the materialized per-city discrepancy totals
+
+        A city's snapshot row counts as a new pair only when both of its sides were observed
+        after the last pair folded for that city, so with web and API arriving in separate
+        writes each web/API pair is folded once, when its second side lands.
+        """
+        self.conn.execute('''
+            INSERT INTO discrepancy_summary
+            SELECT city, 1, diff, ABS(diff), diff * diff, ABS(diff), timestamp
+            FROM (
+                SELECT w.city, w.temperature_web - w.temperature_api AS diff, w.timestamp
+                FROM weather_data w
+                LEFT JOIN discrepancy_summary s ON s.city = w.city
+                WHERE w.timestamp = ? AND w.temperature_web IS NOT NULL AND w.temperature_api IS NOT NULL
+                  AND (s.last_observed_at IS NULL OR (
+                      (SELECT MAX(observed_at) FROM observations
+                       WHERE city = w.city AND source = 'web') > s.last_observed_at
+                      AND (SELECT MAX(observed_at) FROM observations
+                           WHERE city = w.city AND source = 'api') > s.last_observed_at))
+            ) WHERE true
+            ON CONFLICT(city) DO UPDATE SET
+                samples = samples + 1,
+                sum_difference = sum_difference + excluded.sum_difference,
+                sum_abs_difference = sum_abs_difference + excluded.sum_abs_difference,
+                sum_sq_difference = sum_sq_difference + excluded.sum_sq_difference,
+                max_abs_difference = MAX(max_abs_difference, excluded.max_abs_difference),
+                last_observed_at = excluded.last_observed_at
+        ''', (observed_at,))
+
+    def store_batch(self, *batches, observed_at=None):
+        """
+        Ingest ObservationBatch columns in a single transaction, without building intermediate dicts
+        
+        Args:
+            batches: ObservationBatch instances, e.g. one per source
+            observed_at: Observation time shared by the batches, defaults to now
+            
+        Returns:
+            int: Number of records written
+        """
+        return self.store_observations((row for batch in batches for row in batch.rows()), observed_at)
+
+    def store_weather_results(self, web_data, api_data, observed_at=None):
+        """
+        Bulk counterpart of calling store_weather_data for every city of both sources
+        followed by store_average_temperature
+        
+        Args:
+            web_data (Dict[str, Tuple[float, float]]): Web scraped temperature data
+            api_data (Dict[str, Tuple[float, float]]): API temperature data
+            observed_at: Observation time shared by the batch, defaults to now
+        """
+        records = [(city, "web", temp, feels_like) for city, (temp, feels_like) in web_data.items()]
+        records += [(city, "api", temp, feels_like) for city, (temp, feels_like) in api_data.items()]
+        return self.store_observations(records, observed_at)
 
     def store_average_temperature(self, city, avg_temperature):
         with self.conn:
@@ -66,6 +221,73 @@ class DatabaseHelper:
             cursor = self.conn.execute('SELECT * FROM weather_data')
         return list(cursor.fetchall())  # Convert cursor to list
 
+    def get_latest_observations(self, source=None):
+        """
+        Get the most recent observation for every city, per source
+        Returns a list of (city, source, observed_at, temperature, feels_like) tuples
+        """
+        query = '''
+            SELECT o.city, o.source, o.observed_at, o.temperature, o.feels_like
+            FROM observations o
+            JOIN (
+                SELECT city, source, MAX(observed_at) AS observed_at
+                FROM observations
+                {where}
+                GROUP BY city, source
+            ) latest USING (city, source, observed_at)
+            ORDER BY o.city, o.source
+        '''
+        if source:
+            cursor = self.conn.execute(query.format(where='WHERE source = ?'), (source,))
+        else:
+            cursor = self.conn.execute(query.format(where=''))
+        return list(cursor.fetchall())
+
+    def get_observation_window(self, city, start, end=None, source=None):
+        """
+        Get all observations for a city between start and end (inclusive), oldest first
+        Returns a list of (source, observed_at, temperature, feels_like) tuples
+        """
+        end = end or datetime.now()
+        query = '''
+            SELECT source, observed_at, temperature, feels_like
+            FROM observations
+            WHERE city = ? AND observed_at BETWEEN ? AND ?
+        '''
+        params = [city, start, end]
+        if source:
+            query += ' AND source = ?'
+            params.append(source)
+        cursor = self.conn.execute(query + ' ORDER BY observed_at', params)
+        return list(cursor.fetchall())
+
+    def iter_comparisons(self, since=None, with_timestamp=False):
+        """
+        Stream (city, temperature_web, feels_like_web, temperature_api, feels_like_api) rows
+        for every city that has both sources, without loading them all into memory
+        
+        Args:
+            since: Only return rows updated after this time
+            with_timestamp (bool): Append the row's update timestamp to each tuple
+        """
+        query = '''
+            SELECT city, temperature_web, feels_like_web, temperature_api, feels_like_api{timestamp}
+            FROM weather_data
+            WHERE temperature_web IS NOT NULL AND temperature_api IS NOT NULL
+        '''.format(timestamp=', timestamp' if with_timestamp else '')
+        if since is None:
+            return self.conn.execute(query)
+        return self.conn.execute(query + ' AND timestamp > ?', (since,))
+
+    def get_comparison_cities(self):
+        """
+        Names of the cities that have both sources, i.e. the cities iter_comparisons() returns without since
+        """
+        return {city for (city,) in self.conn.execute('''
+            SELECT city FROM weather_data
+            WHERE temperature_web IS NOT NULL AND temperature_api IS NOT NULL
+        ''')}
+
     def get_average_temperatures(self):
         """
         Get average temperatures for all cities
@@ -99,6 +321,24 @@ class DatabaseHelper:
         ''', (threshold,))
         return list(cursor.fetchall())  # Convert cursor to list
 
+    def get_discrepancy_summary(self):
+        """
+        Read the materialized per-city discrepancy totals maintained by store_observations
+        Returns a list of (city, samples, bias, mean_abs_difference, std_difference, max_abs_difference, last_observed_at)
+        """
+        cursor = self.conn.execute('''
+            SELECT city,
+                   samples,
+                   sum_difference / samples,
+                   sum_abs_difference / samples,
+                   SQRT(MAX(sum_sq_difference / samples - (sum_difference / samples) * (sum_difference / samples), 0)),
+                   max_abs_difference,
+                   last_observed_at
+            FROM discrepancy_summary
+            ORDER BY city
+        ''')
+        return list(cursor.fetchall())
+
     def get_statistics(self):
         """
         Get summary statistics for temperature discrepancies
@@ -112,6 +352,52 @@ class DatabaseHelper:
         ''')
         return cursor.fetchone()
 
+    def migrate_city_keys(self, cities):
+        """
+        One-off rewrite of city keys stored before [Cities] kept its spelling, e.g.
+        "new york, United States", to the canonical "New York, United States"
+
+        Keys that differ from a configured city only by case and spacing are renamed in
+        observations, weather_data and discrepancy_summary. Where both spellings exist,
+        the canonical snapshot row is kept and the two summaries are added together.
+
+        Args:
+            cities: (city, country) pairs in their canonical spelling, usually the [Cities] section
+
+        Returns:
+            int: Number of keys renamed
+        """
+        canonical = {}
+        for city, country in cities:
+            key = f"{city.strip()}, {country.strip()}"
+            canonical.setdefault(" ".join(key.casefold().split()), key)
+        stored = {city for table in ("observations", "weather_data", "discrepancy_summary")
+                  for (city,) in self.conn.execute(f"SELECT DISTINCT city FROM {table}")}
+        renames = [(canonical[normalized], city) for city in sorted(stored)
+                   for normalized in [" ".join(city.casefold().split())]
+                   if normalized in canonical and canonical[normalized] != city]
+
+        with self.conn:
+            for new, old in renames:
+                for table in ("observations", "weather_data"):
+                    self.conn.execute(f"UPDATE OR IGNORE {table} SET city = ? WHERE city = ?", (new, old))
+                    self.conn.execute(f"DELETE FROM {table} WHERE city = ?", (old,))
+                self.conn.execute('''
+                    INSERT INTO discrepancy_summary
+                    SELECT ?, samples, sum_difference, sum_abs_difference, sum_sq_difference,
+                           max_abs_difference, last_observed_at
+                    FROM discrepancy_summary WHERE city = ?
+                    ON CONFLICT(city) DO UPDATE SET
+                        samples = samples + excluded.samples,
+                        sum_difference = sum_difference + excluded.sum_difference,
+                        sum_abs_difference = sum_abs_difference + excluded.sum_abs_difference,
+                        sum_sq_difference = sum_sq_difference + excluded.sum_sq_difference,
+                        max_abs_difference = MAX(max_abs_difference, excluded.max_abs_difference),
+                        last_observed_at = MAX(last_observed_at, excluded.last_observed_at)
+                ''', (new, old))
+                self.conn.execute("DELETE FROM discrepancy_summary WHERE city = ?", (old,))
+        return len(renames)
+
     def close(self):
         self.conn.close()
 
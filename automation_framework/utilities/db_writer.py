@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from .config_helpers import ConfigHelper
+from .db_helpers import DatabaseHelper
+from .observations import ObservationBatch
+
+class _Barrier:
+    def __init__(self, loop: asyncio.AbstractEventLoop, stop: bool = False):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.stop = stop
+
+    def _resolve(self, error: Optional[BaseException]):
+        if self.future.done():
+            return
+        if error:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(None)
+
+    def release(self, error: Optional[BaseException] = None):
+        self.loop.call_soon_threadsafe(self._resolve, error)
+
+class AsyncDatabaseWriter:
+    def __init__(self, config_path: Union[str, ConfigHelper], batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        """
+        Writes observations from a dedicated thread so commits never block the event loop
+        
+        Observations submitted from the pipeline are queued and committed in
+        batches of up to batch_size, or every flush_interval seconds, whichever
+        comes first. flush() and close() act as barriers for everything
+        submitted before them.
+        
+        Args:
+            config_path (Union[str, ConfigHelper]): Config file path or shared helper, used to open the database inside the writer thread
+            batch_size (Optional[int]): Maximum records per commit, defaults to [Database] WRITER_BATCH_SIZE
+            flush_interval (Optional[float]): Maximum seconds a record waits before commit, defaults to [Database] WRITER_FLUSH_INTERVAL
+        """
+        self.config = ConfigHelper.shared(config_path)
+        self.batch_size = batch_size or self.config.get_db_writer_batch_size()
+        self.flush_interval = flush_interval or self.config.get_db_writer_flush_interval()
+        self.logger = logging.getLogger(__name__)
+        self.queue: "queue.Queue" = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.records_written = 0
+        self.commits = 0
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self.thread.start()
+
+    def submit(self, city: str, source: str, temperature: float, feels_like: float):
+        """
+        Queue one observation without blocking
+        """
+        self.queue.put((city, source, temperature, feels_like))
+
+    def submit_batch(self, batch: ObservationBatch):
+        """
+        Queue a whole batch as one item; its rows are expanded in the writer thread
+        
+        Raises:
+            ValueError: If the batch has no registry, so the caller learns of it rather than the writer thread
+        """
+        if batch.registry is None:
+            raise ValueError(f"{batch.source} batch has no CityRegistry to resolve its city IDs")
+        self.queue.put(batch)
+
+    def submit_results(self, web_data: Dict[str, Tuple[float, float]], api_data: Dict[str, Tuple[float, float]]):
+        for city, (temp, feels_like) in web_data.items():
+            self.submit(city, "web", temp, feels_like)
+        for city, (temp, feels_like) in api_data.items():
+            self.submit(city, "api", temp, feels_like)
+
+    async def flush(self):
+        """
+        Wait until every observation submitted so far has been committed
+        """
+        await self._barrier(stop=False)
+
+    async def close(self):
+        """
+        Commit everything still queued and stop the writer thread
+        """
+        if self.thread is None:
+            return
+        try:
+            await self._barrier(stop=True)
+        finally:
+            await asyncio.get_running_loop().run_in_executor(None, self.thread.join)
+            self.thread = None
+
+    async def _barrier(self, stop: bool):
+        self.start()
+        barrier = _Barrier(asyncio.get_running_loop(), stop)
+        self.queue.put(barrier)
+        await barrier.future
+
+    def _run(self):
+        try:
+            db = DatabaseHelper(self.config)
+        except Exception as e:
+            self.logger.error(f"Failed to open the database: {str(e)}")
+            self._fail_barriers(e)
+            return
+        pending: List[Tuple[str, str, float, float]] = []
+        deadline = None
+        error: Optional[BaseException] = None
+        item = None
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic()) if pending else None
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, _Barrier):
+                    error = self._commit(db, pending) or error
+                    item.release(error)
+                    error = None
+                    if item.stop:
+                        break
+                    continue
+
+                if item is not None:
+                    try:
+                        rows = self._rows(item)
+                    except Exception as e:
+                        # Drop only the malformed item; the next barrier reports it
+                        self.logger.error(f"Dropping malformed writer item {item!r}: {str(e)}")
+                        error = error or e
+                        rows = []
+                    if rows and not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    pending.extend(rows)
+
+                if len(pending) >= self.batch_size or (pending and time.monotonic() >= deadline):
+                    error = self._commit(db, pending) or error
+        except Exception as e:
+            self.logger.error(f"Database writer stopped: {str(e)}")
+            # The barrier being handled is released too; releasing one twice is harmless
+            if isinstance(item, _Barrier):
+                item.release(e)
+            if not (isinstance(item, _Barrier) and item.stop):
+                self._fail_barriers(e)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _rows(item) -> List[Tuple[str, str, float, float]]:
+        if isinstance(item, ObservationBatch):
+            return list(item.rows())
+        if not isinstance(item, tuple) or len(item) != 4:
+            raise ValueError("expected a (city, source, temperature, feels_like) tuple or an ObservationBatch")
+        return [item]
+
+    def _fail_barriers(self, error: BaseException):
+        """
+        Without a working database, drop queued observations and fail every barrier until close()
+        """
+        while True:
+            item = self.queue.get()
+            if isinstance(item, _Barrier):
+                item.release(error)
+                if item.stop:
+                    break
+
+    def _commit(self, db: DatabaseHelper, pending: list) -> Optional[BaseException]:
+        if not pending:
+            return None
+        try:
+            self.records_written += db.store_observations(pending)
+            self.commits += 1
+            return None
+        except Exception as e:
+            self.logger.error(f"Failed to write {len(pending)} observations: {str(e)}")
+            return e
+        finally:
+            pending.clear()
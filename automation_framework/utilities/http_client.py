@@ -0,0 +1,25 @@
+import aiohttp
+
+
+def create_session(max_connections: int = 100, timeout: float = 10.0,
+                   keepalive_timeout: float = 30.0) -> aiohttp.ClientSession:
+    """
+    Create a pooled async HTTP session with keep-alive connections
+
+    Args:
+        max_connections (int): Maximum number of simultaneous connections in the pool
+        timeout (float): Total per-request timeout in seconds
+        keepalive_timeout (float): How long idle connections are kept open for reuse
+
+    Returns:
+        aiohttp.ClientSession: Session that must be closed by the caller
+    """
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=300
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout)
+    )
@@ -0,0 +1,210 @@
+import heapq
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .report_generator import default_test_status
+
+Pair = Tuple[Tuple[float, float], Tuple[float, float]]
+
+class _LazyExtremes:
+    """
+    Min and max over a changing set of keyed values. Superseded heap entries are
+    skipped when they reach the top, so updates cost O(log n) instead of a rescan.
+    """
+    def __init__(self):
+        self.values: Dict[str, float] = {}
+        self.min_heap: List[Tuple[float, str]] = []
+        self.max_heap: List[Tuple[float, str]] = []
+        self.total = 0.0
+
+    def set(self, key: str, value: float):
+        self.discard(key)
+        self.values[key] = value
+        self.total += value
+        heapq.heappush(self.min_heap, (value, key))
+        heapq.heappush(self.max_heap, (-value, key))
+        if len(self.min_heap) > 2 * len(self.values) + 64:
+            self.min_heap = [(v, k) for k, v in self.values.items()]
+            self.max_heap = [(-v, k) for k, v in self.values.items()]
+            heapq.heapify(self.min_heap)
+            heapq.heapify(self.max_heap)
+
+    def discard(self, key: str):
+        if key in self.values:
+            self.total -= self.values.pop(key)
+
+    def _top(self, heap: List[Tuple[float, str]], sign: int) -> Optional[Tuple[str, float]]:
+        while heap:
+            value, key = heap[0]
+            if self.values.get(key) == sign * value:
+                return key, sign * value
+            heapq.heappop(heap)
+        return None
+
+    def min(self) -> Optional[Tuple[str, float]]:
+        return self._top(self.min_heap, 1)
+
+    def max(self) -> Optional[Tuple[str, float]]:
+        return self._top(self.max_heap, -1)
+
+    def as_dict(self) -> Dict[str, float]:
+        if not self.values:
+            return {"mean_difference": 0, "max_difference": 0, "min_difference": 0}
+        return {
+            "mean_difference": self.total / len(self.values),
+            "max_difference": self.max()[1],
+            "min_difference": self.min()[1]
+        }
+
+class IncrementalReportGenerator:
+    def __init__(self, reports_dir: str = "automation_framework/reports"):
+        """
+        Keeps report aggregates between runs and updates them only for cities that changed
+        
+        Statistics, the highest-temperature city and the discrepancy set are
+        maintained incrementally, so a refresh costs O(changed cities). Either a
+        full snapshot in the regular report layout or a delta document listing
+        only what changed since the previous emit can be written.
+        
+        Args:
+            reports_dir (str): Directory reports are written to
+        """
+        self.reports_dir = reports_dir
+        os.makedirs(reports_dir, exist_ok=True)
+        self.pairs: Dict[str, Pair] = {}
+        self.discrepancies: Dict[str, Dict] = {}
+        self.temperature_diffs = _LazyExtremes()
+        self.feels_like_diffs = _LazyExtremes()
+        self.avg_temperatures = _LazyExtremes()
+        self.changed: Set[str] = set()
+        self.removed: Set[str] = set()
+        self.version = 0
+        self.last_observed_at: Optional[str] = None
+
+    def update(self, comparisons: Iterable[Tuple[str, Tuple[float, float], Tuple[float, float]]]) -> int:
+        """
+        Apply new (city, (web_temp, web_feels), (api_temp, api_feels)) rows, ignoring ones that did not change
+        
+        Returns:
+            int: Number of cities whose values changed
+        """
+        changed = 0
+        for city, web, api in comparisons:
+            web, api = tuple(web), tuple(api)
+            if self.pairs.get(city) == (web, api):
+                continue
+            changed += 1
+            self.pairs[city] = (web, api)
+            self.removed.discard(city)
+            self.changed.add(city)
+            self.avg_temperatures.set(city, (web[0] + api[0]) / 2)
+
+            temp_diff = abs(web[0] - api[0])
+            feels_diff = abs(web[1] - api[1])
+            if temp_diff > 0 or feels_diff > 0:
+                self.discrepancies[city] = {
+                    "city": city,
+                    "web_temperature": web[0],
+                    "api_temperature": api[0],
+                    "temperature_difference": temp_diff,
+                    "web_feels_like": web[1],
+                    "api_feels_like": api[1],
+                    "feels_like_difference": feels_diff
+                }
+                self.temperature_diffs.set(city, temp_diff)
+                self.feels_like_diffs.set(city, feels_diff)
+            else:
+                self._drop_discrepancy(city)
+        return changed
+
+    def remove(self, city: str):
+        if self.pairs.pop(city, None) is None:
+            return
+        self.avg_temperatures.discard(city)
+        self._drop_discrepancy(city)
+        self.changed.discard(city)
+        self.removed.add(city)
+
+    def _drop_discrepancy(self, city: str):
+        self.discrepancies.pop(city, None)
+        self.temperature_diffs.discard(city)
+        self.feels_like_diffs.discard(city)
+
+    def refresh_from_db(self, db) -> int:
+        """
+        Pull only the rows written since the previous refresh from the database snapshot,
+        and drop cities that are no longer in it
+        
+        Departures are found by comparing the snapshot's city names with the tracked
+        ones; only the names are read, never the unchanged rows.
+        
+        Returns:
+            int: Number of cities whose values changed or that left the snapshot
+        """
+        changed = 0
+        for city, web_temp, web_feels, api_temp, api_feels, observed_at in db.iter_comparisons(
+                since=self.last_observed_at, with_timestamp=True):
+            changed += self.update([(city, (web_temp, web_feels), (api_temp, api_feels))])
+            if self.last_observed_at is None or observed_at > self.last_observed_at:
+                self.last_observed_at = observed_at
+        departed = self.pairs.keys() - db.get_comparison_cities()
+        for city in sorted(departed):
+            self.remove(city)
+        changed += len(departed)
+        return changed
+
+    def _summary(self, test_status: Optional[Dict]) -> Dict:
+        highest = self.avg_temperatures.max()
+        return {
+            "statistics": {
+                "temperature": self.temperature_diffs.as_dict(),
+                "feels_like": self.feels_like_diffs.as_dict()
+            },
+            "test_status": test_status or default_test_status(),
+            "highest_temperature": {
+                "city": highest[0] if highest else None,
+                "temperature": highest[1] if highest else None
+            }
+        }
+
+    def snapshot(self, test_status: Optional[Dict] = None) -> Dict:
+        """
+        Full report in the same layout as ReportGenerator.generate_report
+        """
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "discrepancies": list(self.discrepancies.values()),
+            **self._summary(test_status)
+        }
+
+    def delta(self, test_status: Optional[Dict] = None) -> Dict:
+        """
+        Changes since the previous snapshot or delta: updated discrepancies, cities whose
+        discrepancy disappeared or who left the report, and the current aggregates
+        """
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "base_version": self.version,
+            "version": self.version + 1,
+            "changed": [self.discrepancies[city] for city in sorted(self.changed) if city in self.discrepancies],
+            "resolved": sorted(city for city in self.changed if city not in self.discrepancies),
+            "removed": sorted(self.removed),
+            **self._summary(test_status)
+        }
+
+    def _write(self, prefix: str, document: Dict) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        report_path = os.path.join(self.reports_dir, f"{prefix}_{timestamp}_v{self.version + 1}.json")
+        with open(report_path, 'w') as f:
+            json.dump(document, f, indent=2)
+        self.version += 1
+        self.changed.clear()
+        self.removed.clear()
+        return report_path
+
+    def write_snapshot(self, test_status: Optional[Dict] = None) -> str:
+        return self._write("weather_report", self.snapshot(test_status))
+
+    def write_delta(self, test_status: Optional[Dict] = None) -> str:
+        return self._write("weather_delta", self.delta(test_status))
@@ -0,0 +1,309 @@
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+from .config_helpers import ConfigHelper
+
+# Upper bounds in seconds; covers cache-speed lookups up to slow page loads
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+OUTCOMES = ("success", "failure", "timeout", "cancelled")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram with a running sum, as exported by OpenMetrics
+    """
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+class _Timer:
+    __slots__ = ("registry", "stage", "source", "outcome", "started")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str, source: str):
+        self.registry = registry
+        self.stage = stage
+        self.source = source
+        self.outcome = "success"
+        self.started = 0.0
+
+    def __enter__(self):
+        self.registry.gauge_add("in_flight", 1, stage=self.stage, source=self.source)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.started
+        if exc_type is not None:
+            if issubclass(exc_type, asyncio.CancelledError):
+                self.outcome = "cancelled"
+            elif issubclass(exc_type, asyncio.TimeoutError) or exc_type.__name__ == "TimeoutError":
+                # Playwright's TimeoutError does not derive from the builtin one
+                self.outcome = "timeout"
+            else:
+                self.outcome = "failure"
+        self.registry.gauge_add("in_flight", -1, stage=self.stage, source=self.source)
+        self.registry.observe("duration_seconds", elapsed, stage=self.stage, source=self.source)
+        self.registry.inc("operations_total", stage=self.stage, source=self.source, outcome=self.outcome)
+
+class MetricsRegistry:
+    _shared: Dict[str, "MetricsRegistry"] = {}
+    _shared_lock = threading.Lock()
+
+    enabled = True
+
+    def __init__(self, textfile_path: Optional[str] = None, prefix: str = "weather_pipeline"):
+        """
+        In-process counters, gauges and latency histograms labelled by stage and source
+
+        Helpers wrap each unit of work in track(), which maintains the in-flight
+        gauge, the duration histogram and the success/failure/timeout counter.
+        Updates are plain dict operations guarded by one lock, so the database
+        writer thread can record alongside the event loop.
+
+        Args:
+            textfile_path (Optional[str]): Where export() writes the OpenMetrics textfile
+            prefix (str): Prefix of every exported metric name
+        """
+        self.textfile_path = textfile_path
+        self.prefix = prefix
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper) -> "MetricsRegistry":
+        """
+        Return the registry shared by every helper built from the same config file,
+        or the no-op registry when [Metrics] ENABLED is false
+        """
+        if not config.get_metrics_enabled():
+            return NULL_METRICS
+        key = os.path.abspath(config.config_path)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(config.get_metrics_textfile_path())
+            return cls._shared[key]
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        key = (name, _labels(**labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def gauge_add(self, name: str, delta: float, **labels: str):
+        key = (name, _labels(**labels))
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + delta
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, _labels(**labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def track(self, stage: str, source: str) -> _Timer:
+        """
+        Time one operation. Set ``outcome`` on the returned timer to record a handled failure or timeout.
+
+        Args:
+            stage (str): Pipeline stage, e.g. fetch, commit or write
+            source (str): What the stage talks to, e.g. api, web_http or db
+        """
+        return _Timer(self, stage, source)
+
+    def cache_lookup(self, source: str, hit: bool):
+        self.inc("cache_requests_total", source=source, result="hit" if hit else "miss")
+
+    def snapshot(self) -> Dict:
+        """
+        Picklable copy of every metric, e.g. for a worker process to hand to its coordinator
+        """
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": {key: (histogram.buckets, list(histogram.counts), histogram.count, histogram.sum)
+                               for key, histogram in self.histograms.items()}
+            }
+
+    def merge(self, snapshot: Dict):
+        """
+        Add another registry's snapshot() to this one
+        """
+        with self._lock:
+            for key, value in snapshot["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, value in snapshot["gauges"].items():
+                self.gauges[key] = self.gauges.get(key, 0) + value
+            for key, (buckets, counts, count, total) in snapshot["histograms"].items():
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(buckets)
+                histogram.counts = [mine + theirs for mine, theirs in zip(histogram.counts, counts)]
+                histogram.count += count
+                histogram.sum += total
+
+    def summary(self) -> Dict:
+        """
+        Compact per stage/source view embedded in the JSON report
+        """
+        with self._lock:
+            stages: Dict[str, Dict] = {}
+            for (name, labels), histogram in self.histograms.items():
+                if name != "duration_seconds":
+                    continue
+                label_map = dict(labels)
+                entry = stages.setdefault(f"{label_map['stage']}.{label_map['source']}", {})
+                entry.update({
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.sum / histogram.count * 1000, 3) if histogram.count else None,
+                    "p50_ms": _bound_ms(histogram.quantile(0.5)),
+                    "p95_ms": _bound_ms(histogram.quantile(0.95))
+                })
+            for (name, labels), value in self.counters.items():
+                label_map = dict(labels)
+                if name == "operations_total":
+                    entry = stages.setdefault(f"{label_map['stage']}.{label_map['source']}", {})
+                    entry[label_map["outcome"]] = int(value)
+            cache: Dict[str, Dict[str, int]] = {}
+            for (name, labels), value in self.counters.items():
+                if name == "cache_requests_total":
+                    label_map = dict(labels)
+                    cache.setdefault(label_map["source"], {"hit": 0, "miss": 0})[label_map["result"]] = int(value)
+        return {"stages": dict(sorted(stages.items())), "cache": dict(sorted(cache.items()))}
+
+    def render(self) -> str:
+        """
+        Render every metric in the OpenMetrics text exposition format
+        """
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    family = f"{self.prefix}_{name}"
+                    if kind == "counter":
+                        family = family[:-len("_total")] if family.endswith("_total") else family
+                    lines.append(f"# TYPE {family} {kind}")
+                    for (metric, labels), value in sorted(metrics.items()):
+                        if metric == name:
+                            sample = f"{family}_total" if kind == "counter" else family
+                            lines.append(f"{sample}{_format_labels(labels)} {value:g}")
+            for name in sorted({name for name, _ in self.histograms}):
+                family = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {family} histogram")
+                lines.append(f"# UNIT {family} seconds")
+                for (metric, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{family}_bucket{_format_labels(labels, le=f'{bound:g}')} {cumulative}")
+                    lines.append(f"{family}_bucket{_format_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"{family}_count{_format_labels(labels)} {histogram.count}")
+                    lines.append(f"{family}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Atomically write the OpenMetrics textfile, e.g. for the node_exporter textfile collector
+
+        Returns:
+            Optional[str]: Path written, or None when no path is configured
+        """
+        path = path or self.textfile_path
+        if not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as f:
+            f.write(self.render())
+        os.replace(temporary, path)
+        return path
+
+def _bound_ms(seconds: Optional[float]) -> Optional[float]:
+    if seconds is None or seconds == float("inf"):
+        return seconds
+    return round(seconds * 1000, 3)
+
+class _NullTimer:
+    __slots__ = ("outcome",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+class NullMetricsRegistry(MetricsRegistry):
+    """
+    Registry used when metrics are disabled; every call is a no-op
+    """
+    enabled = False
+
+    def __init__(self):
+        super().__init__()
+        self._timer = _NullTimer()
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        pass
+
+    def gauge_add(self, name: str, delta: float, **labels: str):
+        pass
+
+    def observe(self, name: str, value: float, **labels: str):
+        pass
+
+    def track(self, stage: str, source: str) -> _NullTimer:
+        return self._timer
+
+    def cache_lookup(self, source: str, hit: bool):
+        pass
+
+    def merge(self, snapshot: Dict):
+        pass
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        return None
+
+NULL_METRICS = NullMetricsRegistry()
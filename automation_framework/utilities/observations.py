@@ -0,0 +1,160 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+class CityRegistry:
+    def __init__(self, cities: Iterable[Tuple[str, str]] = ()):
+        """
+        Dense integer IDs for (city, country) pairs, with one canonical spelling per city
+
+        IDs are assigned in insertion order, so registries built from the same city
+        list agree across processes. Lookups ignore case and surrounding whitespace;
+        the first spelling added is the one every stage stores and reports. City keys
+        ("City, Country") are built once here instead of by every stage.
+
+        Args:
+            cities (Iterable[Tuple[str, str]]): Initial (city, country) pairs, usually the [Cities] section
+        """
+        self.cities: List[Tuple[str, str]] = []
+        self.keys: List[str] = []
+        self._ids: Dict[Tuple[str, str], int] = {}
+        for city, country in cities:
+            self.add(city, country)
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    @staticmethod
+    def _normalize(city: str, country: str) -> Tuple[str, str]:
+        return city.strip().casefold(), country.strip().casefold()
+
+    def add(self, city: str, country: str) -> int:
+        """
+        Return the ID of a city, registering it first if it is new
+        """
+        normalized = self._normalize(city, country)
+        city_id = self._ids.get(normalized)
+        if city_id is None:
+            city_id = self._ids[normalized] = len(self.cities)
+            city, country = city.strip(), country.strip()
+            self.cities.append((city, country))
+            self.keys.append(f"{city}, {country}")
+        return city_id
+
+    def id_of(self, city: str, country: str) -> Optional[int]:
+        return self._ids.get(self._normalize(city, country))
+
+    def key(self, city_id: int) -> str:
+        return self.keys[city_id]
+
+    def city(self, city_id: int) -> Tuple[str, str]:
+        return self.cities[city_id]
+
+class Observation:
+    """
+    One source's reading for one city
+    """
+    __slots__ = ("city_id", "source", "temperature", "feels_like")
+
+    def __init__(self, city_id: int, source: str, temperature: float, feels_like: float):
+        self.city_id = city_id
+        self.source = source
+        self.temperature = temperature
+        self.feels_like = feels_like
+
+    @property
+    def data(self) -> Tuple[float, float]:
+        return self.temperature, self.feels_like
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Observation):
+            return NotImplemented
+        return (self.city_id, self.source, self.temperature, self.feels_like) == \
+               (other.city_id, other.source, other.temperature, other.feels_like)
+
+    def __repr__(self) -> str:
+        return f"Observation({self.city_id}, {self.source!r}, {self.temperature}, {self.feels_like})"
+
+class ObservationBatch:
+    __slots__ = ("source", "registry", "city_ids", "temperatures", "feels_like")
+
+    def __init__(self, source: str, registry: Optional[CityRegistry] = None):
+        """
+        Column-backed observations of one source: a city ID, temperature and feels-like
+        array instead of a dict of tuples, at 20 bytes per city
+
+        The registry is not pickled, so batches travel between processes as three
+        flat arrays; the receiver attaches its own registry built from the same city list.
+
+        Args:
+            source (str): web or api
+            registry (Optional[CityRegistry]): Registry the city IDs refer to
+        """
+        self.source = source
+        self.registry = registry
+        self.city_ids = array("i")
+        self.temperatures = array("d")
+        self.feels_like = array("d")
+
+    def __len__(self) -> int:
+        return len(self.city_ids)
+
+    def __iter__(self) -> Iterator[Observation]:
+        source = self.source
+        for city_id, temperature, feels_like in zip(self.city_ids, self.temperatures, self.feels_like):
+            yield Observation(city_id, source, temperature, feels_like)
+
+    def __getstate__(self):
+        return self.source, self.city_ids, self.temperatures, self.feels_like
+
+    def __setstate__(self, state):
+        self.source, self.city_ids, self.temperatures, self.feels_like = state
+        self.registry = None
+
+    def append(self, city_id: int, temperature: float, feels_like: float):
+        self.city_ids.append(city_id)
+        self.temperatures.append(temperature)
+        self.feels_like.append(feels_like)
+
+    def add(self, observation: Observation):
+        self.append(observation.city_id, observation.temperature, observation.feels_like)
+
+    def clear(self):
+        del self.city_ids[:], self.temperatures[:], self.feels_like[:]
+
+    def rows(self) -> Iterator[Tuple[str, str, float, float]]:
+        """
+        (city key, source, temperature, feels_like) records as taken by DatabaseHelper.store_observations
+        
+        Raises:
+            ValueError: If the batch has no registry, e.g. it was unpickled and none was attached
+        """
+        if self.registry is None:
+            raise ValueError(f"{self.source} batch has no CityRegistry to resolve its city IDs")
+        keys = self.registry.keys
+        source = self.source
+        for city_id, temperature, feels_like in zip(self.city_ids, self.temperatures, self.feels_like):
+            yield keys[city_id], source, temperature, feels_like
+
+    def to_dict(self) -> Dict[str, Tuple[float, float]]:
+        """
+        The batch in the older city key to (temperature, feels_like) form
+        """
+        return {key: (temperature, feels_like) for key, _, temperature, feels_like in self.rows()}
+
+def join(web: ObservationBatch, api: ObservationBatch) -> Iterator[Tuple[int, Tuple[float, float], Tuple[float, float]]]:
+    """
+    Pair the cities present in both batches, in web order
+
+    The API side is indexed by a dense array over city IDs rather than a dict of keys.
+
+    Yields:
+        Tuple[int, Tuple[float, float], Tuple[float, float]]: City ID, web data and API data
+    """
+    positions = array("i", [-1]) * (max(max(web.city_ids, default=-1), max(api.city_ids, default=-1)) + 1)
+    for position, city_id in enumerate(api.city_ids):
+        positions[city_id] = position
+    for position, city_id in enumerate(web.city_ids):
+        api_position = positions[city_id]
+        if api_position >= 0:
+            yield (city_id, (web.temperatures[position], web.feels_like[position]),
+                   (api.temperatures[api_position], api.feels_like[api_position]))
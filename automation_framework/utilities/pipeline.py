@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from contextlib import ExitStack
+from typing import Awaitable, Dict, List, Optional, Tuple
+from .api_helpers import ApiHelper
+from .browser_pool import BrowserService
+from .config_helpers import ConfigHelper
+from .db_writer import AsyncDatabaseWriter
+from .observations import CityRegistry, Observation, ObservationBatch
+from .report_generator import ReportGenerator
+from .web_scraper import WebScraper
+
+# Marks the end of a producer's stream on the observation queue
+_DONE = object()
+
+class WeatherPipeline:
+    def __init__(self, scraper: WebScraper, api: ApiHelper, writer: AsyncDatabaseWriter,
+                 report_generator: ReportGenerator, threshold: float = 2.0, queue_size: int = 1000):
+        """
+        Streaming orchestrator linking both sources, the database writer and the report
+        
+        The scraper and the API fetcher push observations onto a bounded queue as
+        they arrive. The joiner hands each one to the database writer and, as soon
+        as a city has both sources, compares them and passes the pair on to the
+        report builder. Observations are slotted records keyed by the run's
+        CityRegistry ID, and only cities still waiting for their second source are
+        held in memory. The helpers must already be open; the pipeline does not own them.
+        
+        Args:
+            scraper (WebScraper): Open scraper
+            api (ApiHelper): API helper
+            writer (AsyncDatabaseWriter): Started database writer
+            report_generator (ReportGenerator): Report generator used by the report builder
+            threshold (float): Temperature difference above which a city is flagged in the warnings
+            queue_size (int): Capacity of the inter-stage queues, which provides backpressure
+        """
+        self.scraper = scraper
+        self.api = api
+        self.writer = writer
+        self.report_generator = report_generator
+        self.threshold = threshold
+        self.queue_size = queue_size
+        self.registry = CityRegistry()
+        self.logger = logging.getLogger(__name__)
+
+    async def _produce(self, stream, observations: asyncio.Queue):
+        try:
+            async for observation in stream:
+                await observations.put(observation)
+        finally:
+            await observations.put(_DONE)
+
+    async def _join(self, observations: asyncio.Queue, comparisons: asyncio.Queue,
+                    producers: int, test_status: Dict) -> Tuple[int, List[str]]:
+        keys = self.registry.keys
+        pending: Dict[int, Observation] = {}
+        batches = {source: ObservationBatch(source, self.registry) for source in ("web", "api")}
+        matched = 0
+        remaining = producers
+        while remaining:
+            if observations.empty():
+                # Hand the writer whatever has arrived while the producers are busy, one item per source
+                self._submit_batches(batches)
+            observation = await observations.get()
+            if observation is _DONE:
+                remaining -= 1
+                continue
+
+            city_key = keys[observation.city_id]
+            batches[observation.source].add(observation)
+
+            other = pending.pop(observation.city_id, None)
+            if other is None or other.source == observation.source:
+                pending[observation.city_id] = observation
+                continue
+            web, api = (observation, other) if observation.source == "web" else (other, observation)
+            matched += 1
+            self._compare(city_key, web.data, api.data, test_status)
+            await comparisons.put((city_key, web.data, api.data))
+
+        self._submit_batches(batches)
+        await comparisons.put(_DONE)
+        unmatched = []
+        for city_id, observation in pending.items():
+            missing = "API" if observation.source == "web" else "web"
+            test_status["warnings"].append(f"City {keys[city_id]} missing from {missing} data")
+            unmatched.append(keys[city_id])
+        return matched, unmatched
+
+    def _submit_batches(self, batches: Dict[str, ObservationBatch]):
+        for source, batch in batches.items():
+            if len(batch):
+                self.writer.submit_batch(batch)
+                batches[source] = ObservationBatch(source, self.registry)
+
+    def _compare(self, city_key: str, web: Tuple[float, float], api: Tuple[float, float], test_status: Dict):
+        temp_diff = abs(web[0] - api[0])
+        if temp_diff > self.threshold:
+            test_status["warnings"].append(
+                f"Large temperature difference for {city_key}: web={web[0]}°C, api={api[0]}°C (diff={temp_diff:.1f}°C)"
+            )
+
+    async def _build_report(self, comparisons: asyncio.Queue, test_status: Dict) -> Optional[str]:
+        with self.report_generator.open_report() as report:
+            while True:
+                item = await comparisons.get()
+                if item is _DONE:
+                    break
+                report.add(*item)
+
+            if not report.cities:
+                test_status["errors"].append("No city was returned by both sources")
+                test_status["success"] = False
+            return report.close(test_status)
+
+    def _producers(self, cities: List[Tuple[str, str]], observations: asyncio.Queue) -> List[Awaitable]:
+        """
+        Coroutines feeding Observation records over self.registry onto the queue, each ending with _DONE
+        """
+        return [
+            self._produce(self.scraper.iter_observations(cities, self.registry), observations),
+            self._produce(self.api.iter_observations(cities, self.registry), observations)
+        ]
+
+    async def run(self, cities: List[Tuple[str, str]], test_status: Optional[Dict] = None) -> Dict:
+        """
+        Run every stage concurrently for the given cities
+        
+        Args:
+            cities (List[Tuple[str, str]]): List of (city, country) tuples
+            test_status (Optional[Dict]): Status dict that collects errors and warnings
+            
+        Returns:
+            Dict: Report path, number of cities with both sources and the cities missing a source
+        """
+        test_status = test_status or {"success": True, "errors": [], "warnings": []}
+        self.registry = CityRegistry(cities)
+        observations: asyncio.Queue = asyncio.Queue(self.queue_size)
+        comparisons: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        with ExitStack() as run_scopes:
+            # The run deadline covers this run only; the shared policies outlive it
+            helpers = [helper for helper in (self.scraper, self.api) if helper is not None]
+            for resilience in {id(helper.resilience): helper.resilience for helper in helpers}.values():
+                run_scopes.enter_context(resilience.run_scope())
+            producers = self._producers(cities, observations)
+            tasks = [asyncio.ensure_future(producer) for producer in producers] + [
+                asyncio.ensure_future(self._join(observations, comparisons, len(producers), test_status)),
+                asyncio.ensure_future(self._build_report(comparisons, test_status))
+            ]
+            try:
+                *_, (matched, unmatched), report_path = await asyncio.gather(*tasks)
+            except Exception:
+                for task in tasks:
+                    task.cancel()
+                raise
+        await self.writer.flush()
+
+        return {
+            "report_path": report_path,
+            "matched": matched,
+            "unmatched": unmatched,
+            "test_status": test_status
+        }
+
+async def run_pipeline(config_path: str, cities: Optional[List[Tuple[str, str]]] = None,
+                       reports_dir: str = "automation_framework/reports") -> Dict:
+    """
+    Open every helper described by the config file and run the streaming pipeline once
+    
+    Args:
+        config_path (str): Path to the config file
+        cities (Optional[List[Tuple[str, str]]]): Cities to process, defaults to the [Cities] section
+        reports_dir (str): Directory the report is written to
+        
+    Returns:
+        Dict: Result of WeatherPipeline.run
+    """
+    config = ConfigHelper.shared(config_path)
+    if config.get_sharding_workers() > 1:
+        from .sharding import run_sharded_pipeline
+        return await run_sharded_pipeline(config_path, cities, reports_dir)
+
+    api = ApiHelper(config)
+    cities = cities or api.config.get_cities()
+    try:
+        async with WebScraper(api.config) as scraper, api, AsyncDatabaseWriter(api.config) as writer:
+            report_generator = ReportGenerator(reports_dir, api.config.get_report_format(), api.metrics)
+            pipeline = WeatherPipeline(scraper, api, writer, report_generator, api.config.get_temperature_threshold())
+            result = await pipeline.run(cities)
+    finally:
+        # A shared browser must not outlive the loop that asyncio.run is about to close
+        await BrowserService.stop_shared()
+    api.metrics.export()
+    return result
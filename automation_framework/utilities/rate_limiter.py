@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Token bucket that refills continuously at a fixed rate
+
+        Args:
+            rate (float): Tokens added per second; 0 or less disables limiting
+            capacity (float): Maximum number of tokens, i.e. the allowed burst size
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take tokens without waiting
+
+        Returns:
+            bool: True if the tokens were available and taken
+        """
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0):
+        """
+        Wait until enough tokens are available, then take them. Waiters are served in order.
+        """
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class HostRateLimiter:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Keeps a separate token bucket for every host so each site gets its own budget
+
+        Args:
+            rate (float): Requests per second allowed per host
+            capacity (float): Burst size allowed per host
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc.lower()
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.capacity)
+        return self.buckets[host]
+
+    def configure(self, rate: float, capacity: float = 1.0):
+        """
+        Change the rate and burst of every host, e.g. after a config reload; tokens already earned are kept up to the new burst
+        """
+        self.rate = rate
+        self.capacity = capacity
+        for bucket in self.buckets.values():
+            bucket._refill()
+            bucket.rate = rate
+            bucket.capacity = max(capacity, 1.0)
+            bucket.tokens = min(bucket.tokens, bucket.capacity)
+
+    async def acquire(self, url: str):
+        await self.bucket_for(url).acquire()
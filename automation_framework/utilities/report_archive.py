@@ -0,0 +1,187 @@
+import glob
+import json
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DISCREPANCY_COLUMNS = ("web_temperature", "api_temperature", "temperature_difference",
+                       "web_feels_like", "api_feels_like", "feels_like_difference")
+
+def _city_key(city: str) -> str:
+    return " ".join(city.lower().split())
+
+def read_report(path: str) -> Tuple[str, Iterator[Dict], Dict]:
+    """
+    Read a report written in any ReportGenerator format
+
+    Returns:
+        Tuple[str, Iterator[Dict], Dict]: Report timestamp, its discrepancies and the remaining summary sections
+    """
+    with open(path) as f:
+        if path.endswith(".ndjson"):
+            records = [json.loads(line) for line in f if line.strip()]
+            header = next(r for r in records if r.get("type") == "header")
+            summary = next((r for r in records if r.get("type") == "summary"), {})
+            discrepancies = (r for r in records if r.get("type") == "discrepancy")
+            return header["timestamp"], discrepancies, summary
+        report = json.load(f)
+
+    if "columns" in report:
+        columns = report.pop("columns")
+        discrepancies = (dict(zip(columns, values)) for values in zip(*columns.values()))
+    else:
+        discrepancies = iter(report.pop("discrepancies", []))
+    return report.pop("timestamp"), discrepancies, report
+
+class ReportArchive:
+    def __init__(self, path: str = "automation_framework/cache/report_archive.db"):
+        """
+        Indexed SQLite archive of generated reports for fast trend queries
+
+        compact() ingests report files incrementally. A file is skipped when its
+        path, size and modification time are already recorded. Discrepancies are
+        stored one row per city and report, indexed by normalised city name and
+        time, so trend queries never reopen the JSON files.
+
+        Args:
+            path (str): SQLite file holding the archive
+        """
+        archive_dir = os.path.dirname(path)
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.create_tables()
+
+    def create_tables(self):
+        with self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                generated_at TEXT NOT NULL,
+                success INTEGER,
+                mean_temperature_difference REAL,
+                max_temperature_difference REAL,
+                mean_feels_like_difference REAL,
+                max_feels_like_difference REAL,
+                highest_temperature_city TEXT,
+                highest_temperature REAL
+            )''')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_reports_generated_at ON reports (generated_at)')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS discrepancies (
+                report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+                city_key TEXT NOT NULL,
+                city TEXT NOT NULL,
+                generated_at TEXT NOT NULL,
+                web_temperature REAL,
+                api_temperature REAL,
+                temperature_difference REAL,
+                web_feels_like REAL,
+                api_feels_like REAL,
+                feels_like_difference REAL
+            )''')
+            self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_discrepancies_city_time
+                ON discrepancies (city_key, generated_at)''')
+
+    def compact(self, reports_dir: str = "automation_framework/reports") -> int:
+        """
+        Ingest every report file in the directory that is new or changed since the last run
+
+        Returns:
+            int: Number of files ingested
+        """
+        known = {path: (size, mtime) for path, size, mtime in self.conn.execute('SELECT path, size, mtime FROM reports')}
+        ingested = 0
+        for path in sorted(glob.glob(os.path.join(reports_dir, "weather_report_*"))):
+            stat = os.stat(path)
+            if known.get(path) == (stat.st_size, stat.st_mtime):
+                continue
+            try:
+                self._ingest(path, stat.st_size, stat.st_mtime)
+                ingested += 1
+            except (OSError, ValueError, KeyError, StopIteration) as e:
+                self.logger.error(f"Skipping unreadable report {path}: {str(e)}")
+        return ingested
+
+    def _ingest(self, path: str, size: int, mtime: float):
+        generated_at, discrepancies, summary = read_report(path)
+        statistics = summary.get("statistics", {})
+        temperature = statistics.get("temperature", {})
+        feels_like = statistics.get("feels_like", {})
+        highest = summary.get("highest_temperature") or {}
+        success = summary.get("test_status", {}).get("success")
+
+        with self.conn:
+            self.conn.execute('DELETE FROM discrepancies WHERE report_id IN (SELECT id FROM reports WHERE path = ?)', (path,))
+            self.conn.execute('DELETE FROM reports WHERE path = ?', (path,))
+            cursor = self.conn.execute('''
+                INSERT INTO reports (path, size, mtime, generated_at, success,
+                    mean_temperature_difference, max_temperature_difference,
+                    mean_feels_like_difference, max_feels_like_difference,
+                    highest_temperature_city, highest_temperature)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (path, size, mtime, generated_at, None if success is None else int(success),
+                  temperature.get("mean_difference"), temperature.get("max_difference"),
+                  feels_like.get("mean_difference"), feels_like.get("max_difference"),
+                  highest.get("city"), highest.get("temperature")))
+            report_id = cursor.lastrowid
+            self.conn.executemany(
+                'INSERT INTO discrepancies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((report_id, _city_key(d["city"]), d["city"], generated_at,
+                  *(d.get(column) for column in DISCREPANCY_COLUMNS)) for d in discrepancies)
+            )
+
+    def get_city_trend(self, city: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Tuple]:
+        """
+        Discrepancy history of one city, matched case-insensitively on the "city, country" key or the bare city name
+
+        Returns:
+            List[Tuple]: (generated_at, web_temperature, api_temperature, temperature_difference, feels_like_difference) rows, oldest first
+        """
+        key = _city_key(city)
+        query = '''
+            SELECT generated_at, web_temperature, api_temperature, temperature_difference, feels_like_difference
+            FROM discrepancies
+            WHERE (city_key = ? OR (city_key >= ? AND city_key < ?))
+              AND generated_at BETWEEN ? AND ?
+            ORDER BY generated_at
+        '''
+        params = (key, key + ",", key + "-", start or "", end or "9999")
+        return list(self.conn.execute(query, params).fetchall())
+
+    def get_city_aggregate(self, city: str, start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """
+        Count, mean and max of a city's temperature discrepancy over a time range
+        """
+        trend = self.get_city_trend(city, start, end)
+        differences = [row[3] for row in trend if row[3] is not None]
+        return {
+            "city": city,
+            "reports": len(differences),
+            "mean_difference": sum(differences) / len(differences) if differences else None,
+            "max_difference": max(differences) if differences else None,
+            "first": trend[0][0] if trend else None,
+            "last": trend[-1][0] if trend else None
+        }
+
+    def get_report_statistics(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Tuple]:
+        """
+        Per-report summary statistics over a time range
+
+        Returns:
+            List[Tuple]: (generated_at, mean_temperature_difference, max_temperature_difference, highest_temperature_city) rows
+        """
+        cursor = self.conn.execute('''
+            SELECT generated_at, mean_temperature_difference, max_temperature_difference, highest_temperature_city
+            FROM reports
+            WHERE generated_at BETWEEN ? AND ?
+            ORDER BY generated_at
+        ''', (start or "", end or "9999"))
+        return list(cursor.fetchall())
+
+    def close(self):
+        self.conn.close()
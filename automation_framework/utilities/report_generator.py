@@ -1,37 +1,118 @@
 import json
 import os
+import tempfile
 from datetime import datetime
-from typing import Dict, Tuple, List
+from typing import Dict, Iterable, Optional, Tuple
+from .metrics import NULL_METRICS, MetricsRegistry
+from .observations import ObservationBatch, join
 
-class ReportGenerator:
-    def __init__(self, reports_dir="automation_framework/reports"):
-        self.reports_dir = reports_dir
-        os.makedirs(reports_dir, exist_ok=True)
+REPORT_FORMATS = ("json", "compact", "ndjson", "columnar")
+REPORT_EXTENSIONS = {"json": "json", "compact": "json", "ndjson": "ndjson", "columnar": "columnar.json"}
+DISCREPANCY_FIELDS = ("city", "web_temperature", "api_temperature", "temperature_difference",
+                      "web_feels_like", "api_feels_like", "feels_like_difference")
 
-    def generate_report(self, web_data: Dict[str, Tuple[float, float]], 
-                       api_data: Dict[str, Tuple[float, float]],
-                       test_status: Dict = None) -> str:
+def default_test_status() -> Dict:
+    return {"success": True, "errors": [], "warnings": []}
+
+class RunningStats:
+    """
+    Mean, max and min of a stream of values, kept in constant memory
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+        self.min = None
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = value if self.max is None or value > self.max else self.max
+        self.min = value if self.min is None or value < self.min else self.min
+
+    def as_dict(self) -> Dict[str, float]:
+        if not self.count:
+            return {"mean_difference": 0, "max_difference": 0, "min_difference": 0}
+        return {
+            "mean_difference": self.total / self.count,
+            "max_difference": self.max,
+            "min_difference": self.min
+        }
+
+class StreamingReportWriter:
+    def __init__(self, report_path: str, fmt: str = "json", metrics: MetricsRegistry = NULL_METRICS):
         """
-        Generate a report comparing web and API weather data
-        
+        Writes a comparison report in a single pass
+
+        Each city pair is compared as it arrives. Its discrepancy is written to
+        the file straight away and folded into running aggregates, so memory does
+        not grow with the number of cities. Statistics and the highest-temperature
+        city are written when the writer is closed.
+
         Args:
-            web_data (Dict[str, Tuple[float, float]]): Web scraped temperature data
-            api_data (Dict[str, Tuple[float, float]]): API temperature data
-            test_status (Dict): Test execution status and warnings
-            
-        Returns:
-            str: Path to the generated report file
+            report_path (str): File to write
+            fmt (str): One of json (indented), compact (single-line JSON), ndjson or columnar
+            metrics (MetricsRegistry): Registry timing each write; when enabled its summary is embedded in the report
+        """
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format '{fmt}'. Supported formats: {', '.join(REPORT_FORMATS)}")
+        self.report_path = report_path
+        self.fmt = fmt
+        self.metrics = metrics
+        self.timestamp = datetime.now().isoformat()
+        self.temperature_stats = RunningStats()
+        self.feels_like_stats = RunningStats()
+        self.highest_temperature: Tuple[Optional[str], Optional[float]] = (None, None)
+        self.cities = 0
+        self.file = open(report_path, "w")
+        self.columns = None
+        if fmt == "columnar":
+            self.columns = {field: tempfile.TemporaryFile("w+") for field in DISCREPANCY_FIELDS}
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.file.closed:
+            return
+        if exc_type is None:
+            self.close()
+            return
+        # An aborted run still leaves a well-formed file, but one that says it failed
+        try:
+            self.close({"success": False, "errors": [f"Report aborted: {exc_type.__name__}: {exc_val}"], "warnings": []})
+        except Exception:
+            self.file.close()
+            os.remove(self.report_path)
+
+    def _write_header(self):
+        if self.fmt == "json":
+            self.file.write('{\n  "timestamp": %s,\n  "discrepancies": [' % json.dumps(self.timestamp))
+        elif self.fmt == "compact":
+            self.file.write('{"timestamp":%s,"discrepancies":[' % json.dumps(self.timestamp))
+        elif self.fmt == "ndjson":
+            self.file.write(json.dumps({"type": "header", "timestamp": self.timestamp}) + "\n")
+
+    def add(self, city: str, web: Tuple[float, float], api: Tuple[float, float]):
+        """
+        Compare one city present in both sources and stream out its discrepancy, if any
         """
-        discrepancies = []
-        for city in set(web_data.keys()) & set(api_data.keys()):
-            web_temp, web_feels = web_data[city]
-            api_temp, api_feels = api_data[city]
-            
-            temp_diff = abs(web_temp - api_temp)
-            feels_diff = abs(web_feels - api_feels)
-            
-            if temp_diff > 0 or feels_diff > 0:
-                discrepancies.append({
+        web_temp, web_feels = web
+        api_temp, api_feels = api
+        self.cities += 1
+
+        avg_temperature = (web_temp + api_temp) / 2
+        if self.highest_temperature[1] is None or avg_temperature > self.highest_temperature[1]:
+            self.highest_temperature = (city, avg_temperature)
+
+        temp_diff = abs(web_temp - api_temp)
+        feels_diff = abs(web_feels - api_feels)
+        if temp_diff > 0 or feels_diff > 0:
+            self.temperature_stats.add(temp_diff)
+            self.feels_like_stats.add(feels_diff)
+            with self.metrics.track("write", "report"):
+                self._write_discrepancy({
                     "city": city,
                     "web_temperature": web_temp,
                     "api_temperature": api_temp,
@@ -40,56 +121,150 @@ class ReportGenerator:
                     "api_feels_like": api_feels,
                     "feels_like_difference": feels_diff
                 })
-        
-        if discrepancies:
-            temp_diffs = [d["temperature_difference"] for d in discrepancies]
-            feels_diffs = [d["feels_like_difference"] for d in discrepancies]
-            
-            statistics = {
-                "temperature": {
-                    "mean_difference": sum(temp_diffs) / len(temp_diffs),
-                    "max_difference": max(temp_diffs),
-                    "min_difference": min(temp_diffs)
-                },
-                "feels_like": {
-                    "mean_difference": sum(feels_diffs) / len(feels_diffs),
-                    "max_difference": max(feels_diffs),
-                    "min_difference": min(feels_diffs)
-                }
-            }
+
+    def _write_discrepancy(self, discrepancy: Dict):
+        first = self.temperature_stats.count == 1
+        if self.fmt == "json":
+            entry = json.dumps(discrepancy, indent=2).replace("\n", "\n    ")
+            self.file.write(("\n    " if first else ",\n    ") + entry)
+        elif self.fmt == "compact":
+            self.file.write(("" if first else ",") + json.dumps(discrepancy, separators=(",", ":")))
+        elif self.fmt == "ndjson":
+            self.file.write(json.dumps({"type": "discrepancy", **discrepancy}) + "\n")
         else:
-            statistics = {
-                "temperature": {"mean_difference": 0, "max_difference": 0, "min_difference": 0},
-                "feels_like": {"mean_difference": 0, "max_difference": 0, "min_difference": 0}
-            }
-        
-        avg_temperatures = {}
-        for city in set(web_data.keys()) & set(api_data.keys()):
-            web_temp = web_data[city][0]
-            api_temp = api_data[city][0]
-            avg_temperatures[city] = (web_temp + api_temp) / 2
-        
-        highest_temp_city = max(avg_temperatures.items(), key=lambda x: x[1])
-        
-        report_data = {
-            "timestamp": datetime.now().isoformat(),
-            "discrepancies": discrepancies,
-            "statistics": statistics,
-            "test_status": test_status or {
-                "success": True,
-                "errors": [],
-                "warnings": []
+            for field, column in self.columns.items():
+                column.write(("" if first else ",") + json.dumps(discrepancy[field]))
+
+    def summary(self, test_status: Optional[Dict] = None) -> Dict:
+        summary = {
+            "statistics": {
+                "temperature": self.temperature_stats.as_dict(),
+                "feels_like": self.feels_like_stats.as_dict()
             },
+            "test_status": test_status or default_test_status(),
             "highest_temperature": {
-                "city": highest_temp_city[0],
-                "temperature": highest_temp_city[1]
+                "city": self.highest_temperature[0],
+                "temperature": self.highest_temperature[1]
             }
         }
-        
+        if self.metrics.enabled:
+            summary["metrics"] = self.metrics.summary()
+        return summary
+
+    def close(self, test_status: Optional[Dict] = None) -> str:
+        """
+        Write the aggregate sections and close the file
+
+        Returns:
+            str: Path to the report file
+        """
+        summary = self.summary(test_status)
+        if self.fmt == "json":
+            self.file.write("\n  ]" if self.temperature_stats.count else "]")
+            for key, value in summary.items():
+                self.file.write(',\n  %s: %s' % (json.dumps(key), json.dumps(value, indent=2).replace("\n", "\n  ")))
+            self.file.write("\n}")
+        elif self.fmt == "compact":
+            self.file.write("]," + json.dumps(summary, separators=(",", ":"))[1:])
+        elif self.fmt == "ndjson":
+            self.file.write(json.dumps({"type": "summary", **summary}) + "\n")
+        else:
+            self.file.write('{"timestamp":%s,"count":%d,"columns":{' % (json.dumps(self.timestamp), self.temperature_stats.count))
+            for index, (field, column) in enumerate(self.columns.items()):
+                self.file.write(("," if index else "") + json.dumps(field) + ":[")
+                column.seek(0)
+                for chunk in iter(lambda: column.read(65536), ""):
+                    self.file.write(chunk)
+                column.close()
+                self.file.write("]")
+            self.file.write("}," + json.dumps(summary, separators=(",", ":"))[1:])
+        self.file.close()
+        return self.report_path
+
+class ReportGenerator:
+    def __init__(self, reports_dir="automation_framework/reports", fmt: str = "json",
+                 metrics: MetricsRegistry = NULL_METRICS):
+        self.reports_dir = reports_dir
+        self.fmt = fmt
+        self.metrics = metrics
+        os.makedirs(reports_dir, exist_ok=True)
+
+    def open_report(self, fmt: Optional[str] = None) -> StreamingReportWriter:
+        """
+        Start a streaming report in the reports directory
+
+        Args:
+            fmt (Optional[str]): Output format, defaults to the generator's format
+
+        Returns:
+            StreamingReportWriter: Writer to feed city pairs into and close
+        """
+        fmt = fmt or self.fmt
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_path = os.path.join(self.reports_dir, f"weather_report_{timestamp}.json")
-        
-        with open(report_path, 'w') as f:
-            json.dump(report_data, f, indent=2)
-            
-        return report_path
+        report_path = os.path.join(self.reports_dir, f"weather_report_{timestamp}.{REPORT_EXTENSIONS.get(fmt, fmt)}")
+        return StreamingReportWriter(report_path, fmt, self.metrics)
+
+    def generate_streaming_report(self, comparisons: Iterable[Tuple[str, Tuple[float, float], Tuple[float, float]]],
+                                  test_status: Dict = None, fmt: Optional[str] = None) -> str:
+        """
+        Generate a report from a stream of (city, (web_temp, web_feels), (api_temp, api_feels)) rows
+
+        Returns:
+            str: Path to the generated report file
+        """
+        with self.open_report(fmt) as writer:
+            for city, web, api in comparisons:
+                writer.add(city, web, api)
+            return writer.close(test_status)
+
+    def generate_report(self, web_data: Dict[str, Tuple[float, float]],
+                       api_data: Dict[str, Tuple[float, float]],
+                       test_status: Dict = None, fmt: Optional[str] = None) -> str:
+        """
+        Generate a report comparing web and API weather data
+
+        Args:
+            web_data (Dict[str, Tuple[float, float]]): Web scraped temperature data
+            api_data (Dict[str, Tuple[float, float]]): API temperature data
+            test_status (Dict): Test execution status and warnings
+            fmt (Optional[str]): Output format, defaults to the generator's format
+
+        Returns:
+            str: Path to the generated report file
+        """
+        comparisons = ((city, web, api_data[city]) for city, web in web_data.items() if city in api_data)
+        return self.generate_streaming_report(comparisons, test_status, fmt)
+
+    def generate_report_from_batches(self, web: ObservationBatch, api: ObservationBatch,
+                                     test_status: Dict = None, fmt: Optional[str] = None) -> str:
+        """
+        Generate a report from one batch per source, joined on city ID
+
+        Args:
+            web (ObservationBatch): Web observations
+            api (ObservationBatch): API observations over the same registry
+            test_status (Dict): Test execution status and warnings
+            fmt (Optional[str]): Output format, defaults to the generator's format
+
+        Returns:
+            str: Path to the generated report file
+        """
+        keys = web.registry.keys
+        comparisons = ((keys[city_id], web_data, api_data) for city_id, web_data, api_data in join(web, api))
+        return self.generate_streaming_report(comparisons, test_status, fmt)
+
+    def generate_report_from_db(self, db, test_status: Dict = None, fmt: Optional[str] = None) -> str:
+        """
+        Generate a report straight from the database snapshot, streaming rows from the cursor
+
+        Args:
+            db (DatabaseHelper): Database holding the latest observations
+            test_status (Dict): Test execution status and warnings
+            fmt (Optional[str]): Output format, defaults to the generator's format
+
+        Returns:
+            str: Path to the generated report file
+        """
+        comparisons = ((city, (web_temp, web_feels), (api_temp, api_feels))
+                       for city, web_temp, web_feels, api_temp, api_feels in db.iter_comparisons())
+        return self.generate_streaming_report(comparisons, test_status, fmt)
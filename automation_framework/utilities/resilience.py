@@ -0,0 +1,335 @@
+import asyncio
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Iterator, Optional, Tuple, TypeVar
+import aiohttp
+from .config_helpers import ConfigHelper
+from .metrics import NULL_METRICS, MetricsRegistry
+
+T = TypeVar("T")
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a source whose circuit breaker is open
+    """
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """
+    Raised when the run's deadline has passed before or during a call
+    """
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Timeouts, connection errors, HTTP 429 and 5xx are worth retrying; other HTTP errors are not
+    """
+    if isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+        return False
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status == 429 or error.status >= 500
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientError)):
+        return True
+    # Playwright raises its own TimeoutError, which is not a builtin subclass
+    return type(error).__name__ == "TimeoutError"
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Stops calls to a source after consecutive failures, then lets one trial call through after a cool-down
+
+        Args:
+            failure_threshold (int): Consecutive retryable failures that open the circuit; 0 disables the breaker
+            reset_timeout (float): Seconds the circuit stays open before a trial call is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.failure_threshold > 0 and (self.failures >= self.failure_threshold or self.opened_at is not None):
+            self.opened_at = time.monotonic()
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        Rolling window of successful call latencies used to decide when to hedge
+
+        Args:
+            window (int): Number of most recent latencies kept
+            min_samples (int): Samples needed before a percentile is reported
+        """
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+class Resilience:
+    _shared: Dict[str, "Resilience"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 5.0,
+                 attempt_timeout: Optional[float] = 10.0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 run_deadline: Optional[float] = None, hedge: bool = False, hedge_min_samples: int = 20,
+                 metrics: MetricsRegistry = NULL_METRICS):
+        """
+        Retry, circuit breaker, deadline and hedging policy shared by the API helper and the scraper
+
+        Each call is bounded by ``attempt_timeout`` and by whatever is left of the
+        run deadline. Retryable failures are retried with full-jitter exponential
+        backoff and counted by the source's circuit breaker; an open breaker fails
+        calls immediately. With hedging on, an attempt still running after the
+        source's p95 latency gets a second identical request and the first to
+        succeed wins.
+
+        Args:
+            attempts (int): Maximum attempts per call, including the first
+            base_delay (float): Backoff before the second attempt, doubled each retry
+            max_delay (float): Upper bound of a single backoff
+            attempt_timeout (Optional[float]): Seconds allowed per attempt, None for no limit
+            failure_threshold (int): Consecutive failures that open a source's circuit
+            reset_timeout (float): Seconds before an open circuit allows a trial call
+            run_deadline (Optional[float]): Seconds a run may take inside run_scope(), None for no limit
+            hedge (bool): Send a second request when an attempt exceeds the source's p95
+            hedge_min_samples (int): Successful calls observed before hedging starts
+            metrics (MetricsRegistry): Registry counting retries, hedges and short-circuited calls
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.run_deadline = run_deadline
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.metrics = metrics
+        # Per context, so concurrent runs sharing this policy each keep their own deadline
+        self._deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+            f"resilience_deadline_{id(self)}", default=None)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.random = random.Random()
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper) -> "Resilience":
+        """
+        Return the policy shared by every helper built from the same config file, so breakers
+        and the run deadline are common to all of them
+        """
+        key = os.path.abspath(config.config_path)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(
+                    attempts=config.get_resilience_retry_attempts(),
+                    base_delay=config.get_resilience_retry_base_delay(),
+                    max_delay=config.get_resilience_retry_max_delay(),
+                    attempt_timeout=config.get_resilience_attempt_timeout(),
+                    failure_threshold=config.get_resilience_breaker_failure_threshold(),
+                    reset_timeout=config.get_resilience_breaker_reset_timeout(),
+                    run_deadline=config.get_resilience_run_deadline(),
+                    hedge=config.get_resilience_hedge_enabled(),
+                    hedge_min_samples=config.get_resilience_hedge_min_samples(),
+                    metrics=MetricsRegistry.from_config(config)
+                )
+            return cls._shared[key]
+
+    def apply_config(self, config: ConfigHelper):
+        """
+        Pick up retry, timeout, breaker and hedging changes from a reloaded config; breakers keep their state
+        """
+        self.attempts = max(1, config.get_resilience_retry_attempts())
+        self.base_delay = config.get_resilience_retry_base_delay()
+        self.max_delay = config.get_resilience_retry_max_delay()
+        self.attempt_timeout = config.get_resilience_attempt_timeout()
+        self.failure_threshold = config.get_resilience_breaker_failure_threshold()
+        self.reset_timeout = config.get_resilience_breaker_reset_timeout()
+        self.run_deadline = config.get_resilience_run_deadline()
+        self.hedge = config.get_resilience_hedge_enabled()
+        self.hedge_min_samples = config.get_resilience_hedge_min_samples()
+        for breaker in self.breakers.values():
+            breaker.failure_threshold = self.failure_threshold
+            breaker.reset_timeout = self.reset_timeout
+        for tracker in self.latencies.values():
+            tracker.min_samples = self.hedge_min_samples
+
+    @contextmanager
+    def run_scope(self, seconds: Optional[float] = None) -> Iterator["Resilience"]:
+        """
+        Apply the run deadline, defaulting to the configured RUN_DEADLINE, to the calls made inside the block
+
+        The policy is shared by everything built from one config file, so the deadline lives
+        in a context variable: it covers this block and the tasks started inside it, other runs
+        keep their own, and helpers used after the run are not bound by it.
+        """
+        seconds = self.run_deadline if seconds is None else seconds
+        token = self._deadline.set(time.monotonic() + seconds if seconds else None)
+        try:
+            yield self
+        finally:
+            self._deadline.reset(token)
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return self._deadline.get()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def breaker(self, source: str) -> CircuitBreaker:
+        if source not in self.breakers:
+            self.breakers[source] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[source]
+
+    def latency(self, source: str) -> LatencyTracker:
+        if source not in self.latencies:
+            self.latencies[source] = LatencyTracker(min_samples=self.hedge_min_samples)
+        return self.latencies[source]
+
+    def backoff(self, retry: int) -> float:
+        """
+        Full-jitter exponential backoff before the given retry (1 for the first retry)
+        """
+        return self.random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    def _timeout(self) -> Optional[float]:
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("Run deadline exceeded")
+        if remaining is None:
+            return self.attempt_timeout
+        return remaining if self.attempt_timeout is None else min(self.attempt_timeout, remaining)
+
+    async def call(self, source: str, operation: Callable[[], Awaitable[T]],
+                   slot: Optional[Callable[[], AsyncContextManager]] = None) -> T:
+        """
+        Run an operation under the policy
+
+        Args:
+            source (str): Name of the source, which selects the circuit breaker and latency history
+            operation (Callable[[], Awaitable[T]]): Factory creating a fresh attempt each time it is called
+            slot (Optional[Callable[[], AsyncContextManager]]): Held around each attempt only, e.g. a
+                concurrency semaphore; waiting for it does not count against the attempt timeout,
+                and it is released during backoff
+
+        Returns:
+            T: Result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: The source's circuit is open
+            DeadlineExceeded: The run deadline passed
+            Exception: The last attempt's error when attempts are exhausted or it is not retryable
+        """
+        breaker = self.breaker(source)
+        for attempt in range(1, self.attempts + 1):
+            if not breaker.allow():
+                self.metrics.inc("short_circuited_total", source=source)
+                raise CircuitOpenError(f"Circuit for {source} is open")
+            try:
+                result, elapsed = await self._slotted_attempt(source, operation, slot)
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError) and self.remaining() is not None and self.remaining() <= 0:
+                    # Running out of run time says nothing about the source, so the breaker is left alone
+                    breaker.trial_in_flight = False
+                    if isinstance(e, DeadlineExceeded):
+                        raise
+                    raise DeadlineExceeded("Run deadline exceeded") from e
+                if not is_retryable(e):
+                    # A definitive answer such as a 404 still shows the source is up
+                    if isinstance(e, aiohttp.ClientResponseError):
+                        breaker.record_success()
+                    breaker.trial_in_flight = False
+                    raise
+                breaker.record_failure()
+                if attempt == self.attempts:
+                    raise
+                delay = self.backoff(attempt)
+                remaining = self.remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
+                self.metrics.inc("retries_total", source=source)
+                self.logger.debug(f"Retrying {source} call in {delay:.2f}s after: {str(e) or type(e).__name__}")
+                await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            self.latency(source).add(elapsed)
+            return result
+
+    async def _slotted_attempt(self, source: str, operation: Callable[[], Awaitable[T]],
+                               slot: Optional[Callable[[], AsyncContextManager]]) -> Tuple[T, float]:
+        if slot is None:
+            return await self._timed_attempt(source, operation)
+        async with slot():
+            return await self._timed_attempt(source, operation)
+
+    async def _timed_attempt(self, source: str, operation: Callable[[], Awaitable[T]]) -> Tuple[T, float]:
+        timeout = self._timeout()
+        started = time.monotonic()
+        result = await self._attempt(source, operation, timeout)
+        return result, time.monotonic() - started
+
+    async def _attempt(self, source: str, operation: Callable[[], Awaitable[T]], timeout: Optional[float]) -> T:
+        hedge_after = self.latency(source).percentile(95) if self.hedge else None
+        if hedge_after is None or (timeout is not None and hedge_after >= timeout):
+            return await asyncio.wait_for(operation(), timeout)
+        return await asyncio.wait_for(self._hedged(source, operation, hedge_after), timeout)
+
+    async def _hedged(self, source: str, operation: Callable[[], Awaitable[T]], hedge_after: float) -> T:
+        tasks = [asyncio.ensure_future(operation())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.metrics.inc("hedges_total", source=source)
+                tasks.append(asyncio.ensure_future(operation()))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
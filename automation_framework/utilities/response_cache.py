@@ -0,0 +1,182 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from .config_helpers import ConfigHelper
+
+# Writes buffered before they are committed in one transaction
+WRITE_BATCH_SIZE = 100
+
+class ResponseCache:
+    _shared: Dict[str, "ResponseCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 600, max_entries: int = 10000):
+        """
+        TTL + LRU cache for weather responses, keyed by source and city
+
+        Entries live in memory in LRU order and are written to a local SQLite
+        store in batches, so repeated or overlapping runs within the TTL reuse
+        them. Evicting an entry from memory never deletes its row; instead the
+        store is trimmed to the newest max_entries rows on every commit, so the
+        cap holds for the whole file even when several processes write to it.
+
+        Args:
+            path (Optional[str]): SQLite file backing the cache; None keeps it in memory only
+            ttl_seconds (float): How long an entry stays valid
+            max_entries (int): Maximum number of entries kept before the least recently used is evicted
+        """
+        self.logger = logging.getLogger(__name__)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.users = 1
+        self.conn = None
+        self._pending: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        if path:
+            cache_dir = os.path.dirname(path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            self.conn = sqlite3.connect(path)
+            self._load()
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper) -> Optional["ResponseCache"]:
+        """
+        Return the cache described by the [Cache] section, or None when caching is disabled
+
+        Every helper using the same cache file gets the same instance, so both sources
+        share one LRU and one size cap. Each caller closes it once; the last close()
+        commits the buffered writes and closes the file.
+        """
+        if not config.get_cache_enabled():
+            return None
+        path = config.get_cache_path()
+        key = os.path.abspath(path) if path else f"memory:{os.path.abspath(config.config_path)}"
+        with cls._shared_lock:
+            cache = cls._shared.get(key)
+            if cache is None:
+                cache = cls._shared[key] = cls(path, config.get_cache_ttl(), config.get_cache_max_entries())
+            else:
+                cache.users += 1
+            return cache
+
+    def apply_config(self, config: ConfigHelper):
+        """
+        Pick up TTL and size changes from a reloaded config; enabling, disabling or moving the cache needs a restart
+        """
+        self.ttl_seconds = config.get_cache_ttl()
+        self.max_entries = config.get_cache_max_entries()
+        while len(self.entries) > self.max_entries:
+            self._evict(next(iter(self.entries)))
+
+    def _load(self):
+        with self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS response_cache (
+                source TEXT NOT NULL,
+                key TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (source, key)
+            )''')
+            self.conn.execute('DELETE FROM response_cache WHERE stored_at < ?', (time.time() - self.ttl_seconds,))
+        cursor = self.conn.execute('''
+            SELECT source, key, stored_at, value FROM response_cache
+            ORDER BY stored_at DESC LIMIT ?
+        ''', (self.max_entries,))
+        for source, key, stored_at, value in reversed(cursor.fetchall()):
+            self.entries[(source, key)] = (stored_at, json.loads(value))
+
+    @staticmethod
+    def _key(source: str, key: str) -> Tuple[str, str]:
+        return source, key.strip().lower()
+
+    def get(self, source: str, key: str) -> Optional[Any]:
+        """
+        Return the cached value if present and not expired, counting a hit or a miss
+        """
+        cache_key = self._key(source, key)
+        entry = self.entries.get(cache_key)
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            if entry is not None:
+                self._evict(cache_key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(cache_key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, source: str, key: str, value: Any):
+        """
+        Store a JSON-serialisable value, evicting the least recently used entries over the size cap.
+        The write reaches the SQLite store with the next batch, see flush().
+        """
+        cache_key = self._key(source, key)
+        stored_at = time.time()
+        self.entries[cache_key] = (stored_at, value)
+        self.entries.move_to_end(cache_key)
+        if self.conn:
+            self._pending[cache_key] = (stored_at, json.dumps(value))
+            if len(self._pending) >= WRITE_BATCH_SIZE:
+                self.flush()
+        while len(self.entries) > self.max_entries:
+            self._evict(next(iter(self.entries)))
+
+    def _evict(self, cache_key: Tuple[str, str]):
+        self.entries.pop(cache_key, None)
+        self._pending.pop(cache_key, None)
+
+    def flush(self):
+        """
+        Commit the buffered writes in one transaction and trim the store to the newest max_entries rows
+        """
+        if not self.conn or not self._pending:
+            return
+        rows = [(*cache_key, stored_at, value) for cache_key, (stored_at, value) in self._pending.items()]
+        self._pending.clear()
+        try:
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT OR REPLACE INTO response_cache (source, key, stored_at, value)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+                self.conn.execute('''
+                    DELETE FROM response_cache WHERE rowid IN (
+                        SELECT rowid FROM response_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not persist {len(rows)} cache entries: {str(e)}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries)
+        }
+
+    def close(self):
+        """
+        Release one user's reference; the last one commits pending writes and closes the store
+        """
+        self.users -= 1
+        if self.users > 0:
+            self.flush()
+            return
+        with self._shared_lock:
+            for key, cache in list(self._shared.items()):
+                if cache is self:
+                    del self._shared[key]
+        if self.conn:
+            self.flush()
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from .api_helpers import ApiHelper
+from .browser_pool import BrowserService
+from .config_helpers import ConfigHelper
+from .db_writer import AsyncDatabaseWriter
+from .observations import CityRegistry
+from .rate_limiter import TokenBucket
+from .web_scraper import WebScraper
+
+class PollingScheduler:
+    def __init__(self, scraper: WebScraper, api: ApiHelper, writer: AsyncDatabaseWriter,
+                 cities: List[Tuple[str, str]], default_interval: float = 300,
+                 intervals: Optional[Dict[str, float]] = None, api_calls_per_minute: float = 60,
+                 scrapes_per_minute: float = 30, workers: int = 8, threshold: float = 2.0):
+        """
+        Long-running poller that keeps every city fresh within the API and scraper budgets
+        
+        Cities sit in a priority queue ordered by when they become stale, i.e. the
+        last poll plus their polling interval. The most overdue city is dispatched
+        first. Cities listed in [PollIntervals] with a shorter interval are simply
+        due more often. Both budgets are token buckets with a burst of one, so
+        calls are spread evenly over the minute instead of bursting.
+        
+        Args:
+            scraper (WebScraper): Open scraper
+            api (ApiHelper): Open API helper
+            writer (AsyncDatabaseWriter): Started database writer
+            cities (List[Tuple[str, str]]): List of (city, country) tuples to keep fresh
+            default_interval (float): Seconds between polls for cities without their own interval
+            intervals (Optional[Dict[str, float]]): Per-city polling interval in seconds, keyed by lowercase city name
+            api_calls_per_minute (float): Global OpenWeatherMap budget
+            scrapes_per_minute (float): Global scraper budget
+            workers (int): Number of cities polled at the same time
+            threshold (float): Temperature difference above which a polled city is logged as a warning
+        """
+        self.scraper = scraper
+        self.api = api
+        self.writer = writer
+        self.default_interval = default_interval
+        self.intervals = {city.lower(): interval for city, interval in (intervals or {}).items()}
+        self.api_budget = TokenBucket(api_calls_per_minute / 60)
+        self.scrape_budget = TokenBucket(scrapes_per_minute / 60)
+        self.workers = workers
+        self.threshold = threshold
+        self.logger = logging.getLogger(__name__)
+        self.registry = CityRegistry()
+        self.queue: List[Tuple[float, float, int, int, int]] = []
+        self._sequence = itertools.count()
+        self._generations = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopped = False
+        self.polls = 0
+        self.last_polled: Dict[str, float] = {}
+        # Generation of each active city; heap entries and in-flight polls of an older one are stale
+        self.active: Dict[int, int] = {}
+
+        self._add_cities(cities)
+        self._check_budget(cities, api_calls_per_minute, scrapes_per_minute)
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper, scraper: WebScraper, api: ApiHelper,
+                    writer: AsyncDatabaseWriter) -> "PollingScheduler":
+        return cls(
+            scraper, api, writer, config.get_cities(),
+            default_interval=config.get_scheduler_default_interval(),
+            intervals=config.get_poll_intervals(),
+            api_calls_per_minute=config.get_scheduler_api_calls_per_minute(),
+            scrapes_per_minute=config.get_scheduler_scrapes_per_minute(),
+            workers=config.get_scheduler_workers(),
+            threshold=config.get_temperature_threshold()
+        )
+
+    def _add_cities(self, cities: List[Tuple[str, str]]):
+        now = time.monotonic()
+        for city, country in cities:
+            city_id = self.registry.add(city, country)
+            if city_id not in self.active:
+                self.active[city_id] = next(self._generations)
+                self._schedule(city_id, now)
+
+    def apply_config(self, config: ConfigHelper):
+        """
+        Pick up city, interval, budget and threshold changes from a reloaded config without restarting.
+        New cities are polled right away, removed cities are dropped when they next come due.
+        A city removed and added back starts a new generation, so its old queue entry is skipped.
+        """
+        cities = config.get_cities()
+        self.default_interval = config.get_scheduler_default_interval()
+        self.intervals = {city.lower(): interval for city, interval in config.get_poll_intervals().items()}
+        self.api_budget.rate = config.get_scheduler_api_calls_per_minute() / 60
+        self.scrape_budget.rate = config.get_scheduler_scrapes_per_minute() / 60
+        self.threshold = config.get_temperature_threshold()
+        wanted = {self.registry.add(city, country) for city, country in cities}
+        for city_id in list(self.active):
+            if city_id not in wanted:
+                del self.active[city_id]
+        self._add_cities(cities)
+        self._check_budget(cities, config.get_scheduler_api_calls_per_minute(), config.get_scheduler_scrapes_per_minute())
+
+    def interval_for(self, city: str) -> float:
+        return self.intervals.get(city.lower(), self.default_interval)
+
+    def _schedule(self, city_id: int, due_at: float):
+        # Shorter-interval cities win ties, the sequence number keeps ordering stable
+        city, _ = self.registry.city(city_id)
+        heapq.heappush(self.queue, (due_at, self.interval_for(city), next(self._sequence), city_id, self.active[city_id]))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _check_budget(self, cities: List[Tuple[str, str]], api_calls_per_minute: float, scrapes_per_minute: float):
+        needed = sum(60 / self.interval_for(city) for city, _ in cities)
+        for name, budget in (("API", api_calls_per_minute), ("scraper", scrapes_per_minute)):
+            if needed > budget:
+                self.logger.warning(
+                    f"Polling intervals need {needed:.1f} {name} calls per minute but the budget is {budget}; "
+                    f"cities will be refreshed less often than configured"
+                )
+
+    async def _poll_api(self, city_id: int) -> Optional[Tuple[float, float]]:
+        await self.api_budget.acquire()
+        city, country = self.registry.city(city_id)
+        data = await self.api.fetch_temperature_data(city, self.api.session, country)
+        if data:
+            self.writer.submit(self.registry.key(city_id), "api", *data)
+        return data
+
+    async def _poll_web(self, city_id: int) -> Optional[Tuple[float, float]]:
+        await self.scrape_budget.acquire()
+        # Every poll is a new observation, so a cached page from an earlier poll must not be reused
+        data = await self.scraper.extract_temperature_data(*self.registry.city(city_id), use_cache=False)
+        if data:
+            self.writer.submit(self.registry.key(city_id), "web", *data)
+        return data
+
+    async def _worker(self, work: asyncio.Queue):
+        while True:
+            city_id, generation = await work.get()
+            try:
+                api_data, web_data = await asyncio.gather(self._poll_api(city_id), self._poll_web(city_id))
+                if api_data and web_data and abs(web_data[0] - api_data[0]) > self.threshold:
+                    self.logger.warning(
+                        f"Large temperature difference for {self.registry.key(city_id)}: web={web_data[0]}°C, "
+                        f"api={api_data[0]}°C (diff={abs(web_data[0] - api_data[0]):.1f}°C)"
+                    )
+            except Exception as e:
+                self.logger.error(f"Polling failed for {self.registry.key(city_id)}: {str(e)}")
+            finally:
+                now = time.monotonic()
+                self.last_polled[self.registry.key(city_id)] = now
+                self.polls += 1
+                if self.active.get(city_id) == generation:
+                    city, _ = self.registry.city(city_id)
+                    self._schedule(city_id, now + self.interval_for(city))
+                work.task_done()
+
+    async def run(self, duration: Optional[float] = None):
+        """
+        Dispatch cities as they become stale until stop() is called or duration elapses
+        
+        Args:
+            duration (Optional[float]): Seconds to run for, or None to run until stopped
+        """
+        self._stopped = False
+        self._wakeup = asyncio.Event()
+        work: asyncio.Queue = asyncio.Queue(self.workers)
+        workers = [asyncio.ensure_future(self._worker(work)) for _ in range(self.workers)]
+        deadline = time.monotonic() + duration if duration is not None else None
+        try:
+            while not self._stopped:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                if not self.queue or self.queue[0][0] > now:
+                    wait = self.queue[0][0] - now if self.queue else None
+                    if deadline is not None:
+                        wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                _, _, _, city_id, generation = heapq.heappop(self.queue)
+                if self.active.get(city_id) == generation:
+                    await work.put((city_id, generation))
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self.writer.flush()
+
+    def stop(self):
+        self._stopped = True
+        if self._wakeup:
+            self._wakeup.set()
+
+async def run_scheduler(config_path: str, duration: Optional[float] = None, watch_interval: Optional[float] = 5.0):
+    """
+    Open every helper described by the config file and poll the [Cities] list continuously
+    
+    Args:
+        config_path (str): Path to the config file
+        duration (Optional[float]): Seconds to run for, or None to run until cancelled
+        watch_interval (Optional[float]): Seconds between config file change checks, None disables hot reload
+    """
+    api = ApiHelper(config_path)
+    async with WebScraper(api.config) as scraper, api, AsyncDatabaseWriter(api.config) as writer:
+        scheduler = PollingScheduler.from_config(api.config, scraper, api, writer)
+        watcher = None
+        if watch_interval:
+            # The helpers re-read their settings before the scheduler polls with them
+            api.config.subscribe(api.apply_config)
+            api.config.subscribe(scraper.apply_config)
+            api.config.subscribe(scheduler.apply_config)
+            watcher = asyncio.ensure_future(api.config.watch(watch_interval))
+        try:
+            await scheduler.run(duration)
+        finally:
+            if watcher:
+                watcher.cancel()
+            api.metrics.export()
+            await BrowserService.stop_shared()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+from typing import Awaitable, Dict, List, Optional, Sequence, Tuple, TypeVar
+from .api_helpers import ApiHelper
+from .browser_pool import BrowserService
+from .config_helpers import ConfigHelper
+from .db_writer import AsyncDatabaseWriter
+from .metrics import MetricsRegistry
+from .observations import CityRegistry, ObservationBatch
+from .pipeline import _DONE, WeatherPipeline
+from .rate_limiter import HostRateLimiter
+from .report_generator import ReportGenerator
+from .web_scraper import WebScraper
+
+# Longest a worker holds observations before sending a partial batch
+FLUSH_INTERVAL = 0.1
+
+T = TypeVar("T")
+
+def partition(cities: Sequence[T], shards: int) -> List[List[T]]:
+    """
+    Deal cities round-robin into at most ``shards`` non-empty lists, so slow and fast
+    regions of the input are spread over every worker
+    """
+    shards = max(1, min(shards, len(cities)))
+    return [cities[index::shards] for index in range(shards)]
+
+async def _run_shard(config_path: str, shard: int, shards: int, cities: List[Tuple[str, str]],
+                     results, batch_size: int):
+    # Built from the same list as the coordinator's registry, so city IDs agree across processes
+    registry = CityRegistry(cities)
+    mine = partition(registry.cities, shards)[shard]
+    api = ApiHelper(config_path)
+    try:
+        async with WebScraper(api.config) as scraper, api:
+            # The per-host politeness budget is for the whole run, so each worker gets its share
+            scraper.rate_limiter = HostRateLimiter(
+                api.config.get_scraper_requests_per_second() / shards,
+                api.config.get_scraper_burst() / shards
+            )
+            batches = {source: ObservationBatch(source) for source in ("web", "api")}
+            flushed_at = time.monotonic()
+
+            def flush():
+                nonlocal flushed_at
+                for source, batch in batches.items():
+                    if batch:
+                        # The queue pickles in a background thread, so a sent batch is replaced rather than cleared
+                        results.put(("batch", shard, batch))
+                        batches[source] = ObservationBatch(source)
+                flushed_at = time.monotonic()
+
+            async def relay(stream):
+                async for observation in stream:
+                    batches[observation.source].add(observation)
+                    if sum(map(len, batches.values())) >= batch_size or time.monotonic() - flushed_at >= FLUSH_INTERVAL:
+                        flush()
+
+            with api.resilience.run_scope():
+                await asyncio.gather(
+                    relay(scraper.iter_observations(mine, registry)),
+                    relay(api.iter_observations(mine, registry))
+                )
+            flush()
+    finally:
+        await BrowserService.stop_shared()
+
+def _shard_worker(config_path: str, shard: int, shards: int, cities: List[Tuple[str, str]],
+                  results, batch_size: int):
+    """
+    Entry point of a worker process: fetch both sources for its share of the cities, stream
+    ObservationBatch columns to the coordinator and finally hand over the worker's metrics
+    """
+    try:
+        asyncio.run(_run_shard(config_path, shard, shards, cities, results, batch_size))
+    except Exception as e:
+        logging.getLogger(__name__).exception(f"Shard {shard} failed")
+        results.put(("error", shard, f"Shard {shard} failed: {str(e)}"))
+    finally:
+        metrics = MetricsRegistry.from_config(ConfigHelper.shared(config_path))
+        results.put(("done", shard, metrics.snapshot() if metrics.enabled else None))
+
+class ShardedWeatherPipeline(WeatherPipeline):
+    def __init__(self, config_path: str, writer: AsyncDatabaseWriter, report_generator: ReportGenerator,
+                 threshold: float = 2.0, workers: int = 2, batch_size: int = 50, queue_size: int = 1000):
+        """
+        WeatherPipeline whose observations come from worker processes
+
+        The city list is partitioned across ``workers`` spawned processes, each with
+        its own WebScraper browser and ApiHelper client. Workers stream batches of
+        observations back over a queue; the coordinator feeds them through the same
+        join, database writer and report builder as a single-process run, so the
+        stored rows and the report contents are the same. Every worker receives the
+        whole city list and builds the same CityRegistry, so batches carry only IDs.
+
+        Args:
+            config_path (str): Config file every worker opens its helpers from
+            writer (AsyncDatabaseWriter): Started database writer owned by the coordinator
+            report_generator (ReportGenerator): Report generator used by the report builder
+            threshold (float): Temperature difference above which a city is flagged in the warnings
+            workers (int): Number of worker processes
+            batch_size (int): Observations a worker sends per message
+            queue_size (int): Capacity of the inter-stage queues, which provides backpressure
+        """
+        super().__init__(None, None, writer, report_generator, threshold, queue_size)
+        self.config_path = config_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.shard_errors: List[str] = []
+
+    def _producers(self, cities: List[Tuple[str, str]], observations: asyncio.Queue) -> List[Awaitable]:
+        return [self._produce_shards(cities, observations)]
+
+    async def _produce_shards(self, cities: List[Tuple[str, str]], observations: asyncio.Queue):
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        shards = min(max(1, self.workers), len(self.registry))
+        processes = [
+            context.Process(target=_shard_worker, daemon=True,
+                            args=(self.config_path, index, shards, cities, results, self.batch_size))
+            for index in range(shards)
+        ]
+        for process in processes:
+            process.start()
+
+        loop = asyncio.get_running_loop()
+        running = set(range(len(processes)))
+        try:
+            while running:
+                try:
+                    kind, shard, payload = await loop.run_in_executor(None, results.get, True, 0.5)
+                except queue.Empty:
+                    # A worker that exits cleanly has always queued its "done" message; only a crash loses it
+                    for index in list(running):
+                        if not processes[index].is_alive() and processes[index].exitcode != 0:
+                            running.discard(index)
+                            self.shard_errors.append(f"Shard {index} exited with code {processes[index].exitcode}")
+                    continue
+                if kind == "batch":
+                    # Registries are not pickled; the coordinator's was built from the same city list
+                    payload.registry = self.registry
+                    for observation in payload:
+                        await observations.put(observation)
+                elif kind == "error":
+                    self.shard_errors.append(payload)
+                else:
+                    # Fetch, cache and resilience metrics were recorded in the worker
+                    if payload:
+                        self.report_generator.metrics.merge(payload)
+                    running.discard(shard)
+        finally:
+            for process in processes:
+                process.join(5)
+                if process.is_alive():
+                    process.terminate()
+            await observations.put(_DONE)
+
+    async def run(self, cities: List[Tuple[str, str]], test_status: Optional[Dict] = None) -> Dict:
+        result = await super().run(cities, test_status)
+        if self.shard_errors:
+            result["test_status"]["errors"].extend(self.shard_errors)
+            result["test_status"]["success"] = False
+        return result
+
+async def run_sharded_pipeline(config_path: str, cities: Optional[List[Tuple[str, str]]] = None,
+                               reports_dir: str = "automation_framework/reports",
+                               workers: Optional[int] = None) -> Dict:
+    """
+    Run the pipeline across worker processes, with DB ingest and the report done by this process
+
+    Args:
+        config_path (str): Path to the config file
+        cities (Optional[List[Tuple[str, str]]]): Cities to process, defaults to the [Cities] section
+        reports_dir (str): Directory the report is written to
+        workers (Optional[int]): Number of worker processes, defaults to [Sharding] WORKERS
+
+    Returns:
+        Dict: Result of WeatherPipeline.run
+    """
+    config = ConfigHelper.shared(config_path)
+    cities = cities or config.get_cities()
+    metrics = MetricsRegistry.from_config(config)
+    async with AsyncDatabaseWriter(config) as writer:
+        report_generator = ReportGenerator(reports_dir, config.get_report_format(), metrics)
+        pipeline = ShardedWeatherPipeline(config.config_path, writer, report_generator,
+                                          config.get_temperature_threshold(),
+                                          workers or config.get_sharding_workers(), config.get_sharding_batch_size())
+        result = await pipeline.run(cities)
+    metrics.export()
+    return result
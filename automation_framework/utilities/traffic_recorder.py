@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Mapping, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from concurrent processes are not serialized
+    fcntl = None
+from urllib.parse import urlencode, urlparse
+from .config_helpers import ConfigHelper
+
+# One fixture file per source, each a JSON object keyed by request
+FIXTURE_FILES = {"api": "api_responses.json", "web": "web_extracts.json"}
+
+# Never written to a fixture, and left out of the key so recordings work with any key
+SECRET_PARAMS = ("appid",)
+
+# Held while a process merges its recordings into the fixture files
+LOCK_FILE = ".fixtures.lock"
+
+def request_key(url: str, params: Mapping[str, str]) -> str:
+    """
+    Stable fixture key of an API request: the endpoint name and its sorted parameters, without
+    the host, so a recording replays against any BASE_URL, and without the API key
+
+    Args:
+        url (str): Request URL, e.g. [API] BASE_URL
+        params (Mapping[str, str]): Query parameters
+
+    Returns:
+        str: Key such as ``weather?q=London&units=metric``
+    """
+    endpoint = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    query = urlencode(sorted((key, value) for key, value in params.items() if key not in SECRET_PARAMS))
+    return f"{endpoint}?{query}"
+
+class TrafficRecorder:
+    _shared: Dict[str, "TrafficRecorder"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, mode: str = "off", fixtures_dir: str = "automation_framework/tests/fixtures"):
+        """
+        Records what the weather sources answered and replays it without touching the network
+
+        ApiHelper stores raw API responses keyed by request_key(); WebScraper stores
+        the (temperature, feels_like) extract of every page keyed by city. In replay
+        mode the helpers answer from these fixtures only, so runs are deterministic,
+        offline and free of rate-limit waits. A request without a recording behaves
+        like a failed fetch.
+
+        Args:
+            mode (str): off, record or replay
+            fixtures_dir (str): Directory holding one JSON fixture file per source
+        """
+        self.mode = mode
+        self.fixtures_dir = fixtures_dir
+        self.logger = logging.getLogger(__name__)
+        self._fixtures: Dict[str, Dict[str, object]] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: ConfigHelper) -> "TrafficRecorder":
+        """
+        Return the recorder shared by every helper built from the same config file
+        """
+        key = os.path.abspath(config.config_path)
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(config.get_replay_mode(), config.get_replay_fixtures_dir())
+            return cls._shared[key]
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _path(self, source: str) -> str:
+        return os.path.join(self.fixtures_dir, FIXTURE_FILES[source])
+
+    def _read(self, source: str) -> Dict[str, object]:
+        try:
+            with open(self._path(source)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _load(self, source: str) -> Dict[str, object]:
+        fixtures = self._fixtures.get(source)
+        if fixtures is None:
+            fixtures = self._fixtures[source] = self._read(source)
+        return fixtures
+
+    def replay(self, source: str, key: str) -> Optional[object]:
+        """
+        Look up a recording
+
+        Args:
+            source (str): api or web
+            key (str): request_key() for the API, the city key for the web
+
+        Returns:
+            Optional[object]: Recorded value, or None when nothing was recorded for the key
+        """
+        with self._lock:
+            return self._load(source).get(key)
+
+    def record(self, source: str, key: str, value: Optional[object]):
+        """
+        Keep a successful answer for the next save(); does nothing unless recording
+        """
+        if not self.recording or value is None:
+            return
+        with self._lock:
+            self._load(source)[key] = value
+            self._dirty.add(source)
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """
+        Exclusive lock across processes, so one worker's read-merge-replace cannot drop another's recordings
+        """
+        with open(os.path.join(self.fixtures_dir, LOCK_FILE), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def save(self):
+        """
+        Write the recordings made since the last save, merged into the fixture files on disk
+        so that separate runs and worker processes add to one set of fixtures
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.fixtures_dir, exist_ok=True)
+            with self._file_lock():
+                self._merge_dirty()
+
+    def _merge_dirty(self):
+        for source in sorted(self._dirty):
+            fixtures = self._read(source)
+            fixtures.update(self._fixtures[source])
+            self._fixtures[source] = fixtures
+            path = self._path(source)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as f:
+                json.dump(fixtures, f, indent=2, sort_keys=True, ensure_ascii=False)
+                f.write("\n")
+            os.replace(temporary, path)
+            self.logger.info(f"Saved {len(fixtures)} {source} recordings to {path}")
+        self._dirty.clear()
@@ -0,0 +1,39 @@
+import logging
+from typing import Optional, Tuple
+from selectolax.lexbor import LexborHTMLParser
+
+logger = logging.getLogger(__name__)
+
+def parse_temperature_text(temperature_text: str) -> float:
+    return float(temperature_text.replace("°C", "").strip())
+
+def parse_feels_like_text(feels_like_text: str) -> float:
+    return float(feels_like_text.split("Feels Like:")[1].split("°C")[0].strip())
+
+def parse_weather_page(html: str) -> Optional[Tuple[float, float]]:
+    """
+    Parse temperature and feels-like values from server-rendered timeanddate.com HTML
+    
+    Args:
+        html (str): Page source
+        
+    Returns:
+        Optional[Tuple[float, float]]: Tuple of (temperature, feels_like) or None if the page could not be parsed
+    """
+    tree = LexborHTMLParser(html)
+    temp_node = tree.css_first("#qlook .h2") or tree.css_first(".h2")
+    if temp_node is None:
+        return None
+
+    feels_like_text = next(
+        (p.text() for p in tree.css("p") if "Feels Like:" in p.text()),
+        None
+    )
+    if feels_like_text is None:
+        return None
+
+    try:
+        return parse_temperature_text(temp_node.text()), parse_feels_like_text(feels_like_text)
+    except (IndexError, ValueError) as e:
+        logger.debug(f"Unparseable weather page: {str(e)}")
+        return None
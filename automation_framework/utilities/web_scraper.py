@@ -1,20 +1,57 @@
-from playwright.async_api import async_playwright, TimeoutError
 import logging
-from typing import Optional, Tuple, Dict
+from typing import AsyncIterator, Optional, Tuple, Dict
 import time
 from urllib.parse import quote
 import asyncio
+from .browser_pool import BrowserService
+from .city_catalog import CityCatalog, url_slug
 from .config_helpers import ConfigHelper
+from .http_client import create_session
+from .metrics import MetricsRegistry
+from .observations import CityRegistry, Observation, ObservationBatch
+from .rate_limiter import HostRateLimiter
+from .resilience import Resilience
+from .response_cache import ResponseCache
+from .traffic_recorder import TrafficRecorder
+from .weather_page_parser import parse_feels_like_text, parse_temperature_text, parse_weather_page
+
+# Sent with browserless requests so timeanddate.com serves the regular page
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+# Reads the temperature and "Feels Like" text in one round-trip to the page
+EXTRACT_TEMPERATURE_JS = """() => {
+    const temperature = document.querySelector('.h2');
+    const feelsLike = Array.from(document.querySelectorAll('p'))
+        .find(p => p.textContent.includes('Feels Like:'));
+    return [temperature ? temperature.innerText : null, feelsLike ? feelsLike.innerText : null];
+}"""
 
 class WebScraper:
-    def __init__(self, config: ConfigHelper):
+    def __init__(self, config: ConfigHelper, cache: Optional[ResponseCache] = None,
+                 catalog: Optional[CityCatalog] = None, metrics: Optional[MetricsRegistry] = None):
         self.logger = logging.getLogger(__name__)
-        self.playwright = None
-        self.browser = None
-        self.context = None
+        self.browser_service: Optional[BrowserService] = None
         self.config = config
-        self.country_codes = config.get_country_codes()
-        self.base_url = "https://www.timeanddate.com/weather"  # This is not the API base URL, but the scraper's base
+        self.catalog = catalog or CityCatalog.from_config(config)
+        self.rate_limiter = HostRateLimiter(
+            config.get_scraper_requests_per_second(),
+            config.get_scraper_burst()
+        )
+        self.backend = config.get_scraper_backend()
+        self._read_settings(config)
+        self.session = None
+        self.metrics = metrics or MetricsRegistry.from_config(config)
+        self.resilience = Resilience.from_config(config)
+        self.recorder = TrafficRecorder.from_config(config)
+        # Recorded and replayed runs must see every page, and must not serve fixtures to live runs
+        self.cache = None
+        self._owns_cache = False
+        if self.recorder.mode == "off":
+            self._owns_cache = cache is None
+            self.cache = cache or ResponseCache.from_config(config)
         # Special city URL mappings
         self.city_url_mappings: Dict[str, str] = {
             "New York": "new-york",
@@ -23,14 +60,54 @@ class WebScraper:
             "Dubai": "dubai"
         }
 
+    def _read_settings(self, config: ConfigHelper):
+        self.country_codes = config.get_country_codes()
+        self.country_slugs = {country.lower(): slug for country, slug in self.country_codes.items()}
+        self.base_url = config.get_scraper_base_url()
+        self.concurrency = config.get_scraper_concurrency()
+        self.lean_mode = config.get_scraper_lean_mode()
+        self.browser_fallback = config.get_scraper_browser_fallback()
+
+    def apply_config(self, config: ConfigHelper):
+        """
+        Pick up country code, URL, concurrency, rate limit, cache and resilience changes from a
+        reloaded config without restarting. Switching BACKEND needs a restart.
+        """
+        self._read_settings(config)
+        self.rate_limiter.configure(config.get_scraper_requests_per_second(), config.get_scraper_burst())
+        self.resilience.apply_config(config)
+        if self.cache:
+            self.cache.apply_config(config)
+
     async def __aenter__(self):
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=True)
-        self.context = await self.browser.new_context()
+        if self.recorder.replaying:
+            return self
+        if self.backend == "http":
+            self.session = create_session(self.concurrency)
+        else:
+            await self._ensure_browser()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.browser.close()
+        if self.session:
+            await self.session.close()
+            self.session = None
+        # A shared service outlives this scraper; a private one is stopped together with its driver
+        if self.browser_service and not self.config.get_browser_service():
+            await self.browser_service.stop()
+        self.browser_service = None
+        if self.cache and self._owns_cache:
+            self.cache.close()
+            self._owns_cache = False
+        self.recorder.save()
+
+    async def _ensure_browser(self):
+        """
+        Start the browser on first use. With the http backend this only happens when a page needs the fallback.
+        """
+        if self.browser_service is None:
+            self.browser_service = BrowserService.from_config(self.config, self.concurrency)
+        await self.browser_service.start()
 
     def _get_city_url(self, city: str, country: str) -> str:
         """
@@ -43,62 +120,217 @@ class WebScraper:
         Returns:
             str: Formatted URL for the city
         """
-        country_lower = country.lower()
-        if country_lower not in {k.lower(): v for k, v in self.country_codes.items()}:
+        country_code = self.country_slugs.get(country.lower())
+        if country_code is None and self.catalog:
+            country_code = self.catalog.get_country_slug(country)
+        if country_code is None:
             raise ValueError(f"Country '{country}' not supported. Supported countries: {list(self.country_codes.keys())}")
             
-        formatted_city = self.city_url_mappings.get(city, city.lower().replace(" ", "-"))
-        country_code = next(v for k, v in self.country_codes.items() if k.lower() == country_lower)
+        formatted_city = self.city_url_mappings.get(city, url_slug(city))
         
         return f"{self.base_url}/{country_code}/{formatted_city}"
 
-    async def extract_temperature_data(self, city: str, country: str) -> Optional[Tuple[float, float]]:
+    async def _extract_full(self, page, city: str, country: str) -> Optional[Tuple[float, float]]:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        try:
+            await page.wait_for_selector(".h2", timeout=5000)
+        except PlaywrightTimeoutError as e:
+            self.logger.error(f"Timeout while loading page for {city}, {country}: {str(e)}")
+            return None
+        
+        temp_element = await page.query_selector(".h2")
+        if not temp_element:
+            self.logger.error(f"Temperature element not found for {city}, {country}")
+            return None
+            
+        temperature_text = await temp_element.inner_text()
+        temperature = parse_temperature_text(temperature_text)
+        
+        feels_like_element = await page.query_selector("p:has-text('Feels Like:')")
+        if not feels_like_element:
+            self.logger.error(f"Feels-like element not found for {city}, {country}")
+            return None
+            
+        feels_like_text = await feels_like_element.inner_text()
+        feels_like = parse_feels_like_text(feels_like_text)
+        
+        return temperature, feels_like
+
+    async def _extract_lean(self, page, city: str, country: str) -> Optional[Tuple[float, float]]:
+        temperature_text, feels_like_text = await page.evaluate(EXTRACT_TEMPERATURE_JS)
+        if not temperature_text:
+            self.logger.error(f"Temperature element not found for {city}, {country}")
+            return None
+        if not feels_like_text:
+            self.logger.error(f"Feels-like element not found for {city}, {country}")
+            return None
+        return parse_temperature_text(temperature_text), parse_feels_like_text(feels_like_text)
+
+    async def extract_temperature_data(self, city: str, country: str,
+                                       use_cache: bool = True) -> Optional[Tuple[float, float]]:
         """
         Extract temperature and feels-like data from timeanddate.com
         
+        With the http backend the server-rendered page is fetched and parsed
+        without a browser; Playwright is only used when that fails. In replay
+        mode the recorded extract is returned and nothing is fetched.
+        
         Args:
             city (str): Name of the city
             country (str): Name of the country
+            use_cache (bool): Serve a cached extract when one is fresh; False always fetches, e.g. when
+                polling for a new observation, and still refreshes the cache
             
         Returns:
             Optional[Tuple[float, float]]: Tuple of (temperature, feels_like) or None if data unavailable
         """
-        page = None
+        cache_key = f"{city}, {country}"
+        if self.recorder.replaying:
+            data = self.recorder.replay("web", cache_key)
+            if data is None:
+                self.logger.error(f"No recorded page for {cache_key}")
+            return tuple(data) if data else None
+
+        if self.cache and use_cache:
+            cached = self.cache.get("web", cache_key)
+            self.metrics.cache_lookup("web", cached is not None)
+            if cached:
+                return tuple(cached)
+
+        data = None
+        if self.backend == "http":
+            data = await self._extract_via_http(city, country)
+            if data is None and self.browser_fallback:
+                self.logger.warning(f"Falling back to browser scraping for {city}, {country}")
+                data = await self._extract_via_browser(city, country)
+        else:
+            data = await self._extract_via_browser(city, country)
+
+        if self.cache and data:
+            self.cache.put("web", cache_key, data)
+        self.recorder.record("web", cache_key, list(data) if data else None)
+        return data
+
+    async def _extract_via_http(self, city: str, country: str) -> Optional[Tuple[float, float]]:
+        if self.session is None:
+            self.session = create_session(self.concurrency)
         try:
-            page = await self.context.new_page()
             url = self._get_city_url(city, country)
-            
-            try:
-                await page.goto(url, wait_until="domcontentloaded", timeout=15000)
-                await page.wait_for_selector(".h2", timeout=5000)
-            except TimeoutError as e:
-                self.logger.error(f"Timeout while loading page for {city}, {country}: {str(e)}")
-                return None
-            
-            temp_element = await page.query_selector(".h2")
-            if not temp_element:
-                self.logger.error(f"Temperature element not found for {city}, {country}")
-                return None
-                
-            temperature_text = await temp_element.inner_text()
-            temperature = float(temperature_text.replace("°C", "").strip())
-            
-            feels_like_element = await page.query_selector("p:has-text('Feels Like:')")
-            if not feels_like_element:
-                self.logger.error(f"Feels-like element not found for {city}, {country}")
-                return None
-                
-            feels_like_text = await feels_like_element.inner_text()
-            feels_like = float(feels_like_text.split("Feels Like:")[1].split("°C")[0].strip())
-            
-            return temperature, feels_like
-            
+        except ValueError as e:
+            self.logger.warning(f"HTTP fetch failed for {city}, {country}: {str(e)}")
+            return None
+
+        try:
+            # Politeness waits happen before the policy starts timing the attempt
+            await self.rate_limiter.acquire(url)
+            html = await self.resilience.call("web_http", lambda: self._fetch_page(url))
+        except Exception as e:
+            self.logger.warning(f"HTTP fetch failed for {city}, {country}: {str(e) or type(e).__name__}")
+            return None
+
+        data = parse_weather_page(html)
+        if data is None:
+            self.logger.warning(f"Could not parse weather page for {city}, {country}")
+        return data
+
+    async def _fetch_page(self, url: str) -> str:
+        with self.metrics.track("fetch", "web_http"):
+            async with self.session.get(url, headers=HTTP_HEADERS) as response:
+                response.raise_for_status()
+                return await response.text()
+
+    async def _extract_via_browser(self, city: str, country: str) -> Optional[Tuple[float, float]]:
+        """
+        Load the page in Playwright. In lean mode both values are read with a single
+        evaluated DOM query instead of separate selector and inner_text round-trips.
+        """
+        # Playwright is only imported once a page actually needs a browser
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        try:
+            await self._ensure_browser()
+            url = self._get_city_url(city, country)
+            await self.rate_limiter.acquire(url)
+            return await self.resilience.call("web_browser", lambda: self._load_page(url, city, country))
+        except (PlaywrightTimeoutError, asyncio.TimeoutError) as e:
+            self.logger.error(f"Timeout while loading page for {city}, {country}: {str(e) or type(e).__name__}")
+            return None
         except Exception as e:
             self.logger.error(f"Error scraping weather data for {city}, {country}: {str(e)}")
             return None
+
+    async def _load_page(self, url: str, city: str, country: str) -> Optional[Tuple[float, float]]:
+        """
+        One browser attempt on its own pooled page, so a hedged attempt never shares a page with the original
+        """
+        async with self.browser_service.page() as page:
+            with self.metrics.track("fetch", "web_browser") as timer:
+                await page.goto(url, wait_until="domcontentloaded", timeout=15000)
+                if self.lean_mode:
+                    data = await self._extract_lean(page, city, country)
+                else:
+                    data = await self._extract_full(page, city, country)
+                if data is None:
+                    timer.outcome = "failure"
+                return data
+
+    async def iter_observations(self, cities_with_countries: list[tuple[str, str]],
+                                registry: CityRegistry) -> AsyncIterator[Observation]:
+        """
+        Scrape weather data for multiple cities on up to [Scraper] CONCURRENCY pages at once,
+        yielding observations as they complete. Politeness is enforced by the per-host rate limiter.
+        
+        Args:
+            cities_with_countries (list[tuple[str, str]]): List of (city, country) tuples
+            registry (CityRegistry): Registry the observations' city IDs refer to; new cities are added to it
+            
+        Yields:
+            Observation: Web observation of one city
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def scrape(city: str, country: str):
+            async with semaphore:
+                return registry.add(city, country), await self.extract_temperature_data(city, country)
+
+        tasks = [asyncio.ensure_future(scrape(city, country)) for city, country in cities_with_countries]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                city_id, data = await next_done
+                if data:
+                    yield Observation(city_id, "web", *data)
         finally:
-            if page:
-                await page.close()
+            for task in tasks:
+                task.cancel()
+
+    async def iter_scrape_multiple_cities(self, cities_with_countries: list[tuple[str, str]]) -> AsyncIterator[Tuple[str, Tuple[float, float]]]:
+        """
+        iter_observations keyed by "City, Country" strings
+        
+        Args:
+            cities_with_countries (list[tuple[str, str]]): List of (city, country) tuples
+            
+        Yields:
+            Tuple[str, Tuple[float, float]]: City key and its (temperature, feels_like) data
+        """
+        registry = CityRegistry(cities_with_countries)
+        async for observation in self.iter_observations(cities_with_countries, registry):
+            yield registry.keys[observation.city_id], observation.data
+
+    async def scrape_batch(self, cities_with_countries: list[tuple[str, str]], registry: CityRegistry) -> ObservationBatch:
+        """
+        Scrape every city into one column-backed batch
+        
+        Args:
+            cities_with_countries (list[tuple[str, str]]): List of (city, country) tuples
+            registry (CityRegistry): Registry the batch's city IDs refer to
+            
+        Returns:
+            ObservationBatch: Web observations of the cities that returned data
+        """
+        batch = ObservationBatch("web", registry)
+        async for observation in self.iter_observations(cities_with_countries, registry):
+            batch.add(observation)
+        return batch
 
     async def scrape_multiple_cities(self, cities_with_countries: list[tuple[str, str]]) -> dict:
         """
@@ -111,9 +343,6 @@ class WebScraper:
             dict: Dictionary mapping cities to their temperature data
         """
         results = {}
-        for city, country in cities_with_countries:
-            await asyncio.sleep(2)
-            data = await self.extract_temperature_data(city, country)
-            if data:
-                results[f"{city}, {country}"] = data
-        return results
+        async for city_key, data in self.iter_scrape_multiple_cities(cities_with_countries):
+            results[city_key] = data
+        return results
\ No newline at end of file